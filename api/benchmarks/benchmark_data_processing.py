@@ -0,0 +1,201 @@
+"""
+Benchmark data_processing steps against their original implementations on a
+synthetic full season.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_data_processing missing rolling difficulty targets next_round --rounds 38
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import benchmarks.reference as reference
+import functions.data_processing as dp
+import functions.feature_engineering as fe
+import functions.feature_registry as fr
+import functions.target_engineering as te
+import helpers.data_helpers as dh
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+
+def timed(func, *args, repeat: int = 1, **kwargs):
+    """Best wall time over `repeat` runs and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(name: str, old_time: float, new_time: float):
+    print(f"{name}")
+    print(f"  original:   {old_time * 1000:9.1f} ms")
+    print(f"  vectorised: {new_time * 1000:9.1f} ms")
+    print(f"  speedup:    {old_time / new_time:9.1f}x")
+
+
+def build_history(rounds: int, players_per_team: int) -> tuple:
+    payloads = generate_season(rounds, players_per_team)
+    df = dp.add_element_history(element_gameweek_data(payloads))
+    df = dp.add_player_static_info(df, payloads["bootstrap-static"]["elements"])
+    return df, payloads
+
+
+def benchmark_missing(df: pd.DataFrame, payloads: dict, repeat: int):
+    old_time, expected = timed(reference.add_missing_player_data_loop, df)
+    new_time, result = timed(dp.add_missing_player_data, df, repeat=repeat)
+
+    sort_cols = ["element", "fixture"]
+    pd.testing.assert_frame_equal(
+        result.sort_values(sort_cols).reset_index(drop=True),
+        expected.sort_values(sort_cols).reset_index(drop=True),
+        check_dtype=False,
+    )
+    report(
+        f"add_missing_player_data ({len(result) - len(df)} rows added)",
+        old_time,
+        new_time,
+    )
+
+
+# function_app.targets, repeated here to avoid importing the Functions app
+TARGETS = [
+    "minutes",
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "saves",
+    "penalties_saved",
+    "penalties_missed",
+    "bonus",
+    "goals_conceded",
+    "yellow_cards",
+    "red_cards",
+    "own_goals",
+]
+
+
+def benchmark_rolling(df: pd.DataFrame, payloads: dict, repeat: int):
+    names = [f"{metric}_rolling_{window}" for window in [3, 5] for metric in TARGETS]
+    old_time, expected = timed(reference.add_rolling_averages_apply, df, TARGETS)
+    new_time, result = timed(fr.add_features, df, names, repeat=repeat)
+
+    pd.testing.assert_frame_equal(
+        result[names], expected[names].reindex(df.index), check_dtype=False
+    )
+    report("rolling averages (12 metrics, windows 3/5)", old_time, new_time)
+
+    names = [
+        f"{metric}_rolling_{window}" for window in [3, 5, 10] for metric in TARGETS
+    ]
+    names += [f"{metric}_ewm_5" for metric in TARGETS]
+    new_time, _ = timed(fr.add_features, df, names, repeat=repeat)
+    print(f"  windows 3/5/10 + EWM 5: {new_time * 1000:6.1f} ms")
+
+
+def benchmark_difficulty(df: pd.DataFrame, payloads: dict, repeat: int):
+    fixtures_df = dp.process_fixtures(payloads["fixtures"])
+    rows = df[["team", "round"]].rename(columns={"team": "element_team"})
+
+    def row_wise():
+        return rows.apply(
+            lambda row: reference.get_fixture_difficulty(row, fixtures_df), axis=1
+        ).to_numpy()
+
+    def vectorised():
+        index = fe.FixtureDifficultyIndex(fixtures_df)
+        return index.next_fixtures_mean(rows["element_team"], rows["round"])
+
+    old_time, expected = timed(row_wise)
+    new_time, result = timed(vectorised, repeat=repeat)
+
+    np.testing.assert_allclose(result, expected)
+    report("next_N_difficulty (index built in the timed call)", old_time, new_time)
+
+
+def benchmark_targets(df: pd.DataFrame, payloads: dict, repeat: int):
+    indicators = {
+        "minutes_60+": (df["minutes"] >= 60).astype(int),
+        "minutes_1+": (df["minutes"] > 0).astype(int),
+    }
+    columns = list(dict.fromkeys(dh.get_targets()))
+
+    old_time, expected = timed(
+        reference.create_targets_loop, df.assign(**indicators), columns, 8
+    )
+    new_time, result = timed(te.create_targets, df.copy(), 8, repeat=repeat)
+
+    pd.testing.assert_frame_equal(result, expected[result.columns])
+    report("create_targets (horizon 8)", old_time, new_time)
+
+    new_time, _ = timed(te.create_multi_horizon_targets, df, repeat=repeat)
+    print(f"  horizons 1/3/5/8 in one call: {new_time * 1000:6.1f} ms")
+
+
+def benchmark_next_round(df: pd.DataFrame, payloads: dict, repeat: int):
+    # Build the last round's template from the history before it
+    last_round = df["round"].max()
+    df = df[df["round"] < last_round]
+    fixtures_df = pd.DataFrame(payloads["fixtures"])
+    features = ["element", "team", "was_home", "element_type"]
+    args = (fixtures_df, features, [], TARGETS, last_round - 1)
+
+    old_time, expected = timed(reference.create_next_round_df_loop, df, *args)
+    new_time, result = timed(dh.create_next_round_df, df, *args, repeat=repeat)
+
+    # Static fields now come from each player's latest row instead of the first
+    static = ["value", "photo"]
+    pd.testing.assert_frame_equal(
+        result.drop(columns=static), expected.drop(columns=static), check_dtype=False
+    )
+    report(f"create_next_round_df ({len(result)} rows)", old_time, new_time)
+
+
+BENCHMARKS = {
+    "missing": benchmark_missing,
+    "rolling": benchmark_rolling,
+    "difficulty": benchmark_difficulty,
+    "targets": benchmark_targets,
+    "next_round": benchmark_next_round,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "steps",
+        nargs="*",
+        help=f"Steps to run, any of {list(BENCHMARKS)} (default all)",
+    )
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--players-per-team", type=int, default=35)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    unknown = set(args.steps) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown steps: {sorted(unknown)}")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The processing steps write debug files to the working directory
+        os.chdir(workdir)
+        try:
+            df, payloads = build_history(args.rounds, args.players_per_team)
+            print(f"History rows: {len(df)}, players: {df['element'].nunique()}")
+
+            for step in args.steps or BENCHMARKS:
+                BENCHMARKS[step](df, payloads, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
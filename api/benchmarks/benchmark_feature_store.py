@@ -0,0 +1,70 @@
+"""
+Benchmark the weekly feature store append against a full create_dataset rebuild
+on a synthetic season, and check that both give the same frame.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_feature_store --rounds 30
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+
+import functions.data_processing as dp
+import functions.feature_store as fs
+from benchmarks.benchmark_data_processing import TARGETS, timed
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--players-per-team", type=int, default=35)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    payloads = generate_season(args.rounds, args.players_per_team)
+    elements = payloads["bootstrap-static"]["elements"]
+    fixtures = payloads["fixtures"]
+    history = element_gameweek_data(payloads)
+    earlier = [row for row in history if row["round"] < args.rounds]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The processing steps write debug files to the working directory
+        os.chdir(workdir)
+        try:
+            fs.rebuild(
+                dp.build_dataset(earlier, elements, fixtures, TARGETS),
+                TARGETS,
+                finished_rounds=range(1, args.rounds),
+            )
+
+            append_time, _ = timed(
+                fs.append_rounds,
+                history,
+                elements,
+                fixtures,
+                range(1, args.rounds + 1),
+                TARGETS,
+            )
+            load_time, stored = timed(fs.load_store)
+            rebuild_time, rebuilt = timed(
+                dp.build_dataset, history, elements, fixtures, TARGETS
+            )
+            report = fs.check_consistency(stored, rebuilt)
+        finally:
+            os.chdir(cwd)
+
+    print(f"Rows: {len(rebuilt)}, players: {len(elements)}, rounds: {args.rounds}")
+    print(f"  append round {args.rounds}: {append_time * 1000:9.1f} ms")
+    print(f"  load store:      {load_time * 1000:9.1f} ms")
+    print(f"  full rebuild:    {rebuild_time * 1000:9.1f} ms")
+    print(f"  consistent:      {report['consistent']} {report['mismatches'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark ingestion against the local FPL API stand-in.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_ingestion fetch --elements 700 --latency 0.05
+    python -m benchmarks.benchmark_ingestion injest --latency 0.05
+
+'fetch' compares the concurrent element-summary fetch with the original
+sequential loop. 'injest' times the injest_data trigger end to end, in both
+full and incremental mode, inside a temporary working directory.
+"""
+
+import argparse
+import builtins
+import contextlib
+import os
+import tempfile
+import time
+
+import functions.data_ingestion as di
+from benchmarks.fpl_stub_server import FplStubServer, PayloadStore
+from benchmarks.synthetic_fpl import generate_season
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the per-request prints in data_ingestion."""
+    original_print = builtins.print
+    builtins.print = lambda *a, **k: None
+    try:
+        yield
+    finally:
+        builtins.print = original_print
+
+
+def run_sequential(bootstrap_data: dict) -> list:
+    """The original implementation: one request at a time with a fixed sleep."""
+    all_element_data = []
+    for element in bootstrap_data["elements"]:
+        element_data = di.fetch_element_summary(element["id"])
+        all_element_data += element_data["history"]
+        time.sleep(0.5)
+    return all_element_data
+
+
+def benchmark_fetch(args, payloads: dict):
+    bootstrap_data = payloads["bootstrap-static"]
+
+    with quiet():
+        start = time.perf_counter()
+        concurrent = di.fetch_element_gameweek_data(
+            bootstrap_data, max_workers=args.workers, requests_per_second=args.rate
+        )
+        concurrent_time = time.perf_counter() - start
+
+        sequential_time = None
+        if not args.skip_sequential:
+            start = time.perf_counter()
+            sequential = run_sequential(bootstrap_data)
+            sequential_time = time.perf_counter() - start
+            assert sequential == concurrent, "Concurrent fetch changed the output"
+
+    print(
+        f"Concurrent ({args.workers} workers, {args.rate:g} req/s): {concurrent_time:.2f} s"
+    )
+    if sequential_time is not None:
+        print(f"Sequential (0.5 s sleep): {sequential_time:.2f} s")
+        print(f"Speedup: {sequential_time / concurrent_time:.1f}x")
+
+
+def benchmark_injest(args, server: FplStubServer):
+    import azure.functions as func
+    import function_app
+
+    def call(mode: str) -> float:
+        req = func.HttpRequest(
+            method="GET", url="/api/injest_data", params={"mode": mode}, body=b""
+        )
+        requests_before = server.stats["requests"]
+
+        with quiet():
+            start = time.perf_counter()
+            response = function_app.injest_data(req)
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200, response.get_body()
+        print(
+            f"injest_data mode={mode}: {elapsed:.2f} s, "
+            f"{server.stats['requests'] - requests_before} API requests"
+        )
+        return elapsed
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+        try:
+            call("full")
+            call("incremental")
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["fetch", "injest"])
+    parser.add_argument("--elements", type=int, default=700)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--server-rate-limit",
+        type=float,
+        help="Requests per second the stand-in accepts before answering 429",
+    )
+    parser.add_argument("--workers", type=int, default=di.DEFAULT_MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=di.DEFAULT_REQUESTS_PER_SECOND)
+    parser.add_argument(
+        "--skip-sequential",
+        action="store_true",
+        help="Only time the concurrent fetch",
+    )
+    args = parser.parse_args()
+
+    players_per_team = max(1, args.elements // 20)
+    payloads = generate_season(args.rounds, players_per_team)
+    store = PayloadStore(payloads=payloads)
+
+    with FplStubServer(
+        store,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=args.server_rate_limit,
+    ) as server:
+        di.BASE_URL = server.base_url
+        di.DEFAULT_MAX_WORKERS = args.workers
+        di.DEFAULT_REQUESTS_PER_SECOND = args.rate
+        print(
+            f"Elements: {len(payloads['bootstrap-static']['elements'])}, "
+            f"rounds: {args.rounds}, server latency: {args.latency * 1000:.0f} ms"
+        )
+
+        if args.command == "fetch":
+            benchmark_fetch(args, payloads)
+        else:
+            benchmark_injest(args, server)
+
+
+if __name__ == "__main__":
+    main()
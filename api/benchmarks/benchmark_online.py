@@ -0,0 +1,114 @@
+"""
+Benchmark the weekly model refresh over a synthetic season: Linear Regression
+refitted on the whole history each round, against Online Linear Regression
+updated from its last checkpoint with only the round just played.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_online --rounds 38 --start 10
+
+Each week is scored by the mean absolute error, over the targets, of its
+predictions for the following round.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+import functions.data_processing as dp
+import functions.model_operations as mo
+import helpers.online_store as om
+from benchmarks.benchmark_data_processing import TARGETS, timed
+from benchmarks.benchmark_ingestion import quiet
+from benchmarks.benchmark_training import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+
+def next_round_mae(models: dict, df, next_round: int) -> float:
+    rows = df[df["round"] == next_round]
+    predictions = mo.predict_targets(models, rows)
+    return float(
+        np.mean([np.abs(predictions[t] - rows[t].to_numpy()).mean() for t in TARGETS])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--players-per-team", type=int, default=35)
+    parser.add_argument(
+        "--start", type=int, default=10, help="First round the models refresh after"
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    payloads = generate_season(args.rounds, args.players_per_team)
+    target_columns = {
+        target: (CATEGORICAL_FEATURES, NUMERICAL_FEATURES) for target in TARGETS
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The processing steps write debug files to the working directory
+        os.chdir(workdir)
+        os.makedirs("metrics")
+        try:
+            df = dp.build_dataset(
+                element_gameweek_data(payloads),
+                payloads["bootstrap-static"]["elements"],
+                payloads["fixtures"],
+                TARGETS,
+            )
+            online_store = om.OnlineModelStore(
+                cache_dir=os.path.join(workdir, "online_models")
+            )
+
+            weeks = []
+            for last_round in range(args.start, df["round"].max()):
+                history = df[df["round"] <= last_round]
+                week = [last_round, len(history)]
+                for model_type, kwargs in [
+                    ("Linear Regression", {}),
+                    ("Online Linear Regression", {"online_store": online_store}),
+                ]:
+                    with quiet():
+                        elapsed, models = timed(
+                            mo.train_target_models,
+                            model_type,
+                            history,
+                            target_columns,
+                            n_workers=1,
+                            **kwargs,
+                        )
+                    week += [elapsed, next_round_mae(models, df, last_round + 1)]
+                weeks.append(week)
+        finally:
+            os.chdir(cwd)
+
+    print(f"Weekly refresh of {len(TARGETS)} targets, next-round MAE")
+    print("  round    rows   refit ms     MAE  online ms     MAE")
+    for last_round, rows, refit, refit_mae, online, online_mae in weeks:
+        print(
+            f"  {last_round:5d} {rows:7d} {refit * 1000:10.1f} {refit_mae:7.4f}"
+            f" {online * 1000:10.1f} {online_mae:7.4f}"
+        )
+
+    # The first online week fits from scratch; the rest are updates
+    refit_times = [week[2] for week in weeks[1:]]
+    online_times = [week[4] for week in weeks[1:]]
+    print(
+        f"  weeks {weeks[1][0]}-{weeks[-1][0]}: refit {np.mean(refit_times) * 1000:.1f} ms"
+        f" (last/first {refit_times[-1] / refit_times[0]:.1f}x),"
+        f" online {np.mean(online_times) * 1000:.1f} ms"
+        f" (last/first {online_times[-1] / online_times[0]:.1f}x);"
+        f" mean MAE refit {np.mean([week[3] for week in weeks]):.4f},"
+        f" online {np.mean([week[5] for week in weeks]):.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
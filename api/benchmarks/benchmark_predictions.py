@@ -0,0 +1,149 @@
+"""
+Benchmark make_predictions end to end against the local FPL API stand-in.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_predictions --model "Linear Regression" --horizon 5
+
+Ingests a synthetic season into a temporary working directory, then times
+the make_predictions trigger with refit=true, which refits every target's
+model for each round of the horizon, and with the default train-once mode:
+first with an empty model registry, then repeated in a warm worker that has
+the models in memory and in a cold worker that loads them from disk.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import functions.data_ingestion as di
+import functions.model_operations as mo
+import helpers.model_registry as mr
+import helpers.storage as st
+import helpers.training_scheduler as ts
+from benchmarks.benchmark_ingestion import quiet
+from benchmarks.fpl_stub_server import FplStubServer, PayloadStore
+from benchmarks.synthetic_fpl import generate_season
+
+
+def call(function_app, func, params: dict) -> tuple:
+    """
+    Wall time of one make_predictions call, the time spent obtaining models
+    and the number of models trained.
+    """
+    calls = []
+    model_time = []
+    train_targets = ts.train_targets
+    train_target_models = mo.train_target_models
+
+    def counting_train_targets(train, model_type, df, target_columns, *args):
+        calls.extend(target_columns)
+        return train_targets(train, model_type, df, target_columns, *args)
+
+    def timed_train_target_models(*args, **kwargs):
+        start = time.perf_counter()
+        models = train_target_models(*args, **kwargs)
+        model_time.append(time.perf_counter() - start)
+        return models
+
+    req = func.HttpRequest(
+        method="GET", url="/api/make_predictions", params=params, body=b""
+    )
+
+    ts.train_targets = counting_train_targets
+    mo.train_target_models = timed_train_target_models
+    try:
+        with quiet():
+            start = time.perf_counter()
+            response = function_app.make_predictions(req)
+            elapsed = time.perf_counter() - start
+    finally:
+        ts.train_targets = train_targets
+        mo.train_target_models = train_target_models
+
+    assert response.status_code == 200, response.get_body()
+    return elapsed, sum(model_time), len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="Linear Regression")
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--players-per-team", type=int, default=35)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Processes targets are trained in (default one per CPU)",
+    )
+    args = parser.parse_args()
+    ts.DEFAULT_WORKERS = args.workers
+
+    import azure.functions as func
+    import function_app
+
+    logging.disable(logging.WARNING)
+
+    payloads = generate_season(args.rounds, args.players_per_team)
+
+    cwd = os.getcwd()
+    with FplStubServer(PayloadStore(payloads=payloads)) as server:
+        di.BASE_URL = server.base_url
+
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            os.makedirs("data")
+            os.makedirs("metrics")
+            try:
+                with quiet():
+                    function_app.injest_data(
+                        func.HttpRequest(
+                            method="GET", url="/api/injest_data", params={}, body=b""
+                        )
+                    )
+
+                params = {"model": args.model, "horizon": str(args.horizon)}
+                registry = mr.ModelRegistry(cache_dir="data/models")
+                runs = [
+                    ("refit per round", "true", mr.ModelRegistry("data/refit")),
+                    ("train once", "false", registry),
+                    ("warm worker", "false", registry),
+                    # A new instance only has the models saved on disk
+                    ("cold worker", "false", mr.ModelRegistry("data/models")),
+                ]
+                results = []
+                for label, refit, run_registry in runs:
+                    mr._registry = run_registry
+                    elapsed, model_time, trained = call(
+                        function_app, func, dict(params, refit=refit)
+                    )
+                    results.append((label, elapsed, model_time, trained))
+
+                    # The first round is predicted from the same models every time
+                    first_round = st.load_frame(f"predicted_round_{args.rounds + 1}")
+                    if label == "refit per round":
+                        expected = first_round
+                    else:
+                        pd.testing.assert_frame_equal(first_round, expected)
+            finally:
+                mr._registry = None
+                os.chdir(cwd)
+
+    print(
+        f"make_predictions model={args.model!r} horizon={args.horizon}, "
+        f"{len(payloads['bootstrap-static']['elements'])} players"
+    )
+    baseline = results[0][1]
+    for label, elapsed, model_time, trained in results:
+        print(
+            f"  {label:16} {elapsed:7.2f} s ({baseline / elapsed:4.1f}x), "
+            f"models {model_time * 1000:8.1f} ms, {trained:3d} trained"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark training every target's model on a synthetic season, with a
+preprocessor fitted per target and search candidate against the shared
+PreprocessingCache used by train_target_models, and against multi-output
+models that fit the targets sharing rows in one estimator.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_training --models "Decision Tree" "Histogram Gradient Boosting"
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+import functions.data_processing as dp
+import functions.feature_registry as fr
+import functions.model_operations as mo
+import helpers.training_scheduler as ts
+from benchmarks.benchmark_data_processing import TARGETS, timed
+from benchmarks.benchmark_ingestion import quiet
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+# function_app.features, repeated here to avoid importing the Functions app
+CATEGORICAL_FEATURES = ["element", "team", "was_home", "element_type"]
+NUMERICAL_FEATURES = ["selected"] + fr.metric_features(TARGETS)
+
+
+def mean_test_mae(model_type: str) -> float:
+    """Mean of the test MAEs train_model saved for each target."""
+    maes = []
+    for target in TARGETS:
+        filename = (
+            f"metrics/best_hyperparameters_and_metrics_{model_type}_{target}.json"
+        )
+        with open(filename) as f:
+            maes.append(json.load(f)["metrics"]["mae"])
+    return float(np.mean(maes))
+
+
+def benchmark_model(model_type: str, df, target_columns: dict):
+    runs = [
+        (
+            "preprocessor per target",
+            ts.train_targets,
+            (mo.train_model, model_type, df, target_columns, 1),
+            {},
+        ),
+        (
+            "shared preprocessing",
+            mo.train_target_models,
+            (model_type, df, target_columns),
+            {"n_workers": 1},
+        ),
+    ]
+    if model_type in mo.MULTI_OUTPUT_MODEL_TYPES:
+        runs.append(
+            (
+                "multi-output",
+                mo.train_target_models,
+                (model_type, df, target_columns),
+                {"n_workers": 1, "multi_output": True},
+            )
+        )
+
+    results = []
+    for label, func, func_args, kwargs in runs:
+        with quiet():
+            elapsed, models = timed(func, *func_args, **kwargs)
+        predictions = mo.predict_targets(models, df)
+        results.append((label, elapsed, mean_test_mae(model_type), predictions))
+
+    print(f"{model_type}, {len(TARGETS)} targets, {len(df)} rows")
+    baseline_time, baseline_predictions = results[0][1], results[0][3]
+    for label, elapsed, mae, predictions in results:
+        difference = max(
+            np.abs(predictions[t] - baseline_predictions[t]).max() for t in TARGETS
+        )
+        print(
+            f"  {label:24} {elapsed * 1000:9.1f} ms ({baseline_time / elapsed:4.1f}x), "
+            f"mean test MAE {mae:.4f}, max prediction difference {difference:.3g}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["Linear Regression", "Decision Tree", "Histogram Gradient Boosting"],
+        help="Model types to train",
+    )
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--players-per-team", type=int, default=35)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    payloads = generate_season(args.rounds, args.players_per_team)
+    target_columns = {
+        target: (CATEGORICAL_FEATURES, NUMERICAL_FEATURES) for target in TARGETS
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The processing steps write debug files to the working directory
+        os.chdir(workdir)
+        os.makedirs("metrics")
+        try:
+            df = dp.build_dataset(
+                element_gameweek_data(payloads),
+                payloads["bootstrap-static"]["elements"],
+                payloads["fixtures"],
+                TARGETS,
+            )
+
+            for model_type in args.models:
+                benchmark_model(model_type, df, target_columns)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
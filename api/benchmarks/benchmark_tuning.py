@@ -0,0 +1,152 @@
+"""
+Benchmark hyperparameter search on a synthetic season: the original
+RandomizedSearchCV of 10 candidates on two unordered folds, against the
+successive-halving search on round-ordered folds, and against training after
+a new round with the hyperparameters tuned on the previous one reused from
+the tuning cache, which skips the search.
+
+Run from the api/ directory:
+
+    python -m benchmarks.benchmark_tuning --models "Decision Tree" "Histogram Gradient Boosting"
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+
+from sklearn.pipeline import Pipeline
+
+import functions.data_processing as dp
+import functions.model_operations as mo
+import helpers.tuning_cache as tc
+from benchmarks import reference
+from benchmarks.benchmark_data_processing import TARGETS, timed
+from benchmarks.benchmark_ingestion import quiet
+from benchmarks.benchmark_training import (
+    CATEGORICAL_FEATURES,
+    NUMERICAL_FEATURES,
+    mean_test_mae,
+)
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+
+def randomized_tune_hyperparameters(
+    model, X_train, y_train, model_type, target, n_jobs=-1, rounds=None
+):
+    """mo.tune_hyperparameters with the original randomized search."""
+    param_dist = mo.param_distributions(model_type)
+    if param_dist is None:
+        return model, {"best_hyperparameters": None, "metrics": None}
+    if not isinstance(model, Pipeline):
+        param_dist = {
+            name.replace("regressor__", "", 1): values
+            for name, values in param_dist.items()
+        }
+
+    best, params = reference.randomized_search(
+        model, X_train, y_train, param_dist, n_jobs
+    )
+    result_data = {
+        "best_hyperparameters": {
+            (name if isinstance(model, Pipeline) else f"regressor__{name}"): value
+            for name, value in params.items()
+        },
+        "metrics": None,
+    }
+    return best, result_data
+
+
+def benchmark_model(model_type: str, df, target_columns: dict, workdir: str):
+    last_round = df["round"].max()
+    tune_hyperparameters = mo.tune_hyperparameters
+
+    results = []
+    mo.tune_hyperparameters = randomized_tune_hyperparameters
+    try:
+        with quiet():
+            elapsed, _ = timed(
+                mo.train_target_models, model_type, df, target_columns, n_workers=1
+            )
+    finally:
+        mo.tune_hyperparameters = tune_hyperparameters
+    results.append(("randomized search", elapsed, mean_test_mae(model_type)))
+
+    with quiet():
+        elapsed, _ = timed(
+            mo.train_target_models, model_type, df, target_columns, n_workers=1
+        )
+    results.append(("successive halving", elapsed, mean_test_mae(model_type)))
+
+    tuning = tc.TuningCache(os.path.join(workdir, f"tuning_{model_type}"))
+    with quiet():
+        # Tuned when the previous round was the latest
+        mo.train_target_models(
+            model_type,
+            df[df["round"] < last_round],
+            target_columns,
+            n_workers=1,
+            tuning=tuning,
+        )
+        elapsed, _ = timed(
+            mo.train_target_models,
+            model_type,
+            df,
+            target_columns,
+            n_workers=1,
+            tuning=tuning,
+        )
+    results.append(("cached after a round", elapsed, mean_test_mae(model_type)))
+
+    print(
+        f"{model_type}, {len(TARGETS)} targets, {len(df)} rows, "
+        f"tuning cache hits {tuning.stats['hits']}/{len(target_columns)}"
+    )
+    baseline = results[0][1]
+    for label, elapsed, mae in results:
+        print(
+            f"  {label:22} {elapsed * 1000:9.1f} ms ({baseline / elapsed:5.1f}x), "
+            f"mean test MAE {mae:.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["Decision Tree", "Histogram Gradient Boosting"],
+        help="Model types to tune",
+    )
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--players-per-team", type=int, default=35)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    payloads = generate_season(args.rounds, args.players_per_team)
+    target_columns = {
+        target: (CATEGORICAL_FEATURES, NUMERICAL_FEATURES) for target in TARGETS
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The processing steps write debug files to the working directory
+        os.chdir(workdir)
+        os.makedirs("metrics")
+        try:
+            df = dp.build_dataset(
+                element_gameweek_data(payloads),
+                payloads["bootstrap-static"]["elements"],
+                payloads["fixtures"],
+                TARGETS,
+            )
+
+            for model_type in args.models:
+                benchmark_model(model_type, df, target_columns, workdir)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Local stand-in for the FPL API with record/replay.
+
+Serves recorded (or synthetic) payloads for bootstrap-static, fixtures,
+element-summary/{id}, entry/{id}/event/{gw}/picks and entry/{id}/transfers,
+with configurable latency, error injection and rate limiting. Point the app
+at it with FPL_API_BASE_URL, e.g. from the api/ directory:
+
+    python -m benchmarks.fpl_stub_server record --out recordings --manager 123 --gameweek 30
+    python -m benchmarks.fpl_stub_server serve --recordings recordings --port 8765
+    FPL_API_BASE_URL=http://127.0.0.1:8765/api func start
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from functions.data_ingestion import TokenBucket
+from helpers.fpl_client import FplClient
+
+from benchmarks.synthetic_fpl import generate_season
+
+LIVE_BASE_URL = "https://fantasy.premierleague.com/api"
+
+
+def normalise_path(path: str) -> str:
+    """Map a request path such as '/api/element-summary/5/' to 'element-summary/5'."""
+    path = path.split("?", 1)[0].strip("/")
+    if path.startswith("api/"):
+        path = path[len("api/") :]
+    return path
+
+
+class PayloadStore:
+    """Payloads keyed by normalised path, read from memory or a recordings directory."""
+
+    def __init__(self, payloads: Optional[dict] = None, recordings_dir: str = None):
+        self.payloads = dict(payloads or {})
+        self.recordings_dir = recordings_dir
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._bodies:
+                return self._bodies[key]
+
+            if key in self.payloads:
+                body = json.dumps(self.payloads[key]).encode()
+            elif self.recordings_dir:
+                file_path = os.path.join(self.recordings_dir, key + ".json")
+                if not os.path.exists(file_path):
+                    return None
+                with open(file_path, "rb") as f:
+                    body = f.read()
+            else:
+                return None
+
+            self._bodies[key] = body
+            return body
+
+
+class FplStubServer:
+    """
+    Threaded HTTP server replaying FPL API payloads.
+
+    Parameters:
+    - store: payloads to serve
+    - latency: base delay in seconds added to every response
+    - jitter: extra uniformly distributed delay in seconds
+    - error_rate: fraction of requests answered with a 503
+    - rate_limit: requests per second before answering 429, None for no limit
+    - host, port: address to bind, port 0 picks a free port
+    """
+
+    def __init__(
+        self,
+        store: PayloadStore,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0, "throttled": 0}
+        self._stats_lock = threading.Lock()
+        self._rng = random.Random(0)
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: bytes = b"", headers: dict = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stub._count("requests")
+
+                if stub.bucket is not None and not stub.bucket.try_acquire():
+                    stub._count("throttled")
+                    self._send(429, headers={"Retry-After": "1"})
+                    return
+
+                delay = stub.latency + stub._rng.uniform(0, stub.jitter)
+                if delay:
+                    time.sleep(delay)
+
+                if stub.error_rate and stub._rng.random() < stub.error_rate:
+                    stub._count("errors")
+                    self._send(503)
+                    return
+
+                body = stub.store.get(normalise_path(self.path))
+                if body is None:
+                    self._send(404)
+                    return
+
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    stub._count("not_modified")
+                    self._send(304, headers={"ETag": etag})
+                    return
+
+                self._send(
+                    200, body, {"Content-Type": "application/json", "ETag": etag}
+                )
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FplStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FplStubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record(
+    out_dir: str,
+    base_url: str = LIVE_BASE_URL,
+    manager_id: int = None,
+    gameweek: int = None,
+    max_elements: int = None,
+):
+    """Record live API payloads into out_dir for later replay."""
+    client = FplClient()
+    bucket = TokenBucket(5)
+
+    def save(key: str):
+        bucket.acquire()
+        payload = client.get_json(f"{base_url}/{key}/")
+        file_path = os.path.join(out_dir, key + ".json")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            json.dump(payload, f)
+        print(f"Recorded {key}")
+        return payload
+
+    bootstrap = save("bootstrap-static")
+    save("fixtures")
+
+    for element in bootstrap["elements"][:max_elements]:
+        save(f"element-summary/{element['id']}")
+
+    if manager_id is not None:
+        save(f"entry/{manager_id}/transfers")
+        if gameweek is not None:
+            save(f"entry/{manager_id}/event/{gameweek}/picks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record live payloads")
+    record_parser.add_argument("--out", required=True)
+    record_parser.add_argument("--base-url", default=LIVE_BASE_URL)
+    record_parser.add_argument("--manager", type=int)
+    record_parser.add_argument("--gameweek", type=int)
+    record_parser.add_argument("--max-elements", type=int)
+
+    serve_parser = subparsers.add_parser("serve", help="Replay payloads")
+    serve_parser.add_argument(
+        "--recordings", help="Directory written by 'record', synthetic data if omitted"
+    )
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0)
+    serve_parser.add_argument("--jitter", type=float, default=0.0)
+    serve_parser.add_argument("--error-rate", type=float, default=0.0)
+    serve_parser.add_argument("--rate-limit", type=float)
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.out, args.base_url, args.manager, args.gameweek, args.max_elements)
+        return
+
+    if args.recordings:
+        store = PayloadStore(recordings_dir=args.recordings)
+    else:
+        store = PayloadStore(payloads=generate_season())
+
+    server = FplStubServer(
+        store,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        port=args.port,
+    )
+    print(f"Serving FPL stub on {server.base_url}")
+
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
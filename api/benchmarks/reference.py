@@ -0,0 +1,403 @@
+"""
+Original, loop-based implementations of functions that have since been
+vectorised or replaced. Kept as the reference for equivalence tests and
+benchmarks.
+"""
+
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RandomizedSearchCV
+
+
+def add_missing_player_data_loop(df: pd.DataFrame) -> pd.DataFrame:
+    # Columns that should be preserved from player metadata
+    static_cols = [
+        "element",
+        "element_type",
+        "first_name",
+        "second_name",
+        "web_name",
+        "team",
+        "region",
+        "team_join_date",
+        "birth_date",
+    ]
+
+    # Columns that should be zeroed out for missing fixtures
+    zero_cols = [
+        "total_points",
+        "minutes",
+        "goals_scored",
+        "assists",
+        "clean_sheets",
+        "goals_conceded",
+        "own_goals",
+        "penalties_saved",
+        "penalties_missed",
+        "yellow_cards",
+        "red_cards",
+        "saves",
+        "bonus",
+        "bps",
+        "influence",
+        "creativity",
+        "threat",
+        "ict_index",
+        "starts",
+        "expected_goals",
+        "expected_assists",
+        "expected_goal_involvements",
+        "expected_goals_conceded",
+        "mng_win",
+        "mng_draw",
+        "mng_loss",
+        "mng_underdog_win",
+        "mng_underdog_draw",
+        "mng_clean_sheets",
+        "mng_goals_scored",
+        "transfers_balance",
+        "selected",
+        "transfers_in",
+        "transfers_out",
+    ]
+
+    # Columns that should be filled from fixture data
+    fixture_cols = [
+        "fixture",
+        "opponent_team",
+        "was_home",
+        "kickoff_time",
+        "team_h_score",
+        "team_a_score",
+        "round",
+    ]
+
+    # Get all unique teams
+    teams = df["team"].unique()
+
+    logging.info(teams)
+
+    new_rows = []
+
+    for team in teams:
+        # Get all players in this team
+        team_players = df[df["team"] == team]["element"].unique()
+
+        # Get all fixtures for this team
+        team_fixtures = df[df["team"] == team]["fixture"].unique()
+
+        for player in team_players:
+            player_data = df[df["element"] == player]
+            existing_fixtures = player_data["fixture"].unique()
+
+            missing_fixtures = set(team_fixtures) - set(existing_fixtures)
+
+            if not missing_fixtures:
+                continue
+
+            player_meta = player_data.iloc[0][static_cols].to_dict()
+
+            for fixture in missing_fixtures:
+                # Get fixture data (take first row for this fixture)
+                fixture_data = (
+                    df[(df["team"] == team) & (df["fixture"] == fixture)]
+                    .iloc[0][fixture_cols]
+                    .to_dict()
+                )
+
+                # Create new row
+                new_row = {**player_meta, **fixture_data}
+
+                # Add zero values
+                for col in zero_cols:
+                    new_row[col] = 0
+
+                # Set some specific fields
+                new_row["modified"] = True  # Mark as artificially added
+                new_row["was_home"] = fixture_data["was_home"]
+
+                new_rows.append(new_row)
+
+    # Create DataFrame from new rows and concatenate with original
+    if new_rows:
+        new_df = pd.DataFrame(new_rows)
+        df = pd.concat([df, new_df], ignore_index=True)
+
+    return df
+
+
+def add_rolling_averages_apply(
+    df: pd.DataFrame,
+    metrics: List[str],
+    windows: List[int] = [3, 5],  # Add a list of windows for last 3 and last 5 games
+):
+    """
+    Calculate rolling averages for given metrics per player, excluding the current match.
+
+    Parameters:
+    - df: DataFrame with player match data (must include 'element' and 'round')
+    - metrics: list of column names to compute rolling averages for
+    - windows: list of window sizes (e.g., [3, 5] for last 3 and last 5 games)
+
+    Returns:
+    - DataFrame with added rolling average columns (e.g., 'goals_scored_rolling_3', 'goals_scored_rolling_5')
+    """
+    df = df.sort_values(by=["element", "round"])
+
+    # Ensure the metrics are float for rolling mean calculation
+    df[metrics] = df[metrics].astype(float)
+
+    # Loop over the different window sizes (3 and 5 games)
+    for window in windows:
+        for metric in metrics:
+            rolling_col = (
+                f"{metric}_rolling_{window}"  # Add window size to the column name
+            )
+            # Apply rolling average within each group (player) and shift
+            df[rolling_col] = (
+                df.groupby("element")[metric]
+                .apply(
+                    lambda x: x.shift(1).rolling(window=window, min_periods=1).mean()
+                )
+                .reset_index(level=0, drop=True)  # Reset index at group level
+            )
+
+    return df
+
+
+def get_fixture_difficulty(row, fixtures_df, window=3):
+    """Get average difficulty for next N fixtures for this team"""
+    team_id = row["element_team"]
+    current_gw = row["round"]
+
+    # Get future fixtures for this team
+    future_fixtures = fixtures_df[
+        (fixtures_df["fixture_event"] >= current_gw)
+        & (
+            (fixtures_df["fixture_team_h"] == team_id)
+            | (fixtures_df["fixture_team_a"] == team_id)
+        )
+    ]
+
+    # Get next N fixtures and calculate difficulty
+    difficulties = []
+    for _, fixture in future_fixtures.head(window).iterrows():
+        if fixture["fixture_team_h"] == team_id:
+            difficulties.append(fixture["fixture_team_h_difficulty"])
+        else:
+            difficulties.append(fixture["fixture_team_a_difficulty"])
+
+    return (
+        np.mean(difficulties) if difficulties else 3.0
+    )  # Default to medium difficulty
+
+
+def create_shifted_targets_loop(df, target_col, horizon):
+    # Create shifted columns for the target
+    for i in range(1, horizon + 1):
+        df[f"{target_col}_gw+{i}"] = df.groupby("element")[target_col].shift(-i)
+
+    # Sum the shifted columns to create the target
+    target_cols = [f"{target_col}_gw+{i}" for i in range(1, horizon + 1)]
+    df[f"target_{target_col}"] = df[target_cols].sum(axis=1)
+
+    return df
+
+
+def create_targets_loop(df, target_columns, horizon):
+    """target_engineering.create_targets with shift loops, for given columns."""
+    df = df.sort_values(["element", "round"])
+
+    for target_col in target_columns:
+        df = create_shifted_targets_loop(df, target_col, horizon)
+
+    intermediate_cols = [
+        f"{target_col}_gw+{i}"
+        for target_col in target_columns
+        for i in range(1, horizon + 1)
+    ]
+    df = df.drop(columns=intermediate_cols)
+
+    target_cols = [f"target_{target_col}" for target_col in target_columns]
+    return df.dropna(subset=target_cols)
+
+
+def create_next_round_df_loop(
+    df: pd.DataFrame,
+    fixtures_df: pd.DataFrame,
+    categorical_features: list,
+    numerical_features: list,
+    engineering_features: list,
+    round,
+) -> pd.DataFrame:
+    """
+    Create a DataFrame for the next round of fixtures with null or zero values for all statistics,
+    and use upcoming fixtures (from fixtures_df) to populate opponent and home/away status.
+
+    Parameters:
+    - df: The original DataFrame containing player match data
+    - categorical_features: List of categorical features like element, team, was_home, element_type
+    - numerical_features: List of numerical features like goals_scored_rolling_3, assists_rolling_5, etc.
+    - fixtures_df: DataFrame of upcoming fixture data for the next round
+
+    Returns:
+    - DataFrame with the same elements for the next round, with null or zero values for statistics,
+      and populated opponent_team and was_home based on upcoming fixtures.
+    """
+
+    logging.info(f"All event values: {fixtures_df['event'].unique().tolist()}")
+    logging.info(f"Event column type: {fixtures_df['event'].dtype}")
+
+    # Get the last round from the current DataFrame
+    # Get the last round from the current DataFrame
+    last_round = df["round"].max()
+
+    logging.info(
+        "LAST ROUNUD ###########################################################################"
+    )
+
+    # Determine the next round
+    next_round = last_round + 1
+
+    # Create a list to store new rows for the next round
+    new_rows = []
+
+    # Iterate over each element (player) in the current dataset
+    for player in df["element"].unique():
+        # Get the player's data for the next round
+        player_data = df[df["element"] == player].iloc[
+            0
+        ]  # Take the first row for the player
+        player_team = player_data["team"]
+
+        # Get all upcoming fixtures for this team in the next round
+        team_fixtures = fixtures_df[
+            (fixtures_df["event"] == next_round)
+            & (
+                (fixtures_df["team_h"] == player_team)
+                | (fixtures_df["team_a"] == player_team)
+            )
+        ]
+
+        # Skip players whose team has no fixtures in this round (blank GW)
+        if team_fixtures.empty:
+            continue
+
+        # For each fixture this team has in the next round (handles single and double GWs)
+        for _, fixture in team_fixtures.iterrows():
+            # Prepare the row for the next round with the necessary columns
+            new_row = {
+                col: None for col in categorical_features
+            }  # Set categorical features to None
+            new_row.update(
+                {col: 0 for col in numerical_features}
+            )  # Set numerical features to 0
+
+            # Add player-specific information (element, team, etc.)
+            new_row["element"] = player_data["element"]
+            new_row["team"] = player_team
+            new_row["element_type"] = player_data["element_type"]
+            new_row["web_name"] = player_data["web_name"]
+            new_row["photo"] = player_data["photo"]
+            new_row["value"] = player_data["value"]
+
+            # Set the round value for the next round
+            new_row["round"] = next_round
+
+            # Set opponent and home/away status
+            new_row["opponent_team"] = (
+                fixture["team_a"]
+                if fixture["team_h"] == player_team
+                else fixture["team_h"]
+            )
+            new_row["was_home"] = fixture["team_h"] == player_team
+
+            # Add any engineering features (set to 0 or appropriate default)
+            for feat in engineering_features:
+                new_row[feat] = 0
+
+            # Add this new row to the list
+            new_rows.append(new_row)
+
+    # Create a DataFrame from the new rows
+    next_round_df = pd.DataFrame(new_rows)
+
+    next_round_df = add_next_round_rolling_averages_loop(
+        df=df,
+        next_round_df=next_round_df,
+        metrics=engineering_features,  # Your metrics
+        windows=[3, 5],  # Your window sizes
+    )
+    next_round_df = add_next_round_season_totals_loop(
+        df=df, next_round_df=next_round_df, metrics=engineering_features
+    )
+
+    return next_round_df
+
+
+def add_next_round_rolling_averages_loop(
+    df: pd.DataFrame,
+    next_round_df: pd.DataFrame,
+    metrics: List[str],
+    windows: List[int] = [3, 5],
+) -> pd.DataFrame:
+    """data_helpers.add_rolling_averages with a per-player iterrows loop."""
+    # Sort the historical data by player and round
+    df = df.sort_values(["element", "round"])
+
+    # For each player in next_round_df
+    for _, row in next_round_df.iterrows():
+        player_id = row["element"]
+
+        # Get this player's historical data
+        player_history = df[df["element"] == player_id]
+
+        # For each window size
+        for window in windows:
+            # Get the last 'window' games (excluding current round if needed)
+            recent_games = player_history.iloc[-window:]
+
+            # For each metric
+            for metric in metrics:
+                col_name = f"{metric}_rolling_{window}"
+                # Calculate average and assign to next_round_df
+                next_round_df.loc[next_round_df["element"] == player_id, col_name] = (
+                    recent_games[metric].mean()
+                )
+
+    return next_round_df
+
+
+def add_next_round_season_totals_loop(
+    df: pd.DataFrame, next_round_df: pd.DataFrame, metrics: List[str]
+):
+    """data_helpers.add_season_totals with one groupby per metric."""
+    for metric in metrics:
+        next_round_df[f"{metric}_season_total"] = next_round_df["element"].map(
+            df.groupby("element")[metric].sum()
+        )
+    return next_round_df
+
+
+def randomized_search(model, X_train, y_train, param_dist: dict, n_jobs: int = -1):
+    """
+    model_operations.tune_hyperparameters as a RandomizedSearchCV of 10
+    candidates, each fitted on both halves of two unordered folds.
+
+    Returns:
+    - (best estimator refitted on all rows, best parameters)
+    """
+    search = RandomizedSearchCV(
+        model,
+        param_distributions=param_dist,
+        n_iter=10,
+        cv=2,
+        scoring="neg_mean_squared_error",
+        random_state=42,
+        n_jobs=n_jobs,
+    )
+    search.fit(X_train, y_train)
+    return search.best_estimator_, search.best_params_
@@ -0,0 +1,221 @@
+"""
+Deterministic synthetic FPL API payloads for benchmarks and offline runs.
+
+The payloads carry the fields the ingestion and processing code reads from
+bootstrap-static, fixtures and element-summary, at a realistic size.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+N_TEAMS = 20
+SEASON_START = datetime(2024, 8, 16, 19, 0)
+
+
+def round_robin(n_teams: int = N_TEAMS) -> list:
+    """Double round-robin schedule as a list of rounds of (home, away) pairs."""
+    teams = list(range(1, n_teams + 1))
+    rounds = []
+
+    for _ in range(n_teams - 1):
+        pairs = [(teams[i], teams[n_teams - 1 - i]) for i in range(n_teams // 2)]
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+    return rounds + [[(away, home) for home, away in pairs] for pairs in rounds]
+
+
+def generate_fixtures(finished_rounds: int, n_teams: int = N_TEAMS) -> list:
+    rng = random.Random(1)
+    fixtures = []
+
+    for round_idx, pairs in enumerate(round_robin(n_teams), start=1):
+        kickoff = SEASON_START + timedelta(days=7 * (round_idx - 1))
+        finished = round_idx <= finished_rounds
+
+        for home, away in pairs:
+            fixtures.append(
+                {
+                    "id": len(fixtures) + 1,
+                    "code": 2444000 + len(fixtures) + 1,
+                    "event": round_idx,
+                    "team_h": home,
+                    "team_a": away,
+                    "finished": finished,
+                    "kickoff_time": kickoff.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "team_h_score": rng.randint(0, 4) if finished else None,
+                    "team_a_score": rng.randint(0, 3) if finished else None,
+                    "team_h_difficulty": rng.randint(2, 5),
+                    "team_a_difficulty": rng.randint(2, 5),
+                }
+            )
+
+    return fixtures
+
+
+def generate_history_row(rng: random.Random, element: dict, fixture: dict) -> dict:
+    was_home = fixture["team_h"] == element["team"]
+    minutes = rng.choice([0, 0, 15, 60, 90, 90, 90])
+    played = minutes > 0
+    goals = rng.choice([0] * 8 + [1]) if played else 0
+    assists = rng.choice([0] * 8 + [1]) if played else 0
+    conceded = fixture["team_a_score"] if was_home else fixture["team_h_score"]
+
+    return {
+        "element": element["id"],
+        "fixture": fixture["id"],
+        "opponent_team": fixture["team_a"] if was_home else fixture["team_h"],
+        "total_points": (2 if minutes >= 60 else int(played)) + 4 * goals + 3 * assists,
+        "was_home": was_home,
+        "kickoff_time": fixture["kickoff_time"],
+        "team_h_score": fixture["team_h_score"],
+        "team_a_score": fixture["team_a_score"],
+        "round": fixture["event"],
+        "modified": False,
+        "minutes": minutes,
+        "goals_scored": goals,
+        "assists": assists,
+        "clean_sheets": int(minutes >= 60 and conceded == 0),
+        "goals_conceded": conceded if played else 0,
+        "own_goals": 0,
+        "penalties_saved": 0,
+        "penalties_missed": 0,
+        "yellow_cards": rng.choice([0] * 9 + [1]) if played else 0,
+        "red_cards": 0,
+        "saves": rng.randint(0, 5) if played and element["element_type"] == 1 else 0,
+        "bonus": rng.choice([0] * 9 + [1, 2, 3]) if played else 0,
+        "bps": rng.randint(0, 40) if played else 0,
+        "influence": f"{rng.uniform(0, 60) if played else 0:.1f}",
+        "creativity": f"{rng.uniform(0, 50) if played else 0:.1f}",
+        "threat": f"{rng.uniform(0, 50) if played else 0:.1f}",
+        "ict_index": f"{rng.uniform(0, 15) if played else 0:.1f}",
+        "starts": int(minutes >= 60),
+        "expected_goals": f"{rng.uniform(0, 0.8) if played else 0:.2f}",
+        "expected_assists": f"{rng.uniform(0, 0.5) if played else 0:.2f}",
+        "expected_goal_involvements": f"{rng.uniform(0, 1) if played else 0:.2f}",
+        "expected_goals_conceded": f"{rng.uniform(0, 2) if played else 0:.2f}",
+        "mng_win": 0,
+        "mng_draw": 0,
+        "mng_loss": 0,
+        "mng_underdog_win": 0,
+        "mng_underdog_draw": 0,
+        "mng_clean_sheets": 0,
+        "mng_goals_scored": 0,
+        "value": element["now_cost"],
+        "transfers_balance": rng.randint(-5000, 5000),
+        "selected": rng.randint(1000, 2000000),
+        "transfers_in": rng.randint(0, 10000),
+        "transfers_out": rng.randint(0, 10000),
+    }
+
+
+def generate_season(
+    finished_rounds: int = 30, players_per_team: int = 35, n_teams: int = N_TEAMS
+) -> dict:
+    """
+    Generate a full set of API payloads for a synthetic season.
+
+    Parameters:
+    - finished_rounds: number of rounds with results
+    - players_per_team: squad size per team
+    - n_teams: number of teams
+
+    Returns:
+    - Dict mapping API paths (e.g. 'element-summary/5') to payloads
+    """
+    rng = random.Random(0)
+    fixtures = generate_fixtures(finished_rounds, n_teams)
+
+    teams = [
+        {
+            "id": team_id,
+            "name": f"Team {team_id}",
+            "short_name": f"T{team_id:02d}",
+            "strength": rng.randint(2, 5),
+            "strength_attack_home": rng.randint(1000, 1350),
+            "strength_attack_away": rng.randint(1000, 1350),
+            "strength_defence_home": rng.randint(1000, 1350),
+            "strength_defence_away": rng.randint(1000, 1350),
+        }
+        for team_id in range(1, n_teams + 1)
+    ]
+
+    elements = []
+    for team_id in range(1, n_teams + 1):
+        for slot in range(players_per_team):
+            element_type = 1 if slot < 3 else 2 if slot < 14 else 3 if slot < 28 else 4
+            element_id = len(elements) + 1
+            elements.append(
+                {
+                    "id": element_id,
+                    "web_name": f"Player{element_id}",
+                    "first_name": f"First{element_id}",
+                    "second_name": f"Second{element_id}",
+                    "element_type": element_type,
+                    "team": team_id,
+                    "region": rng.randint(1, 200),
+                    "team_join_date": "2024-07-01",
+                    "birth_date": f"{rng.randint(1990, 2005)}-01-01",
+                    "photo": f"{element_id}.jpg",
+                    "now_cost": rng.randint(40, 130),
+                    "total_points": 0,
+                    "minutes": 0,
+                    "event_points": 0,
+                }
+            )
+
+    payloads = {}
+    for element in elements:
+        # Some players join mid-season and have no rows for earlier fixtures
+        first_round = 1 if rng.random() > 0.1 else rng.randint(2, 10)
+        history = [
+            generate_history_row(rng, element, fixture)
+            for fixture in fixtures
+            if fixture["finished"]
+            and fixture["event"] >= first_round
+            and element["team"] in (fixture["team_h"], fixture["team_a"])
+        ]
+
+        element["total_points"] = sum(row["total_points"] for row in history)
+        element["minutes"] = sum(row["minutes"] for row in history)
+        element["event_points"] = history[-1]["total_points"] if history else 0
+
+        payloads[f"element-summary/{element['id']}"] = {
+            "fixtures": [],
+            "history": history,
+            "history_past": [],
+        }
+
+    events = [
+        {
+            "id": event_id,
+            "finished": event_id <= finished_rounds,
+            "data_checked": event_id <= finished_rounds,
+            "is_current": event_id == finished_rounds,
+            "is_next": event_id == finished_rounds + 1,
+        }
+        for event_id in range(1, 2 * (n_teams - 1) + 1)
+    ]
+
+    payloads["bootstrap-static"] = {
+        "events": events,
+        "teams": teams,
+        "elements": elements,
+        "element_types": [
+            {"id": 1, "singular_name_short": "GKP"},
+            {"id": 2, "singular_name_short": "DEF"},
+            {"id": 3, "singular_name_short": "MID"},
+            {"id": 4, "singular_name_short": "FWD"},
+        ],
+    }
+    payloads["fixtures"] = fixtures
+
+    return payloads
+
+
+def element_gameweek_data(payloads: dict) -> list:
+    """Flatten the element-summary histories the way ingestion does."""
+    rows = []
+    for element in payloads["bootstrap-static"]["elements"]:
+        rows += payloads[f"element-summary/{element['id']}"]["history"]
+    return rows
@@ -5,11 +5,18 @@ import azure.functions as func
 import numpy as np
 import helpers.azure_helpers as ah
 import helpers.data_helpers as dh
+import helpers.json_helpers as jh
+import helpers.model_registry as mr
+import helpers.online_store as om
 import functions.data_ingestion as di
 import functions.data_processing as dp
+import functions.feature_registry as fr
+import functions.feature_store as fs
 import functions.model_operations as mo
 import pandas as pd
 import helpers.response_helper as rh
+import helpers.storage as st
+import helpers.tuning_cache as tc
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
@@ -18,21 +25,70 @@ app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 def injest_data(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Python HTTP trigger function processed a request.")
 
+    # "incremental" only refetches players whose stats changed since the last run
+    mode = req.params.get("mode", "full")
+
+    if mode not in ("full", "incremental"):
+        return func.HttpResponse(
+            "Invalid 'mode' parameter, expected 'full' or 'incremental'",
+            status_code=400,
+        )
+
+    previous_bootstrap = ah.fetch_from_json("bootstrap_data.json")
+
+    # max_age=0 revalidates the cached copies so ingestion always sees fresh data
     print("Fetching bootstrap data")
-    bootstrap_data = di.fetch_bootstrap_data()
-    ah.save_to_json(bootstrap_data, "data/bootstrap_data.json")
+    bootstrap_data = di.fetch_bootstrap_data(max_age=0)
 
     print("Fetching fixtures data")
-    fixtures_data = di.fetch_fixtures_data()
+    fixtures_data = di.fetch_fixtures_data(max_age=0)
+
+    # Nothing is saved unless both are fresh, so an API outage cannot store a
+    # stale snapshot as the latest one
+    if bootstrap_data is None or fixtures_data is None:
+        return func.HttpResponse(
+            "Could not fetch fresh data from the FPL API", status_code=502
+        )
     ah.save_to_json(fixtures_data, "data/fixtures_data.json")
 
     print("Fetching element gameweek data")
-    element_gameweek_data = di.fetch_element_gameweek_data(bootstrap_data)
-    ah.save_to_json(element_gameweek_data, "data/element_gameweek_data.json")
+    if mode == "incremental":
+        history_path = jh.resolve_records_path("data/element_gameweek_data")
+        element_gameweek_data = di.fetch_element_gameweek_data_incremental(
+            bootstrap_data,
+            previous_bootstrap,
+            list(jh.iter_records(history_path)) if history_path else None,
+        )
+    else:
+        element_gameweek_data = di.fetch_element_gameweek_data(bootstrap_data)
 
-    fixtures = di.fetch_fixtures_data()
+    # NDJSON lets create_dataset stream the history instead of json.load-ing it
+    jh.save_to_ndjson(element_gameweek_data, "data/element_gameweek_data.ndjson")
 
-    df = dp.create_dataset(fixtures, targets)
+    # Saved last so the snapshot only advances once its history is stored:
+    # save_to_ndjson replaces the history atomically and raises on failure,
+    # which keeps the next incremental diff correct if this run fails midway
+    ah.save_to_json(bootstrap_data, "data/bootstrap_data.json")
+
+    finished_rounds = di.get_finished_events(bootstrap_data)
+
+    # Incremental runs append newly finished rounds to the feature store instead
+    # of rebuilding every round, falling back to a rebuild when that is not possible
+    appended = None
+    if mode == "incremental":
+        appended = fs.append_rounds(
+            element_gameweek_data,
+            bootstrap_data["elements"],
+            fixtures_data,
+            finished_rounds,
+            targets,
+        )
+
+    if appended is None:
+        df = dp.create_dataset(fixtures_data, targets)
+        fs.rebuild(df, targets, finished_rounds=finished_rounds)
+    else:
+        print(f"Appended rounds {appended} to the feature store")
 
     return func.HttpResponse("Data injested successfully")
 
@@ -80,19 +136,56 @@ extra_featuires = ["expected_goals", "expected_assists", "starts"]
 
 engineering_features = targets
 
-# Automatically create rolling and season total features
-numerical_features = base_features.copy()
+# Rolling and season total features of each target, declared in the feature registry
+numerical_features = base_features + fr.metric_features(engineering_features)
 
-for stat in engineering_features:
-    numerical_features.extend(
-        [
-            f"{stat}_rolling_3",
-            f"{stat}_rolling_5",
-            f"{stat}_season_total",
-        ]
+features = categorical_features + numerical_features
+
+# Metrics whose rolling averages and season totals only some models use:
+# goalkeeper targets are trained on goalkeepers alone, who seldom score or
+# assist, and the other targets on every player, most of whom never save
+attacking_metrics = ["goals_scored", "assists", "penalties_missed"]
+
+
+def metric_feature_set(metrics: list) -> list:
+    return categorical_features + base_features + fr.metric_features(metrics)
+
+
+goalkeeper_features = metric_feature_set(
+    [metric for metric in engineering_features if metric not in attacking_metrics]
+)
+outfield_features = metric_feature_set(
+    [metric for metric in engineering_features if metric not in goalkeeper_targets]
+)
+
+# Features each target's model is trained on, so a target's model never pays
+# for the features only the other group uses
+target_features = {
+    target: (goalkeeper_features if target in goalkeeper_targets else outfield_features)
+    for target in targets
+}
+
+# Columns make_predictions reads from the feature store, including
+# the inputs of any feature that is not stored and is computed on load
+prediction_input_columns = list(
+    dict.fromkeys(
+        features
+        + fr.REGISTRY.source_columns(features)
+        + targets
+        + ["round", "opponent_team", "web_name", "photo", "value"]
     )
+)
 
-features = categorical_features + numerical_features
+# Columns optimise_transfers reads from horizon_predictions
+transfer_input_columns = [
+    "element",
+    "round",
+    "team",
+    "element_type",
+    "value",
+    "web_name",
+    "total_points",
+] + [f"{target}_points" for target in targets]
 
 
 def calculate_minutes_points(row):
@@ -175,6 +268,12 @@ def make_predictions(req: func.HttpRequest) -> func.HttpResponse:
 
     model_type = req.params.get("model")
     horizon = int(req.params.get("horizon", 1))
+    # Models are fitted once and reused for every round of the horizon;
+    # "true" refits them on each round's appended predictions instead
+    refit = req.params.get("refit", "false")
+    # "true" fits targets that share rows and features as one multi-output
+    # model, for model types that support it
+    multi_output = req.params.get("multi_output", "false")
     bootstrap_data = di.fetch_bootstrap_data()
     gameweek = dh.get_current_gameweek(bootstrap_data)
     # Default to 1 if not provided
@@ -182,9 +281,32 @@ def make_predictions(req: func.HttpRequest) -> func.HttpResponse:
     if not model_type:
         return func.HttpResponse("Missing 'model' parameter", status_code=400)
 
+    for name, value in [("refit", refit), ("multi_output", multi_output)]:
+        if value not in ("true", "false"):
+            return func.HttpResponse(
+                f"Invalid '{name}' parameter, expected 'true' or 'false'",
+                status_code=400,
+            )
+
     try:
         fixtures = di.fetch_fixtures_data()
-        df = pd.DataFrame(ah.fetch_from_json("merged_players_with_fixtures.json"))
+        # Read straight from the store's round partitions, which ingestion
+        # appends to, rather than a merged copy rewritten on every ingest
+        df = fs.load_store(columns=prediction_input_columns)
+
+        # Only the features the targets use, computing any that are not stored
+        used_features = list(
+            dict.fromkeys(
+                name for target in targets for name in target_features[target]
+            )
+        )
+        df = fr.add_features(df, used_features)
+        used_categorical, used_numerical = fr.REGISTRY.split(used_features)
+        used_metrics = [
+            metric
+            for metric in engineering_features
+            if metric in fr.REGISTRY.source_columns(used_numerical)
+        ]
 
         current_round = df["round"].max()
         max_round = 38  # Maximum round in a season
@@ -205,6 +327,23 @@ def make_predictions(req: func.HttpRequest) -> func.HttpResponse:
         # Create a copy of the original dataframe to add predictions to
         cumulative_df = df.copy()
 
+        target_columns = {
+            target: fr.REGISTRY.split(target_features[target]) for target in targets
+        }
+        # Repeat requests on the same snapshot load the models instead of
+        # retraining, new snapshots reuse the tuned hyperparameters and online
+        # models are updated from their last checkpoint
+        models = mo.train_target_models(
+            model_type,
+            cumulative_df,
+            target_columns,
+            registry=mr.get_registry(),
+            multi_output=multi_output == "true",
+            tuning=tc.get_tuning_cache(),
+            online_store=om.get_online_store(),
+        )
+        trained_rows = len(cumulative_df)
+
         # For each round in the horizon
         for round_offset in range(1, horizon + 1):
             target_round = current_round + round_offset
@@ -223,9 +362,9 @@ def make_predictions(req: func.HttpRequest) -> func.HttpResponse:
             next_round_df = dh.create_next_round_df(
                 cumulative_df,
                 round_fixtures,
-                categorical_features,
-                numerical_features,
-                engineering_features,
+                used_categorical,
+                used_numerical,
+                used_metrics,
                 target_round - 1,  # Current round we're building from
             )
 
@@ -235,19 +374,24 @@ def make_predictions(req: func.HttpRequest) -> func.HttpResponse:
                 )
                 continue
 
-            # Process each target
-            for target in targets:
-                model = mo.train_model(
+            if refit == "true" and len(cumulative_df) > trained_rows:
+                models = mo.train_target_models(
                     model_type,
                     cumulative_df,
-                    categorical_features,
-                    numerical_features,
-                    target,
+                    target_columns,
+                    registry=mr.get_registry(),
+                    multi_output=multi_output == "true",
+                    tuning=tc.get_tuning_cache(),
+                    online_store=om.get_online_store(),
                 )
-                predictions = model.predict(next_round_df)
+                trained_rows = len(cumulative_df)
+
+            predictions = mo.predict_targets(models, next_round_df)
 
+            # Process each target
+            for target in targets:
                 # Clamp predictions at 0
-                next_round_df[target] = np.maximum(predictions, 0)
+                next_round_df[target] = np.maximum(predictions[target], 0)
                 next_round_df[f"{target}_points"] = calculate_points(
                     next_round_df, target
                 )
@@ -273,17 +417,16 @@ def make_predictions(req: func.HttpRequest) -> func.HttpResponse:
             )
 
             # Save the prediction dataframe for this round
-            output_path = f"data/predicted_round_{target_round}.json"
-            next_round_df.to_json(output_path, orient="records", indent=2)
+            output_path = st.save_frame(
+                next_round_df, f"predicted_round_{target_round}"
+            )
             logging.info(f"Saved round {target_round} predictions to {output_path}")
 
         # Save the complete prediction set
 
         cumulative_df_js = cumulative_df[next_round_df.columns.tolist()]
 
-        cumulative_df_js.to_json(
-            "data/horizon_predictions.json", orient="records", indent=2
-        )
+        st.save_frame(cumulative_df_js, "horizon_predictions")
         logging.info(f"Saved complete horizon predictions ")
 
         # Generate response with all predictions
@@ -333,9 +476,7 @@ def optimise_team(req: func.HttpRequest) -> func.HttpResponse:
 
     gameweek = dh.get_current_gameweek(bootstrap_data)
 
-    df = pd.DataFrame(ah.fetch_from_json("horizon_predictions.json"))
-
-    df = df[df["round"] == (gameweek + 1)].copy()
+    df = st.load_frame("horizon_predictions", rounds=[gameweek + 1])
 
     optimised_team = mo.optimise_team(df, element_ids)
 
@@ -383,8 +524,11 @@ def optimise_tranfers(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Getting manager's bank value")
     managers_bank_value: float = managers_team["entry_history"]["bank"]
 
-    df = pd.DataFrame(ah.fetch_from_json("horizon_predictions.json"))
-    df = df[(df["round"] > gameweek) & (df["round"] <= gameweek + horizon)].copy()
+    df = st.load_frame(
+        "horizon_predictions",
+        columns=transfer_input_columns,
+        rounds=range(gameweek + 1, gameweek + horizon + 1),
+    )
 
     # Set 'element' and 'team' aside
     summed_df = df.groupby("element", as_index=False).sum(numeric_only=True)
@@ -394,7 +538,7 @@ def optimise_tranfers(req: func.HttpRequest) -> func.HttpResponse:
     summed_df["now_cost"] = df.groupby("element")["value"].first().values
     summed_df["web_name"] = df.groupby("element")["web_name"].first().values
 
-    summed_df.to_json("data/summed.json", orient="records", indent=2)
+    st.save_frame(summed_df, "summed")
 
     result = mo.optimize_transfers(
         summed_df, element_ids, managers_bank_value, free_transfers, sadsa, targets
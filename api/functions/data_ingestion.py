@@ -1,27 +1,46 @@
+import os
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.fpl_client import FplApiError, get_client
+from helpers.http_cache import get_cache
+
+# Point at a local stand-in (see benchmarks/fpl_stub_server.py) with FPL_API_BASE_URL
+BASE_URL = os.environ.get("FPL_API_BASE_URL", "https://fantasy.premierleague.com/api")
+
+# Defaults for the concurrent element-summary fetch
+DEFAULT_MAX_WORKERS = int(os.environ.get("FPL_MAX_WORKERS", 8))
+DEFAULT_REQUESTS_PER_SECOND = float(os.environ.get("FPL_REQUESTS_PER_SECOND", 10))
 
 
 def send_request(url: str) -> dict:
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error occurred: {e}")
+        return get_client().get_json(url)
+    except FplApiError as e:
+        print(e)
+        return None
+
+
+def send_cached_request(url: str, max_age: float = None) -> dict:
+    """Like send_request, but served from the on-disk HTTP cache when fresh."""
+    try:
+        return get_cache().get_json(get_client(), url, max_age=max_age)
+    except FplApiError as e:
+        print(e)
         return None
 
 
-def fetch_bootstrap_data() -> dict:
-    url = "https://fantasy.premierleague.com/api/bootstrap-static/"
+def fetch_bootstrap_data(max_age: float = None) -> dict:
+    url = f"{BASE_URL}/bootstrap-static/"
     print(f"Fetching data from {url}")
 
-    data = send_request(url)
+    data = send_cached_request(url, max_age=max_age)
     return data
 
 
 def fetch_managers_team(manager_id: int, gameweek_id: str) -> dict:
-    url = f"https://fantasy.premierleague.com/api/entry/{manager_id}/event/{gameweek_id}/picks/"
+    url = f"{BASE_URL}/entry/{manager_id}/event/{gameweek_id}/picks/"
     print(f"Fetching data from {url}")
 
     data = send_request(url)
@@ -29,38 +48,237 @@ def fetch_managers_team(manager_id: int, gameweek_id: str) -> dict:
 
 
 def fetch_managers_transfers(manager_id: int) -> dict:
-    url = f"https://fantasy.premierleague.com/api/entry/{manager_id}/transfers/"
+    url = f"{BASE_URL}/entry/{manager_id}/transfers/"
     print(f"Fetching data from {url}")
 
     data = send_request(url)
     return data
 
 
-def fetch_fixtures_data() -> dict:
-    url = "https://fantasy.premierleague.com/api/fixtures/"
+def fetch_fixtures_data(max_age: float = None) -> dict:
+    url = f"{BASE_URL}/fixtures/"
     print(f"Fetching data from {url}")
 
-    data = send_request(url)
+    data = send_cached_request(url, max_age=max_age)
     return data
 
 
 def fetch_element_summary(element_id: int) -> dict:
-    url = f"https://fantasy.premierleague.com/api/element-summary/{element_id}/"
+    url = f"{BASE_URL}/element-summary/{element_id}/"
     print(f"Fetching data from {url}")
 
     data = send_request(url)
     return data
 
 
-def fetch_element_gameweek_data(bootstrap_data: dict) -> dict:
-    elements = bootstrap_data["elements"]
-    all_element_data = []
+class TokenBucket:
+    """
+    Thread-safe token bucket used to cap the request rate against the FPL API.
+
+    Parameters:
+    - rate: tokens added per second (the sustained request rate)
+    - capacity: maximum burst size, defaults to one second's worth of tokens
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Consume a token if one is available, else return the wait in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
 
-    for element in elements:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
 
-        element_id = element["id"]
+            return (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Consume a token without blocking, returning whether one was available."""
+        return self._take() == 0.0
+
+    def acquire(self):
+        """Block until a token is available and consume it."""
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return
+
+            time.sleep(wait)
+
+
+def fetch_element_histories(
+    element_ids: list,
+    max_workers: int = None,
+    requests_per_second: float = None,
+) -> list:
+    """
+    Fetch the element-summary history rows for the given elements.
+
+    Requests run on a bounded thread pool and are throttled by a shared
+    token bucket. Rows are returned in the order of ``element_ids``, so the
+    output matches a sequential fetch.
+
+    Parameters:
+    - element_ids: IDs of the elements to fetch
+    - max_workers: maximum number of requests in flight at once,
+      defaults to DEFAULT_MAX_WORKERS
+    - requests_per_second: sustained request rate across all workers,
+      defaults to DEFAULT_REQUESTS_PER_SECOND
+
+    Returns:
+    - List of history rows for the requested elements
+    """
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    bucket = TokenBucket(requests_per_second or DEFAULT_REQUESTS_PER_SECOND)
+
+    def fetch(element_id: int) -> dict:
+        bucket.acquire()
         element_data = fetch_element_summary(element_id)
-        all_element_data += element_data["history"]
-        time.sleep(0.5)
+
+        if element_data is None:
+            raise FplApiError(
+                f"Could not fetch element-summary for element {element_id}"
+            )
+
+        return element_data
+
+    all_element_data = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map yields results in submission order regardless of completion order
+        for element_data in executor.map(fetch, element_ids):
+            all_element_data += element_data["history"]
 
     return all_element_data
+
+
+def fetch_element_gameweek_data(
+    bootstrap_data: dict,
+    max_workers: int = None,
+    requests_per_second: float = None,
+) -> list:
+    """Fetch the gameweek history of every element in bootstrap-static."""
+    element_ids = [element["id"] for element in bootstrap_data["elements"]]
+
+    return fetch_element_histories(element_ids, max_workers, requests_per_second)
+
+
+# Per-element bootstrap fields that change whenever a player gets new history rows
+CHANGE_FIELDS = ["total_points", "minutes", "event_points"]
+
+
+def get_finished_events(bootstrap_data: dict) -> set:
+    return {event["id"] for event in bootstrap_data["events"] if event["finished"]}
+
+
+def find_changed_elements(previous_bootstrap: dict, bootstrap_data: dict) -> list:
+    """
+    Diff two bootstrap-static snapshots and return the elements to refetch.
+
+    An element is refetched when it is new or when any of ``CHANGE_FIELDS``
+    differs from the previous snapshot. Players who did not feature in a newly
+    finished round are skipped; their zero rows are filled in later by
+    data_processing.add_missing_player_data.
+
+    Parameters:
+    - previous_bootstrap: bootstrap-static payload from the last ingest
+    - bootstrap_data: current bootstrap-static payload
+
+    Returns:
+    - IDs of changed elements, in bootstrap order
+    """
+    previous = {
+        element["id"]: tuple(element.get(field) for field in CHANGE_FIELDS)
+        for element in previous_bootstrap["elements"]
+    }
+
+    return [
+        element["id"]
+        for element in bootstrap_data["elements"]
+        if previous.get(element["id"])
+        != tuple(element.get(field) for field in CHANGE_FIELDS)
+    ]
+
+
+def merge_element_history(
+    stored_history: list, fresh_history: list, refreshed_ids: list
+) -> list:
+    """
+    Replace the stored history of the refreshed elements with their fresh rows.
+
+    element-summary always returns a player's full history, so swapping out
+    every row of a refreshed element also picks up retroactive corrections
+    such as late bonus changes.
+    """
+    refreshed = set(refreshed_ids)
+    merged = [row for row in stored_history if row["element"] not in refreshed]
+    merged += fresh_history
+
+    # Stable sort keeps each element's rows in round order
+    return sorted(merged, key=lambda row: row["element"])
+
+
+def fetch_element_gameweek_data_incremental(
+    bootstrap_data: dict,
+    previous_bootstrap: dict,
+    stored_history: list,
+    max_workers: int = None,
+    requests_per_second: float = None,
+) -> list:
+    """
+    Update the stored element gameweek data, fetching only changed elements.
+
+    Falls back to a full fetch when there is no previous snapshot or stored
+    history, or when the finished events went backwards (a new season).
+
+    Parameters:
+    - bootstrap_data: current bootstrap-static payload
+    - previous_bootstrap: bootstrap-static payload from the last ingest
+    - stored_history: element gameweek data saved by the last ingest
+    - max_workers: maximum number of requests in flight at once
+    - requests_per_second: sustained request rate across all workers
+
+    Returns:
+    - List of history rows for all elements
+    """
+    if not previous_bootstrap or stored_history is None:
+        print("No previous snapshot found, running a full fetch")
+        return fetch_element_gameweek_data(
+            bootstrap_data, max_workers, requests_per_second
+        )
+
+    previous_finished = get_finished_events(previous_bootstrap)
+    finished = get_finished_events(bootstrap_data)
+
+    if not previous_finished <= finished:
+        print("Finished events went backwards, running a full fetch")
+        return fetch_element_gameweek_data(
+            bootstrap_data, max_workers, requests_per_second
+        )
+
+    newly_finished = sorted(finished - previous_finished)
+    changed_ids = find_changed_elements(previous_bootstrap, bootstrap_data)
+
+    print(
+        f"Newly finished events: {newly_finished}, "
+        f"refetching {len(changed_ids)} of {len(bootstrap_data['elements'])} elements"
+    )
+
+    fresh_history = fetch_element_histories(
+        changed_ids, max_workers, requests_per_second
+    )
+
+    return merge_element_history(stored_history, fresh_history, changed_ids)
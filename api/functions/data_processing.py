@@ -2,7 +2,10 @@ import json
 import logging
 
 import helpers.azure_helpers as ah
+import helpers.json_helpers as jh
+import helpers.schema as sc
 import functions.feature_engineering as fe
+import functions.feature_registry as fr
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
@@ -137,9 +140,35 @@ def process_element_gameweek(element_gameweek_data: dict, fixtures_df: pd.DataFr
     return merged.rename(columns={"actual_round": "round"})
 
 
-def add_element_history(history_data: List[Dict[str, Any]]) -> pd.DataFrame:
+# Numeric columns of element-summary history rows. Several arrive as strings
+# (e.g. "0.45"), so they are parsed while streaming the history file.
+HISTORY_DTYPES = {
+    "influence": "float64",
+    "creativity": "float64",
+    "threat": "float64",
+    "ict_index": "float64",
+    "expected_goals": "float64",
+    "expected_assists": "float64",
+    "expected_goal_involvements": "float64",
+    "expected_goals_conceded": "float64",
+}
+
+
+def load_element_history(base_path: str = "data/element_gameweek_data") -> pd.DataFrame:
+    """Stream the stored element history (NDJSON or JSON array) into a DataFrame."""
+    path = jh.resolve_records_path(base_path)
+    if path is None:
+        raise FileNotFoundError(f"No element history found at {base_path}")
+
+    return jh.read_records_frame(path, dtypes=HISTORY_DTYPES)
+
+
+def add_element_history(history_data) -> pd.DataFrame:
     logging.info("Adding element history")
-    df = pd.DataFrame(history_data)
+    if isinstance(history_data, pd.DataFrame):
+        df = history_data
+    else:
+        df = pd.DataFrame(history_data)
 
     if "kickoff_time" in df.columns:
         df["kickoff_time"] = pd.to_datetime(df["kickoff_time"])
@@ -206,7 +235,46 @@ def add_player_static_info(
     return merged_df
 
 
-def add_missing_player_data(df: pd.DataFrame) -> pd.DataFrame:
+# Columns that are filled from fixture data for missing player rows
+MISSING_FIXTURE_COLS = [
+    "fixture",
+    "opponent_team",
+    "was_home",
+    "kickoff_time",
+    "team_h_score",
+    "team_a_score",
+    "round",
+]
+
+
+def team_fixture_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """First row of each (team, fixture) pair, with the columns missing rows copy."""
+    return df.drop_duplicates(["team", "fixture"])[["team"] + MISSING_FIXTURE_COLS]
+
+
+def add_missing_player_data(
+    df: pd.DataFrame,
+    players: Optional[pd.DataFrame] = None,
+    team_fixtures: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Add zeroed rows for fixtures a player's team played that the player has no row for.
+
+    Every player is paired with every fixture their team appears in (a
+    cross join within team), pairs that already have a row are removed with
+    an anti-join, and the fixture columns are attached from the first row of
+    that team and fixture.
+
+    Parameters:
+    - df: player history merged with static player info
+    - players: static info of the players to fill in, defaults to every
+      player in df
+    - team_fixtures: fixtures to fill in, one row per team and fixture (see
+      team_fixture_rows), defaults to the fixtures in df
+
+    Returns:
+    - df with the missing rows appended, marked with modified=True
+    """
     # Columns that should be preserved from player metadata
     static_cols = [
         "element",
@@ -258,69 +326,35 @@ def add_missing_player_data(df: pd.DataFrame) -> pd.DataFrame:
         "transfers_out",
     ]
 
-    # Columns that should be filled from fixture data
-    fixture_cols = [
-        "fixture",
-        "opponent_team",
-        "was_home",
-        "kickoff_time",
-        "team_h_score",
-        "team_a_score",
-        "round",
-    ]
-
-    # Get all unique teams
-    teams = df["team"].unique()
-
-    logging.info(teams)
-
-    new_rows = []
-
-    for team in teams:
-        # Get all players in this team
-        team_players = df[df["team"] == team]["element"].unique()
+    fixture_cols = MISSING_FIXTURE_COLS
 
-        # Get all fixtures for this team
-        team_fixtures = df[df["team"] == team]["fixture"].unique()
+    logging.info(df["team"].unique())
 
-        for player in team_players:
-            player_data = df[df["element"] == player]
-            existing_fixtures = player_data["fixture"].unique()
+    # First row per player and per (team, fixture), in order of appearance
+    if players is None:
+        players = df
+    player_meta = players.drop_duplicates("element")[static_cols]
+    player_meta = player_meta[player_meta["team"].notna()]
+    if team_fixtures is None:
+        team_fixtures = team_fixture_rows(df)
 
-            missing_fixtures = set(team_fixtures) - set(existing_fixtures)
+    # Every fixture of each player's team
+    candidates = player_meta.merge(team_fixtures, on="team", how="inner")
 
-            if not missing_fixtures:
-                continue
-
-            player_meta = player_data.iloc[0][static_cols].to_dict()
-
-            for fixture in missing_fixtures:
-                # Get fixture data (take first row for this fixture)
-                fixture_data = (
-                    df[(df["team"] == team) & (df["fixture"] == fixture)]
-                    .iloc[0][fixture_cols]
-                    .to_dict()
-                )
-
-                # Create new row
-                new_row = {**player_meta, **fixture_data}
-
-                # Add zero values
-                for col in zero_cols:
-                    new_row[col] = 0
-
-                # Set some specific fields
-                new_row["modified"] = True  # Mark as artificially added
-                new_row["was_home"] = fixture_data["was_home"]
+    # Anti-join: keep the pairs the player has no row for
+    existing = df[["element", "fixture"]].drop_duplicates()
+    candidates = candidates.merge(
+        existing, on=["element", "fixture"], how="left", indicator=True
+    )
+    new_df = candidates[candidates["_merge"] == "left_only"].drop(columns="_merge")
 
-                new_rows.append(new_row)
+    if new_df.empty:
+        return df
 
-    # Create DataFrame from new rows and concatenate with original
-    if new_rows:
-        new_df = pd.DataFrame(new_rows)
-        df = pd.concat([df, new_df], ignore_index=True)
+    new_df = new_df[static_cols + fixture_cols].reset_index(drop=True)
+    new_df = new_df.assign(**{col: 0 for col in zero_cols}, modified=True)
 
-    return df
+    return pd.concat([df, new_df], ignore_index=True)
 
 
 def add_fixtures(df: pd.DataFrame, fixtures: List[Dict[str, Any]]) -> pd.DataFrame:
@@ -352,68 +386,42 @@ def add_fixtures(df: pd.DataFrame, fixtures: List[Dict[str, Any]]) -> pd.DataFra
     return merged_df
 
 
-def add_rolling_averages(
-    df: pd.DataFrame,
-    metrics: List[str],
-    windows: List[int] = [3, 5],  # Add a list of windows for last 3 and last 5 games
-):
+def build_dataset(
+    element_history, elements: List[Dict[str, Any]], fixtures, targets: List[str]
+) -> pd.DataFrame:
     """
-    Calculate rolling averages for given metrics per player, excluding the current match.
+    Build the merged player-fixture frame from raw element history.
 
     Parameters:
-    - df: DataFrame with player match data (must include 'element' and 'round')
-    - metrics: list of column names to compute rolling averages for
-    - windows: list of window sizes (e.g., [3, 5] for last 3 and last 5 games)
+    - element_history: element-summary history rows (DataFrame or list of dicts)
+    - elements: bootstrap-static elements
+    - fixtures: fixtures payload
+    - targets: metrics to add rolling averages and season totals for
 
     Returns:
-    - DataFrame with added rolling average columns (e.g., 'goals_scored_rolling_3', 'goals_scored_rolling_5')
+    - The merged frame in the compact schema, sorted by kickoff time
     """
-    df = df.sort_values(by=["element", "round"])
-
-    # Ensure the metrics are float for rolling mean calculation
-    df[metrics] = df[metrics].astype(float)
-
-    # Loop over the different window sizes (3 and 5 games)
-    for window in windows:
-        for metric in metrics:
-            rolling_col = (
-                f"{metric}_rolling_{window}"  # Add window size to the column name
-            )
-            # Apply rolling average within each group (player) and shift
-            df[rolling_col] = (
-                df.groupby("element")[metric]
-                .apply(
-                    lambda x: x.shift(1).rolling(window=window, min_periods=1).mean()
-                )
-                .reset_index(level=0, drop=True)  # Reset index at group level
-            )
-
-    return df
+    # Start the dataFrame with the Element History
+    df = add_element_history(element_history)
 
+    # Add Player static info the DataFrame
+    df = add_player_static_info(df, elements)
 
-def add_season_totals(df: pd.DataFrame, metrics: List[str]):
-    """
-    Calculate season totals (cumulative sum) for given metrics per player.
+    df = add_missing_player_data(df)
 
-    Parameters:
-    - df: DataFrame with player match data (must include 'element' and 'round')
-    - metrics: list of column names to compute season totals for
+    df = add_fixtures(df, fixtures)
 
-    Returns:
-    - DataFrame with added season total columns (e.g., 'goals_scored_season_total')
-    """
+    # Rolling averages and season totals of every target, from the feature registry
     df = df.sort_values(by=["element", "round"])
+    df = fr.add_features(df, fr.metric_features(targets))
 
-    # Ensure the metrics are float for cumulative sum calculation
-    df[metrics] = df[metrics].astype(float)
-
-    for metric in metrics:
-        season_total_col = f"{metric}_season_total"
+    df.fillna(0, inplace=True)
 
-        # Calculate cumulative sum (season total) for each player ('element')
-        df[season_total_col] = df.groupby("element")[metric].cumsum()
+    compact_df = sc.compact_frame(df)
+    sc.log_memory_report("merged_players_with_fixtures", df, compact_df)
+    df = compact_df
 
-    return df
+    return df.sort_values(by=["kickoff_time", "fixture"], ascending=[True, True])
 
 
 def create_dataset(fixtures, targets):
@@ -430,25 +438,9 @@ def create_dataset(fixtures, targets):
     bootstrap = ah.fetch_from_json("bootstrap_data.json")
     teams = bootstrap["teams"]
     elements = bootstrap["elements"]
-    element_history = ah.fetch_from_json("element_gameweek_data.json")
-
-    # Start the dataFrame with the Element History
-    df = add_element_history(element_history)
-
-    # Add Player static info the DataFrame
-    df = add_player_static_info(df, elements)
-
-    df = add_missing_player_data(df)
-
-    df = add_fixtures(df, fixtures)
-
-    df = add_rolling_averages(df, metrics=targets)
-
-    df = add_season_totals(df, metrics=targets)
-
-    df.fillna(0, inplace=True)
+    element_history = load_element_history()
 
-    df = df.sort_values(by=["kickoff_time", "fixture"], ascending=[True, True])
+    df = build_dataset(element_history, elements, fixtures, targets)
 
     df_element_328 = df[df["element"] == 328]
 
@@ -476,5 +468,4 @@ def create_dataset(fixtures, targets):
             file.write(column + "\n")
             # logging.info(column)
 
-    df.to_json("data/merged_players_with_fixtures.json", orient="records", indent=2)
     return df
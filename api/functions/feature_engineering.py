@@ -1,6 +1,163 @@
 import logging
 import numpy as np
 import pandas as pd
+from typing import Dict
+
+
+class FixtureDifficultyIndex:
+    """
+    Dense team x gameweek index of fixture difficulty, from each team's side.
+
+    Built once from the processed fixtures frame (process_fixtures columns).
+    A double gameweek contributes both fixtures and a blank gameweek none, so
+    forward-window means are gathered for any number of rows at once.
+    """
+
+    def __init__(self, fixtures_df: pd.DataFrame, default: float = 3.0):
+        self.default = default
+
+        sides = pd.concat(
+            [
+                pd.DataFrame(
+                    {
+                        "team": fixtures_df[f"fixture_team_{side}"],
+                        "event": fixtures_df["fixture_event"],
+                        "difficulty": fixtures_df[f"fixture_team_{side}_difficulty"],
+                    }
+                )
+                for side in ("h", "a")
+            ],
+            ignore_index=True,
+        )
+        # Fixtures without a gameweek (postponed, not yet rescheduled) are skipped
+        sides = sides.dropna(subset=["team", "event", "difficulty"])
+        sides = sides.astype({"team": int, "event": int, "difficulty": float})
+
+        self.n_teams = int(sides["team"].max()) + 1 if len(sides) else 1
+        self.n_gameweeks = int(sides["event"].max()) + 1 if len(sides) else 1
+        shape = (self.n_teams, self.n_gameweeks)
+        teams = sides["team"].to_numpy()
+        events = sides["event"].to_numpy()
+
+        # Per-side difficulty summed over the fixtures of each team and gameweek
+        self.difficulty_sum = np.zeros(shape)
+        self.fixture_count = np.zeros(shape, dtype=int)
+        np.add.at(self.difficulty_sum, (teams, events), sides["difficulty"].to_numpy())
+        np.add.at(self.fixture_count, (teams, events), 1)
+
+        # Prefix sums over gameweeks: [:, g] covers gameweeks before g
+        self.gameweek_sum = self._prefix(self.difficulty_sum)
+        self.gameweek_count = self._prefix(self.fixture_count)
+
+        # Each team's fixtures in gameweek order, as prefix sums over fixtures
+        order = np.lexsort((events, teams))
+        position = np.arange(len(order)) - np.searchsorted(teams[order], teams[order])
+        sequence = np.zeros((self.n_teams, int(self.fixture_count.sum(axis=1).max())))
+        sequence[teams[order], position] = sides["difficulty"].to_numpy()[order]
+        self.fixture_sum = self._prefix(sequence)
+
+    @staticmethod
+    def _prefix(values: np.ndarray) -> np.ndarray:
+        prefix = np.zeros((values.shape[0], values.shape[1] + 1))
+        prefix[:, 1:] = np.cumsum(values, axis=1)
+        return prefix
+
+    def _lookup(self, teams, gameweeks) -> tuple:
+        teams = np.asarray(teams, dtype=float)
+        gameweeks = np.asarray(gameweeks, dtype=float)
+        known = ~np.isnan(teams) & (teams >= 0) & (teams < self.n_teams)
+
+        team_idx = np.where(known, teams, 0).astype(int)
+        gameweek_idx = np.nan_to_num(gameweeks, nan=self.n_gameweeks)
+        gameweek_idx = np.clip(gameweek_idx, 0, self.n_gameweeks).astype(int)
+        return known, team_idx, gameweek_idx
+
+    def _mean(self, known, total, count) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(known & (count > 0), total / count, self.default)
+
+    def next_fixtures_mean(self, teams, gameweeks, window: int = 3) -> np.ndarray:
+        """
+        Mean difficulty of each team's next `window` fixtures from a gameweek on.
+
+        Parameters:
+        - teams: team id per row
+        - gameweeks: first gameweek of the window per row
+        - window: number of fixtures
+
+        Returns:
+        - Array of means, `default` where a team has no fixtures left
+        """
+        known, team_idx, gameweek_idx = self._lookup(teams, gameweeks)
+
+        # Fixtures played before the gameweek, and the team's total
+        start = self.gameweek_count[team_idx, gameweek_idx].astype(int)
+        end = np.minimum(start + window, self.gameweek_count[team_idx, -1].astype(int))
+        end = np.maximum(end, start)
+
+        total = self.fixture_sum[team_idx, end] - self.fixture_sum[team_idx, start]
+        return self._mean(known, total, end - start)
+
+    def next_gameweeks_mean(self, teams, gameweeks, window: int = 3) -> np.ndarray:
+        """
+        Mean difficulty of each team's fixtures in the `window` gameweeks from a
+        gameweek on, counting every fixture of a double gameweek.
+        """
+        known, team_idx, gameweek_idx = self._lookup(teams, gameweeks)
+        end = np.minimum(gameweek_idx + window, self.n_gameweeks)
+
+        total = (
+            self.gameweek_sum[team_idx, end] - self.gameweek_sum[team_idx, gameweek_idx]
+        )
+        count = (
+            self.gameweek_count[team_idx, end]
+            - self.gameweek_count[team_idx, gameweek_idx]
+        )
+        return self._mean(known, total, count)
+
+
+# Player stats summed per team and round: adds team_{name}_per_gw and
+# teammate_{name} (the team total minus the player's own value)
+TEAMMATE_STATS = {
+    "goals": "goals_scored",
+    "assists": "assists",
+    "expected_assists": "expected_assists",
+    "expected_goals": "expected_goals",
+}
+
+
+def add_teammate_features(
+    merged: pd.DataFrame, stats: Dict[str, str] = TEAMMATE_STATS
+) -> pd.DataFrame:
+    """
+    Add team-round totals and teammate contributions for each stat.
+
+    Every total comes from one grouped aggregation into a (teams x rounds)
+    table, which is joined back onto the player rows once.
+
+    Parameters:
+    - merged: player rows with 'element_team', 'round' and the stat columns
+    - stats: name -> source column, see TEAMMATE_STATS
+
+    Returns:
+    - merged with the team_{name}_per_gw and teammate_{name} columns
+    """
+    sources = list(stats.values())
+    team_columns = [f"team_{name}_per_gw" for name in stats]
+
+    team_round = merged.groupby(["element_team", "round"])[sources].sum()
+    team_round.columns = team_columns
+
+    merged = merged.join(team_round, on=["element_team", "round"])
+
+    teammate_values = merged[team_columns].to_numpy() - merged[sources].to_numpy()
+    teammate_columns = pd.DataFrame(
+        teammate_values,
+        columns=[f"teammate_{name}" for name in stats],
+        index=merged.index,
+    )
+
+    return pd.concat([merged, teammate_columns], axis=1)
 
 
 def create_features(
@@ -41,32 +198,8 @@ def create_features(
     for new_col, source_col in cumulative_features.items():
         merged[new_col] = merged.groupby("element")[source_col].cumsum()
 
-    # get number of goals by teammates in the last 3 and 5 gameweeks
-    merged["team_goals_per_gw"] = merged.groupby(["element_team", "round"])[
-        "goals_scored"
-    ].transform("sum")
-
-    # Step 2: Subtract player's own goals to get teammate goals
-    merged["teammate_goals"] = merged["team_goals_per_gw"] - merged["goals_scored"]
-
-    merged["team_assists_per_gw"] = merged.groupby(["element_team", "round"])[
-        "assists"
-    ].transform("sum")
-    merged["teammate_assists"] = merged["team_assists_per_gw"] - merged["assists"]
-
-    merged["team_expected_assists_per_gw"] = merged.groupby(["element_team", "round"])[
-        "expected_assists"
-    ].transform("sum")
-    merged["teammate_expected_assists"] = (
-        merged["team_assists_per_gw"] - merged["expected_assists"]
-    )
-
-    merged["team_expected_goals_per_gw"] = merged.groupby(["element_team", "round"])[
-        "expected_goals"
-    ].transform("sum")
-    merged["teammate_expected_goals"] = (
-        merged["team_expected_goals_per_gw"] - merged["expected_goals"]
-    )
+    # Team totals per round, and the share of them from the player's teammates
+    merged = add_teammate_features(merged)
 
     for col in [
         "goals_scored",
@@ -97,34 +230,9 @@ def create_features(
 
     # add features based on
 
-    def get_fixture_difficulty(row, fixtures_df, window=3):
-        """Get average difficulty for next N fixtures for this team"""
-        team_id = row["element_team"]
-        current_gw = row["round"]
-
-        # Get future fixtures for this team
-        future_fixtures = fixtures_df[
-            (fixtures_df["fixture_event"] >= current_gw)
-            & (
-                (fixtures_df["fixture_team_h"] == team_id)
-                | (fixtures_df["fixture_team_a"] == team_id)
-            )
-        ]
-
-        # Get next N fixtures and calculate difficulty
-        difficulties = []
-        for _, fixture in future_fixtures.head(window).iterrows():
-            if fixture["fixture_team_h"] == team_id:
-                difficulties.append(fixture["fixture_team_h_difficulty"])
-            else:
-                difficulties.append(fixture["fixture_team_a_difficulty"])
-
-        return (
-            np.mean(difficulties) if difficulties else 3.0
-        )  # Default to medium difficulty
-
-    merged[f"next_{horizon}_difficulty"] = merged.apply(
-        lambda row: get_fixture_difficulty(row, fixtures_df), axis=1
+    difficulty_index = FixtureDifficultyIndex(fixtures_df)
+    merged[f"next_{horizon}_difficulty"] = difficulty_index.next_fixtures_mean(
+        merged["element_team"], merged["round"], window=3
     )
 
     # Add team strength features
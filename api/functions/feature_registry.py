@@ -0,0 +1,437 @@
+"""
+Declarative registry of model features.
+
+Each feature is declared once with the columns or features it is computed
+from. FeatureResolver orders the requested features and their dependencies
+into a DAG, computes each node at most once per run and reuses columns that
+are already in the frame, so a target only pays for the features it uses.
+
+Families of features (rolling averages, season totals, EWMs of any metric)
+are declared as name patterns, e.g. 'goals_scored_rolling_3'. The requested
+members of a family are computed together, in one pass over the matrix of
+their metrics.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Feature:
+    """
+    A named feature.
+
+    Parameters:
+    - name: column name of the feature
+    - inputs: columns or features the computation takes, in argument order
+    - compute: function of the input arrays returning one value per row, or
+      None for a column read straight from the frame
+    - kind: 'numerical' or 'categorical'
+    - family: for a member of a family of features, the batch function
+      family(columns, params, *shared) computing every param for each of
+      several first inputs that share the other inputs, as a dict mapping
+      each param to a (rows, columns) array; compute defaults to a batch of one
+    - param: the member's parameter of the family, e.g. its window
+    """
+
+    def __init__(
+        self,
+        name: str,
+        inputs: Tuple[str, ...] = (),
+        compute: Optional[Callable[..., Any]] = None,
+        kind: str = "numerical",
+        family: Optional[Callable[..., Dict[Any, np.ndarray]]] = None,
+        param: Any = None,
+    ):
+        if compute is None and family is not None:
+
+            def compute(column, *shared):
+                return family([column], [param], *shared)[param][:, 0]
+
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.compute = compute
+        self.kind = kind
+        self.family = family
+        self.param = param
+
+    @property
+    def internal(self) -> bool:
+        """Intermediate results such as sort orders, never stored as columns."""
+        return self.name.startswith("__")
+
+
+class FeatureRegistry:
+    def __init__(self):
+        self.features: Dict[str, Feature] = {}
+        self.rules: List[Tuple[re.Pattern, Callable[..., Feature]]] = []
+
+    def add(self, feature: Feature) -> Feature:
+        if feature.name in self.features:
+            raise ValueError(f"Feature '{feature.name}' is already registered")
+        self.features[feature.name] = feature
+        return feature
+
+    def add_rule(self, pattern: str, factory: Callable[..., Feature]):
+        """Declare a family of features: factory(name, **groups) for matching names."""
+        self.rules.append((re.compile(pattern), factory))
+
+    def get(self, name: str) -> Optional[Feature]:
+        """The feature declared for a name, or None for a plain column."""
+        if name in self.features:
+            return self.features[name]
+
+        for pattern, factory in self.rules:
+            match = pattern.fullmatch(name)
+            if match:
+                return self.add(factory(name, **match.groupdict()))
+
+        return None
+
+    def kind(self, name: str) -> str:
+        feature = self.get(name)
+        return feature.kind if feature is not None else "numerical"
+
+    def dependencies(self, names: Iterable[str]) -> List[str]:
+        """
+        The requested features and everything they depend on, inputs first.
+
+        Raises ValueError when the declarations contain a cycle.
+        """
+        order = []
+        state = {}  # name -> "visiting" | "done"
+
+        def visit(name: str, path: tuple):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                cycle = " -> ".join(path + (name,))
+                raise ValueError(f"Feature dependency cycle: {cycle}")
+
+            state[name] = "visiting"
+            feature = self.get(name)
+            for dependency in feature.inputs if feature is not None else ():
+                visit(dependency, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in names:
+            visit(name, ())
+
+        return order
+
+    def split(self, names: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Split feature names into (categorical, numerical), keeping their order."""
+        names = list(names)
+        categorical = [name for name in names if self.kind(name) == "categorical"]
+        numerical = [name for name in names if self.kind(name) != "categorical"]
+        return categorical, numerical
+
+    def source_columns(self, names: Iterable[str]) -> List[str]:
+        """Plain columns the given features are ultimately computed from."""
+        return [name for name in self.dependencies(names) if self.get(name) is None]
+
+
+class FeatureResolver:
+    """
+    Computes features of one frame on demand, memoising every node for the run.
+
+    Columns already present in the frame are used as they are, so features
+    stored by create_dataset are not recomputed.
+    """
+
+    def __init__(self, registry: "FeatureRegistry", df: pd.DataFrame):
+        self.registry = registry
+        self.df = df
+        self.cache: Dict[str, Any] = {}
+        self.computed: List[str] = []
+
+    def value(self, name: str):
+        for node in self.registry.dependencies([name]):
+            if node in self.cache:
+                continue
+
+            feature = self.registry.get(node)
+            if node in self.df.columns and (feature is None or not feature.internal):
+                self.cache[node] = self.df[node].to_numpy()
+            elif feature is None or feature.compute is None:
+                raise KeyError(f"Column '{node}' is not in the frame")
+            else:
+                inputs = [self.cache[dependency] for dependency in feature.inputs]
+                self.cache[node] = feature.compute(*inputs)
+                self.computed.append(node)
+
+        return self.cache[name]
+
+    def compute_families(self, names: Iterable[str]):
+        """
+        Compute the missing family members among names and their dependencies
+        with one call per family and shared inputs, rather than one per feature.
+        """
+        batches = {}
+        for node in self.registry.dependencies(names):
+            feature = self.registry.get(node)
+            if feature is None or feature.family is None:
+                continue
+            if node in self.cache or node in self.df.columns:
+                continue
+            batch = (feature.family, feature.inputs[1:])
+            batches.setdefault(batch, []).append(feature)
+
+        for (family, shared), features in batches.items():
+            columns = list(dict.fromkeys(feature.inputs[0] for feature in features))
+            params = list(dict.fromkeys(feature.param for feature in features))
+            results = family(
+                [self.value(column) for column in columns],
+                params,
+                *[self.value(name) for name in shared],
+            )
+            for feature in features:
+                column = columns.index(feature.inputs[0])
+                self.cache[feature.name] = results[feature.param][:, column]
+                self.computed.append(feature.name)
+
+    def frame(self, names: Iterable[str]) -> pd.DataFrame:
+        """The requested features as columns aligned with the frame's index."""
+        names = list(names)
+        self.compute_families(names)
+        return pd.DataFrame(
+            {name: self.value(name) for name in names}, index=self.df.index
+        )
+
+
+def group_start_index(groups: np.ndarray) -> np.ndarray:
+    """For rows sorted by group, the position of the first row of each row's group."""
+    positions = np.arange(len(groups))
+    is_start = np.ones(len(groups), dtype=bool)
+    is_start[1:] = groups[1:] != groups[:-1]
+    return np.maximum.accumulate(np.where(is_start, positions, 0))
+
+
+def shifted_rolling_means(
+    values: np.ndarray, groups: np.ndarray, windows: List[int]
+) -> Dict[int, np.ndarray]:
+    """
+    Mean of the previous `window` rows of each group, for every window at once.
+
+    Equivalent to ``groupby(groups).shift(1).rolling(window, min_periods=1).mean()``
+    for each column of `values`, but computed from one cumulative sum over the
+    whole matrix, so the cost does not depend on the number of groups.
+
+    Parameters:
+    - values: (rows, metrics) array, sorted so each group's rows are contiguous
+    - groups: group key per row
+    - windows: window sizes
+
+    Returns:
+    - Dict mapping each window to a (rows, metrics) array of means, NaN where
+      a row has no earlier non-missing values in its group
+    """
+    # Column-major, so the sums run down contiguous memory
+    values = np.asarray(values, dtype=float, order="F")
+    n_rows = len(values)
+
+    valid = ~np.isnan(values)
+    # Prefix sums with a leading zero row: cum[k] is the sum over rows < k
+    cum_sum = np.zeros((n_rows + 1, values.shape[1]), order="F")
+    np.cumsum(np.where(valid, values, 0.0), axis=0, out=cum_sum[1:])
+    cum_count = np.zeros((n_rows + 1, values.shape[1]), order="F")
+    np.cumsum(valid, axis=0, out=cum_count[1:])
+
+    positions = np.arange(n_rows)
+    starts = group_start_index(groups)
+
+    means = {}
+    for window in windows:
+        # Rows [lower, position) are the previous `window` rows in the group
+        lower = np.maximum(positions - window, starts)
+        sums = cum_sum[:-1] - cum_sum[lower]
+        counts = cum_count[:-1] - cum_count[lower]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[window] = np.where(counts > 0, sums / counts, np.nan)
+
+    return means
+
+
+def shifted_ewm_means(
+    values: np.ndarray, groups: np.ndarray, spans: List[int]
+) -> Dict[int, np.ndarray]:
+    """
+    Exponentially weighted mean of each group's previous rows.
+
+    Equivalent to ``groupby(groups).shift(1).ewm(span=span).mean()`` for each
+    column of `values`. Rows are laid out as a (groups, position, metrics)
+    array and the recurrence is stepped once per position, vectorised across
+    every group and metric.
+    """
+    if not spans:
+        return {}
+
+    values = np.asarray(values, dtype=float)
+    n_rows, n_metrics = values.shape
+
+    starts = group_start_index(groups)
+    position = np.arange(n_rows) - starts
+    group_idx = np.cumsum(position == 0) - 1
+    n_groups = group_idx[-1] + 1 if n_rows else 0
+
+    padded = np.full((n_groups, position.max() + 1 if n_rows else 0, n_metrics), np.nan)
+    padded[group_idx, position] = values
+
+    means = {}
+    for span in spans:
+        decay = 1 - 2 / (span + 1)
+        numerator = np.zeros((n_groups, n_metrics))
+        denominator = np.zeros((n_groups, n_metrics))
+        shifted = np.full(padded.shape, np.nan)
+
+        for step in range(padded.shape[1]):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                shifted[:, step] = np.where(
+                    denominator > 0, numerator / denominator, np.nan
+                )
+
+            current = padded[:, step]
+            valid = ~np.isnan(current)
+            numerator = decay * numerator + np.where(valid, current, 0.0)
+            denominator = decay * denominator + valid
+
+        means[span] = shifted[group_idx, position]
+
+    return means
+
+
+# Shared intermediates: the stable (element, round) sort order of the rows,
+# and the element of each row in that order
+
+
+def sort_order(element: np.ndarray, round_: np.ndarray) -> np.ndarray:
+    return np.lexsort((round_, element))
+
+
+def unsort(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    result = np.empty_like(values)
+    result[order] = values
+    return result
+
+
+def sorted_values(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    return pd.to_numeric(pd.Series(values[order]), errors="coerce").to_numpy(
+        dtype=float
+    )
+
+
+def season_totals(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """
+    Running total of each group's rows up to and including the row.
+
+    Equivalent to ``groupby(groups).cumsum()`` for each column of `values`:
+    missing values add nothing and stay missing in the result.
+
+    Parameters:
+    - values: (rows, metrics) array, sorted so each group's rows are contiguous
+    - groups: group key per row
+
+    Returns:
+    - (rows, metrics) array of totals
+    """
+    values = np.asarray(values, dtype=float, order="F")
+    filled = np.nan_to_num(values)
+    totals = np.cumsum(filled, axis=0)
+    starts = group_start_index(groups)
+    # Subtract everything before the group's first row
+    totals = totals - (totals[starts] - filled[starts])
+    return np.where(np.isnan(values), np.nan, totals)
+
+
+def sorted_family(compute: Callable[..., Dict[Any, np.ndarray]]) -> Callable:
+    """
+    Batch function of a family computed over the element-sorted metric matrix.
+
+    compute(values, groups, params) gets the metrics as columns of one matrix
+    in (element, round) order and returns {param: (rows, metrics) array}.
+    """
+
+    def family(columns, params, order, groups):
+        # One row per metric, transposed into a column-major (rows, metrics) matrix
+        values = np.array([sorted_values(column, order) for column in columns]).T
+        results = compute(values, groups, params)
+        return {param: unsort(result, order) for param, result in results.items()}
+
+    return family
+
+
+ROLLING_FAMILY = sorted_family(shifted_rolling_means)
+EWM_FAMILY = sorted_family(shifted_ewm_means)
+SEASON_TOTAL_FAMILY = sorted_family(
+    lambda values, groups, params: {None: season_totals(values, groups)}
+)
+
+
+def rolling_feature(name: str, metric: str, window: str) -> Feature:
+    """Mean of the previous `window` matches of each player."""
+    return Feature(
+        name,
+        (metric, "__order", "__groups"),
+        family=ROLLING_FAMILY,
+        param=int(window),
+    )
+
+
+def ewm_feature(name: str, metric: str, span: str) -> Feature:
+    """EWM of each player's previous matches."""
+    return Feature(
+        name, (metric, "__order", "__groups"), family=EWM_FAMILY, param=int(span)
+    )
+
+
+def season_total_feature(name: str, metric: str) -> Feature:
+    """Each player's running total including the current match."""
+    return Feature(name, (metric, "__order", "__groups"), family=SEASON_TOTAL_FAMILY)
+
+
+def default_registry() -> FeatureRegistry:
+    registry = FeatureRegistry()
+
+    for name in ["element", "team", "was_home", "element_type"]:
+        registry.add(Feature(name, kind="categorical"))
+
+    registry.add(Feature("__order", ("element", "round"), sort_order))
+    registry.add(
+        Feature(
+            "__groups", ("element", "__order"), lambda element, order: element[order]
+        )
+    )
+
+    registry.add_rule(r"(?P<metric>.+)_rolling_(?P<window>\d+)", rolling_feature)
+    registry.add_rule(r"(?P<metric>.+)_ewm_(?P<span>\d+)", ewm_feature)
+    registry.add_rule(r"(?P<metric>.+)_season_total", season_total_feature)
+
+    return registry
+
+
+REGISTRY = default_registry()
+
+
+def metric_features(metrics: List[str], windows: List[int] = [3, 5]) -> List[str]:
+    """Rolling average and season total feature names for each metric."""
+    names = []
+    for metric in metrics:
+        names.extend([f"{metric}_rolling_{window}" for window in windows])
+        names.append(f"{metric}_season_total")
+    return names
+
+
+def add_features(
+    df: pd.DataFrame, names: List[str], registry: FeatureRegistry = REGISTRY
+) -> pd.DataFrame:
+    """Compute the named features that are missing from df and add them as columns."""
+    missing = [name for name in names if name not in df.columns]
+    if not missing:
+        return df
+
+    resolver = FeatureResolver(registry, df)
+    return df.assign(**resolver.frame(missing))
@@ -0,0 +1,464 @@
+"""
+Incremental feature store for the merged player-fixture frame.
+
+The store holds the output of data_processing.build_dataset for finished
+rounds, one artifact per round, together with the small carry state needed to
+extend it:
+
+- the last max(windows) target values and running season totals per player
+- the (team, fixture) rows that zeroed rows for missing players are copied from
+
+Appending a finished round only processes that round's history rows, so the
+weekly refresh costs O(players) rather than a rebuild of the whole season.
+check_consistency compares the store against a full rebuild.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import functions.data_processing as dp
+import functions.feature_registry as fr
+import helpers.schema as sc
+import helpers.storage as st
+
+STORE_DIR = os.path.join(st.DATA_DIR, "feature_store")
+MANIFEST_FILE = "manifest.json"
+STATE_NAME = "carry_state"
+TEAM_FIXTURES_NAME = "team_fixtures"
+
+# Rolling average windows of feature_registry.metric_features
+DEFAULT_WINDOWS = [3, 5]
+
+
+def partition_name(round_: int) -> str:
+    return f"round_{int(round_):02d}"
+
+
+def season_total_columns(metrics: List[str]) -> List[str]:
+    return [f"{metric}_season_total" for metric in metrics]
+
+
+def load_manifest(store_dir: str = STORE_DIR) -> Optional[dict]:
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, store_dir: str = STORE_DIR):
+    # Written last and atomically, so a failed update leaves the old store valid
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def pipeline_order(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order rows as build_dataset processes them: by player and round, with a
+    player's own history rows ahead of the zeroed rows added for missing fixtures.
+    """
+    is_missing = df["modified"] == True if "modified" in df.columns else False
+    return (
+        df.assign(_is_missing=is_missing)
+        .sort_values(["element", "round", "_is_missing"], kind="stable")
+        .drop(columns="_is_missing")
+    )
+
+
+def carry_state(df: pd.DataFrame, metrics: List[str], windows: List[int]):
+    """Last max(windows) rows of each player, with metric values and season totals."""
+    columns = ["element", "round"] + metrics + season_total_columns(metrics)
+    return df.groupby("element").tail(max(windows))[columns].reset_index(drop=True)
+
+
+def add_round_features(
+    rows: pd.DataFrame, state: pd.DataFrame, metrics: List[str], windows: List[int]
+) -> pd.DataFrame:
+    """
+    Add rolling averages and season totals to new rows, continuing from the carry state.
+
+    Gives the same values as the feature_registry features computed over
+    each player's full history.
+
+    Parameters:
+    - rows: new rows in pipeline order
+    - state: carry state of the rows stored so far
+    - metrics: metrics to add features for
+    - windows: rolling window sizes
+
+    Returns:
+    - rows sorted by player and round, with the feature columns added
+    """
+    rows = rows.sort_values(["element", "round"], kind="stable").reset_index(drop=True)
+    rows[metrics] = rows[metrics].astype(float)
+
+    # Each player's stored tail followed by their new rows
+    combined = pd.concat(
+        [state[["element"] + metrics], rows[["element"] + metrics]], ignore_index=True
+    )
+    order = np.argsort(combined["element"].to_numpy(), kind="stable")
+    is_new = (np.arange(len(combined)) >= len(state))[order]
+    values = combined[metrics].to_numpy(dtype=float)[order]
+    groups = combined["element"].to_numpy()[order]
+
+    new_columns = {}
+
+    for window, means in fr.shifted_rolling_means(values, groups, windows).items():
+        for i, metric in enumerate(metrics):
+            new_columns[f"{metric}_rolling_{window}"] = means[is_new, i]
+
+    # Season totals continue from each player's last stored total
+    totals = season_total_columns(metrics)
+    previous = state.groupby("element")[totals].last()
+    previous = previous.reindex(rows["element"]).fillna(0).to_numpy()
+    running = fr.season_totals(rows[metrics].to_numpy(), rows["element"].to_numpy())
+
+    for i, total in enumerate(totals):
+        new_columns[total] = previous[:, i] + running[:, i]
+
+    return rows.assign(**new_columns)
+
+
+def build_round_rows(
+    history: pd.DataFrame,
+    elements: List[Dict[str, Any]],
+    fixtures,
+    round_: int,
+    known_elements: Iterable[int],
+    team_fixtures: pd.DataFrame,
+) -> tuple:
+    """
+    Merged rows of one round, before rolling averages and season totals.
+
+    Players seen for the first time also get their earlier rounds, including
+    zeroed rows for earlier team fixtures, as a full rebuild would add them.
+
+    Parameters:
+    - history: element history rows of the round, plus all rows of new players
+    - elements: bootstrap-static elements
+    - fixtures: fixtures payload
+    - round_: round to build
+    - known_elements: players already in the store
+    - team_fixtures: stored (team, fixture) rows of earlier rounds
+
+    Returns:
+    - (rows in pipeline order, (team, fixture) rows of this round)
+    """
+    in_round = history["round"] == round_
+    round_df = dp.add_element_history(history[in_round].reset_index(drop=True))
+    round_df = dp.add_player_static_info(round_df, elements)
+    round_team_fixtures = dp.team_fixture_rows(round_df)
+
+    known = set(known_elements)
+    new_ids = set(round_df["element"]) - known
+    players = dp.add_player_static_info(
+        pd.DataFrame({"element": sorted(known | new_ids)}), elements
+    )
+
+    rows = dp.add_missing_player_data(
+        round_df, players=players, team_fixtures=round_team_fixtures
+    )
+
+    if new_ids and len(team_fixtures):
+        earlier = history[
+            history["element"].isin(new_ids) & (history["round"] < round_)
+        ]
+        earlier = dp.add_element_history(earlier.reset_index(drop=True))
+        earlier = dp.add_player_static_info(earlier, elements)
+        earlier = dp.add_missing_player_data(
+            earlier,
+            players=players[players["element"].isin(new_ids)],
+            team_fixtures=team_fixtures,
+        )
+        rows = pd.concat([rows, earlier], ignore_index=True)
+
+    rows = dp.add_fixtures(rows, fixtures)
+
+    return pipeline_order(rows), round_team_fixtures
+
+
+def finalise_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """fillna, compact schema and kickoff order, as at the end of build_dataset."""
+    # Object columns left all-missing (e.g. no history rows in a round) are
+    # converted first, as fillna will stop downcasting them; categorical
+    # columns are already compact and cannot take a 0 fill value
+    df = df.infer_objects(copy=False)
+    df = df.fillna({col: 0 for col in df.columns if df[col].dtype != "category"})
+    df = sc.compact_frame(df)
+    if "kickoff_time" in df.columns:
+        df = df.sort_values(by=["kickoff_time", "fixture"], ascending=[True, True])
+    return df
+
+
+def load_team_fixtures(store_dir: str = STORE_DIR) -> pd.DataFrame:
+    team_fixtures = st.load_frame(TEAM_FIXTURES_NAME, data_dir=store_dir, compact=False)
+
+    # The JSON backend stores datetimes as epoch milliseconds
+    if pd.api.types.is_numeric_dtype(team_fixtures["kickoff_time"]):
+        team_fixtures["kickoff_time"] = pd.to_datetime(
+            team_fixtures["kickoff_time"], unit="ms", utc=True
+        )
+
+    return team_fixtures
+
+
+def save_store_state(
+    state: pd.DataFrame,
+    team_fixtures: pd.DataFrame,
+    manifest: dict,
+    store_dir: str = STORE_DIR,
+):
+    st.save_frame(state, STATE_NAME, data_dir=store_dir)
+    st.save_frame(team_fixtures, TEAM_FIXTURES_NAME, data_dir=store_dir)
+    save_manifest(manifest, store_dir)
+
+
+def rebuild(
+    df: pd.DataFrame,
+    metrics: List[str],
+    windows: List[int] = DEFAULT_WINDOWS,
+    finished_rounds: Optional[Iterable[int]] = None,
+    store_dir: str = STORE_DIR,
+) -> List[int]:
+    """
+    Replace the store with a fully built frame.
+
+    Parameters:
+    - df: output of data_processing.build_dataset / create_dataset
+    - metrics: metrics the frame has rolling averages and season totals for
+    - windows: rolling window sizes
+    - finished_rounds: only store these rounds, so a round still in progress
+      is appended once it finishes
+    - store_dir: store directory
+
+    Returns:
+    - The stored rounds
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    if finished_rounds is not None:
+        df = df[df["round"].isin(list(finished_rounds))]
+
+    df = pipeline_order(df)
+    rounds = sorted(int(round_) for round_ in df["round"].unique())
+
+    for round_ in rounds:
+        st.save_frame(
+            finalise_rows(df[df["round"] == round_]),
+            partition_name(round_),
+            data_dir=store_dir,
+        )
+
+    history_rows = df[df["modified"] != True] if "modified" in df.columns else df
+    manifest = {
+        "metrics": list(metrics),
+        "windows": list(windows),
+        "rounds": rounds,
+        "partitions": [partition_name(round_) for round_ in rounds],
+    }
+    save_store_state(
+        carry_state(df, metrics, windows),
+        dp.team_fixture_rows(history_rows),
+        manifest,
+        store_dir,
+    )
+
+    logging.info(f"Feature store rebuilt with {len(rounds)} rounds, {len(df)} rows")
+    return rounds
+
+
+def append_rounds(
+    history_records: Iterable[dict],
+    elements: List[Dict[str, Any]],
+    fixtures,
+    finished_rounds: Iterable[int],
+    metrics: List[str],
+    windows: List[int] = DEFAULT_WINDOWS,
+    store_dir: str = STORE_DIR,
+) -> Optional[List[int]]:
+    """
+    Append finished rounds that are not in the store yet.
+
+    Parameters:
+    - history_records: element history rows (only the new rounds and new
+      players are kept)
+    - elements: bootstrap-static elements
+    - fixtures: fixtures payload
+    - finished_rounds: rounds that have finished
+    - metrics: metrics to add rolling averages and season totals for
+    - windows: rolling window sizes
+    - store_dir: store directory
+
+    Returns:
+    - The appended rounds, or None when the store must be rebuilt instead
+      (no store yet, different features, or a gap before the last round)
+    """
+    manifest = load_manifest(store_dir)
+    if manifest is None:
+        logging.info("No feature store found, a rebuild is needed")
+        return None
+
+    if manifest["metrics"] != list(metrics) or manifest["windows"] != list(windows):
+        logging.info("Feature store was built with other features, a rebuild is needed")
+        return None
+
+    stored = set(manifest["rounds"])
+    new_rounds = sorted(set(finished_rounds) - stored)
+    if not new_rounds:
+        return []
+
+    if stored and new_rounds[0] < max(stored):
+        logging.info(f"Round {new_rounds[0]} is missing from the store, rebuilding")
+        return None
+
+    state = st.load_frame(STATE_NAME, data_dir=store_dir, compact=False)
+    team_fixtures = load_team_fixtures(store_dir)
+
+    # Keep only the rows an append can use
+    known = set(state["element"])
+    round_set = set(new_rounds)
+    history = pd.DataFrame(
+        [
+            record
+            for record in history_records
+            if record["round"] in round_set or record["element"] not in known
+        ]
+    )
+
+    for round_ in new_rounds:
+        if history.empty or not (history["round"] == round_).any():
+            logging.info(f"No history rows for round {round_}")
+            rows = None
+        else:
+            rows, round_team_fixtures = build_round_rows(
+                history, elements, fixtures, round_, state["element"], team_fixtures
+            )
+            rows = add_round_features(rows, state, metrics, windows)
+
+            st.save_frame(
+                finalise_rows(rows), partition_name(round_), data_dir=store_dir
+            )
+            manifest["partitions"].append(partition_name(round_))
+
+            state = carry_state(
+                pd.concat([state, rows[state.columns]], ignore_index=True),
+                metrics,
+                windows,
+            )
+            team_fixtures = pd.concat(
+                [team_fixtures, round_team_fixtures], ignore_index=True
+            )
+
+        manifest["rounds"].append(round_)
+        save_store_state(state, team_fixtures, manifest, store_dir)
+        logging.info(
+            f"Appended round {round_} to the feature store "
+            f"({0 if rows is None else len(rows)} rows)"
+        )
+
+    return new_rounds
+
+
+def load_store(
+    columns: Optional[List[str]] = None,
+    rounds: Optional[Iterable[int]] = None,
+    store_dir: str = STORE_DIR,
+) -> pd.DataFrame:
+    """
+    Load the stored rounds as one frame, in the layout build_dataset returns.
+
+    Parameters:
+    - columns: columns to load, all columns if None
+    - rounds: only load rows with these rounds
+    - store_dir: store directory
+
+    Returns:
+    - The merged player-fixture frame
+    """
+    manifest = load_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No feature store found in {store_dir}")
+
+    load_columns = columns
+    if columns is not None:
+        # The sort keys of finalise_rows, dropped again once the rows are ordered
+        load_columns = list(dict.fromkeys(columns + ["kickoff_time", "fixture"]))
+
+    frames = [
+        st.load_frame(name, load_columns, rounds, data_dir=store_dir, compact=False)
+        for name in manifest["partitions"]
+    ]
+    # Columns absent from some rounds are filled with zeros by finalise_rows
+    df = finalise_rows(pd.concat(frames, ignore_index=True)).reset_index(drop=True)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
+
+
+def check_consistency(
+    store_df: pd.DataFrame,
+    rebuilt_df: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    atol: float = 1e-4,
+) -> dict:
+    """
+    Compare the store with a full rebuild, row by row on (element, fixture).
+
+    Parameters:
+    - store_df: frame loaded with load_store
+    - rebuilt_df: build_dataset output restricted to the stored rounds
+    - columns: columns to compare, defaults to the numeric columns of both
+    - atol: absolute tolerance for float columns
+
+    Returns:
+    - Dict with 'missing_rows' and 'extra_rows' counts, 'mismatches' per
+      column and a 'consistent' flag
+    """
+    keys = ["element", "fixture"]
+
+    if columns is None:
+        columns = [
+            col
+            for col in rebuilt_df.columns
+            if col in store_df.columns
+            and col not in keys
+            and pd.api.types.is_numeric_dtype(rebuilt_df[col])
+            and pd.api.types.is_numeric_dtype(store_df[col])
+        ]
+
+    merged = store_df[keys + columns].merge(
+        rebuilt_df[keys + columns],
+        on=keys,
+        how="outer",
+        suffixes=("_store", "_rebuilt"),
+        indicator=True,
+    )
+    both = merged[merged["_merge"] == "both"]
+
+    mismatches = {}
+    for col in columns:
+        stored = both[f"{col}_store"].to_numpy(dtype=float)
+        rebuilt = both[f"{col}_rebuilt"].to_numpy(dtype=float)
+        count = int((~np.isclose(stored, rebuilt, atol=atol, equal_nan=True)).sum())
+        if count:
+            mismatches[col] = count
+
+    report = {
+        "missing_rows": int((merged["_merge"] == "right_only").sum()),
+        "extra_rows": int((merged["_merge"] == "left_only").sum()),
+        "mismatches": mismatches,
+    }
+    report["consistent"] = not (
+        report["missing_rows"] or report["extra_rows"] or mismatches
+    )
+
+    logging.info(f"Feature store consistency: {report}")
+    return report
@@ -1,11 +1,17 @@
+import copy
+import functools
 import json
 import logging
 from scipy.stats import randint, uniform
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from sklearn.pipeline import Pipeline
 
 import helpers.data_helpers as dh
+import helpers.model_registry as mr
+import helpers.online_store as om
+import helpers.training_scheduler as ts
+import helpers.tuning_cache as tc
 import functions.data_ingestion as di
 import numpy as np
 import pandas as pd
@@ -13,11 +19,21 @@ import pulp
 from pulp import LpMaximize, LpProblem, LpStatus, LpVariable, lpSum
 from sklearn.compose import ColumnTransformer
 from sklearn.discriminant_analysis import StandardScaler
-from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
-from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import (
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.linear_model import LinearRegression, SGDRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, train_test_split
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingRandomSearchCV,
+    TimeSeriesSplit,
+    train_test_split,
+)
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder
 from sklearn.svm import SVR
 from sklearn.tree import DecisionTreeRegressor
 
@@ -175,10 +191,45 @@ def plot_svr_single_feature(
     return plt.gcf()
 
 
+# Model types that split on categorical features natively instead of one-hot columns
+NATIVE_CATEGORICAL_MODEL_TYPES = ["Histogram Gradient Boosting"]
+
+# HistGradientBoostingRegressor bins each categorical feature into at most
+# 255 categories, so the least frequent players share one category
+HIST_MAX_CATEGORIES = 255
+
+
 def create_preprocessor(
-    categorical_features: List[str], numerical_features: List[str]
+    categorical_features: List[str],
+    numerical_features: List[str],
+    native_categorical: bool = False,
 ) -> ColumnTransformer:
-    """Create the preprocessing pipeline for categorical and numerical features."""
+    """
+    Create the preprocessing pipeline for categorical and numerical features.
+
+    With native_categorical the categorical features are ordinal-encoded,
+    unknown categories as -1 which the model treats as missing, and the
+    numerical features are passed through unscaled, for models that handle
+    categories themselves. Categorical columns always come first.
+    """
+    if native_categorical:
+        return ColumnTransformer(
+            transformers=[
+                (
+                    "cat",
+                    OrdinalEncoder(
+                        handle_unknown="use_encoded_value",
+                        unknown_value=-1,
+                        encoded_missing_value=-1,
+                        max_categories=HIST_MAX_CATEGORIES,
+                    ),
+                    categorical_features,
+                ),
+                ("num", "passthrough", numerical_features),
+            ],
+            remainder="drop",
+        )
+
     return ColumnTransformer(
         transformers=[
             (
@@ -284,55 +335,163 @@ def get_feature_importance_gb(
     return feature_importance
 
 
-def tune_hyperparameters(
-    model: Pipeline,
-    X_train: pd.DataFrame,
-    y_train: pd.Series,
-    model_type: str,
-    target: str,
-):
-    """Quick hyperparameter tuning with a reduced search space and iterations, excluding Linear Regression."""
+# Candidates the successive-halving search starts from; a third survive each
+# iteration
+TUNING_CANDIDATES = 27
+TUNING_FACTOR = 3
+# Time-ordered validation folds of the search, each validated on the rounds
+# after the ones it trains on
+TUNING_SPLITS = 2
+TUNING_VALIDATION_ROUNDS = 2
+# Fewest rows a candidate is first scored on, so every fold keeps some rows
+TUNING_MIN_ROWS = 200
 
+
+def param_distributions(model_type: str) -> Optional[dict]:
+    """The search space of a model type, or None for types that are not tuned."""
     if model_type == "Gradient Boosting":
-        param_dist = {
+        return {
             "regressor__n_estimators": randint(50, 200),  # Number of estimators
             "regressor__learning_rate": uniform(0.01, 0.2),  # Learning rate
             "regressor__max_depth": randint(3, 15),  # Depth of trees
             "regressor__min_samples_split": randint(2, 10),  # Min samples to split
             "regressor__min_samples_leaf": randint(1, 5),  # Min samples in leaf
         }
+    elif model_type == "Histogram Gradient Boosting":
+        # The number of iterations is left to early stopping
+        return {
+            "regressor__learning_rate": uniform(0.02, 0.2),  # Learning rate
+            "regressor__max_leaf_nodes": randint(15, 64),  # Leaves per tree
+            "regressor__min_samples_leaf": randint(10, 60),  # Min samples in leaf
+            "regressor__l2_regularization": uniform(0.0, 1.0),  # Leaf regularisation
+        }
     elif model_type == "Decision Tree":
-        param_dist = {
+        # The criterion is not searched: "friedman_mse", the only alternative
+        # tried, is deprecated and fits exactly as the default "squared_error"
+        return {
             "regressor__max_depth": randint(3, 15),  # Max depth of tree
             "regressor__min_samples_split": randint(2, 10),  # Min samples to split
             "regressor__min_samples_leaf": randint(1, 5),  # Min samples in leaf
-            "regressor__criterion": [
-                "squared_error",
-                "friedman_mse",
-            ],  # Tree split criteria
         }
     elif model_type == "Support Vector Machine":
-        param_dist = {
+        return {
             "regressor__C": uniform(0.1, 5),  # Regularization parameter
             "regressor__epsilon": uniform(0.01, 0.5),  # Epsilon in loss function
             "regressor__gamma": ["scale", "auto"],  # Kernel coefficient
         }
 
-    # Linear Regression does not have hyperparameters to tune in this context
-    elif model_type == "Linear Regression" or model_type == "Random Forest":
-        # No tuning needed for Linear Regression
+    # Linear Regression and Random Forest are not tuned
+    return None
+
+
+def round_splits(
+    rounds,
+    n_splits: int = TUNING_SPLITS,
+    validation_rounds: int = TUNING_VALIDATION_ROUNDS,
+) -> list:
+    """
+    TimeSeriesSplit over the distinct rounds of the training rows.
+
+    Each fold validates on the validation_rounds that follow the rounds it
+    trains on, and a round is never split between the two, so candidates are
+    scored as they are used: predicting the next rounds from all earlier ones.
+    With fewer rounds than folds need, the rows are split in order instead.
+
+    Parameters:
+    - rounds: the round of each training row
+    - n_splits: folds
+    - validation_rounds: rounds each fold is validated on
+
+    Returns:
+    - List of (train indices, validation indices), usable as cv
+    """
+    rounds = np.asarray(rounds)
+    distinct = np.unique(rounds)
+    validation_rounds = min(validation_rounds, (len(distinct) - 1) // n_splits)
+    if validation_rounds < 1:
+        return list(TimeSeriesSplit(n_splits).split(rounds))
+
+    return [
+        (
+            np.flatnonzero(np.isin(rounds, distinct[train_rounds])),
+            np.flatnonzero(np.isin(rounds, distinct[validated_rounds])),
+        )
+        for train_rounds, validated_rounds in TimeSeriesSplit(
+            n_splits, test_size=validation_rounds
+        ).split(distinct)
+    ]
+
+
+def set_hyperparameters(model, hyperparameters: dict):
+    """Apply saved regressor__ hyperparameters to a pipeline or a bare regressor."""
+    if not isinstance(model, Pipeline):
+        hyperparameters = {
+            name.replace("regressor__", "", 1): value
+            for name, value in hyperparameters.items()
+        }
+    return model.set_params(**hyperparameters)
+
+
+def tune_hyperparameters(
+    model: Pipeline,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    model_type: str,
+    target: str,
+    n_jobs: int = -1,
+    rounds=None,
+):
+    """
+    Successive-halving hyperparameter search, excluding untuned model types.
+
+    TUNING_CANDIDATES random candidates are scored on a subsample of the
+    rows and only the best third go on to each larger one, so most of the
+    budget is spent on the candidates worth fitting on all of the data.
+
+    Parameters:
+    - rounds: the round of each X_train row, to validate on later rounds
+      (see round_splits); None uses TimeSeriesSplit on the row order
+    - n_jobs: number of processes the search may use; callers training
+      several targets at once pass their share of the CPUs
+
+    Returns:
+    - (model with the best hyperparameters set, unfitted; result data the
+      metrics are saved with)
+    """
+    param_dist = param_distributions(model_type)
+    if param_dist is None:
         return model, {"best_hyperparameters": None, "metrics": None}
 
-    # Perform Randomized Search for models with tunable hyperparameters
-    search = RandomizedSearchCV(
+    if not isinstance(model, Pipeline):
+        # A bare regressor, searched on precomputed features
+        param_dist = {
+            name.replace("regressor__", "", 1): values
+            for name, values in param_dist.items()
+        }
+
+    search = HalvingRandomSearchCV(
         model,
         param_distributions=param_dist,
-        n_iter=10,  # Number of combinations to try
-        cv=2,  # 3-fold cross-validation
+        n_candidates=TUNING_CANDIDATES,
+        factor=TUNING_FACTOR,
+        resource="n_samples",
+        # The last iteration fits on all the rows when there are enough of
+        # them to start the first on TUNING_MIN_ROWS
+        min_resources=min(
+            X_train.shape[0],
+            max(TUNING_MIN_ROWS, X_train.shape[0] // TUNING_CANDIDATES),
+        ),
+        cv=(
+            TimeSeriesSplit(TUNING_SPLITS)
+            if rounds is None
+            else round_splits(rounds, TUNING_SPLITS, TUNING_VALIDATION_ROUNDS)
+        ),
         scoring="neg_mean_squared_error",  # Using MSE for regression
         random_state=42,
-        n_jobs=-1,
+        n_jobs=n_jobs,
         verbose=1,
+        refit=False,  # The caller fits the returned model once
+        return_train_score=False,
     )
 
     search.fit(X_train, y_train)
@@ -341,36 +500,335 @@ def tune_hyperparameters(
     for param, value in search.best_params_.items():
         logging.info(f"{param}: {value}")
 
-    # Save the best hyperparameters and metrics to a JSON file
-    filename = f"best_hyperparameters_and_metrics_{model_type}_{target}.json"
-
     # Create a dictionary to save both hyperparameters and metrics
     result_data = {
-        "best_hyperparameters": search.best_params_,
+        "best_hyperparameters": {
+            (name if isinstance(model, Pipeline) else f"regressor__{name}"): value
+            for name, value in search.best_params_.items()
+        },
         "metrics": None,  # We will fill this in later after evaluation
     }
 
-    return search.best_estimator_, result_data
+    return set_hyperparameters(model, search.best_params_), result_data
 
 
-def train_model(
-    model_type, df: pd.DataFrame, categorical_features, numerical_features, target
-) -> Pipeline:
-    logging.info(f"Training for {target}")
-    features = categorical_features + numerical_features
+GOALKEEPER_TARGETS = [
+    "saves",
+    "penalties_saved",
+]
+
+
+# Model types whose estimator fits several targets in one multi-output fit
+MULTI_OUTPUT_MODEL_TYPES = ["Linear Regression", "Decision Tree", "Random Forest"]
 
-    goalkeeper_targets = [
-        "saves",
-        "penalties_saved",
-    ]
 
-    if target in goalkeeper_targets:
+def target_list(target) -> List[str]:
+    """A target name, or a list or tuple of targets fitted together, as a list."""
+    return [target] if isinstance(target, str) else list(target)
+
+
+def training_rows(target) -> str:
+    """
+    The rows a target is trained on: 'goalkeepers' or 'all'.
+
+    Raises ValueError for targets fitted together that need different rows.
+    """
+    rows = {
+        "goalkeepers" if name in GOALKEEPER_TARGETS else "all"
+        for name in target_list(target)
+    }
+    if len(rows) != 1:
+        raise ValueError(f"Targets {target} are not trained on the same rows")
+    return rows.pop()
+
+
+def split_training_data(
+    df: pd.DataFrame, categorical_features, numerical_features, target
+) -> tuple:
+    """
+    The (X_train, X_test, y_train, y_test) split train_model fits and scores on.
+
+    y is a DataFrame with one column per target when target is a list.
+    """
+    if training_rows(target) == "goalkeepers":
         # Only include goalkeepers for goalkeeper-specific targets
         df = df[df["element_type"] == 1]
 
-    X = df[features]
+    X = df[categorical_features + numerical_features]
+    y = df[target if isinstance(target, str) else list(target)]
+
+    return train_test_split(df, X, y)
+
+
+def training_rounds(df: pd.DataFrame, target) -> np.ndarray:
+    """The round of each X_train row of split_training_data."""
+    rows, _, _, _ = split_training_data(df, [], ["round"], target)
+    return rows["round"].to_numpy()
+
+
+class PreprocessingCache:
+    """
+    Fitted preprocessors and transformed design matrices for one data snapshot.
+
+    Every target trained on the same rows and features shares one fitted
+    ColumnTransformer and its transformed train and test matrices, so
+    preprocessing runs once per distinct row set (all players, or only
+    goalkeepers) rather than once per target and search candidate. A cache
+    must only be used with the frame it was filled from.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.fits = 0
+
+    @staticmethod
+    def key(categorical_features, numerical_features, target, model_type) -> tuple:
+        return (
+            training_rows(target),
+            tuple(categorical_features),
+            tuple(numerical_features),
+            model_type in NATIVE_CATEGORICAL_MODEL_TYPES,
+        )
+
+    def get(
+        self,
+        df: pd.DataFrame,
+        categorical_features,
+        numerical_features,
+        target,
+        model_type,
+    ) -> tuple:
+        """
+        Returns:
+        - (fitted preprocessor, transformed X_train, transformed X_test)
+        """
+        key = self.key(categorical_features, numerical_features, target, model_type)
+        if key not in self.entries:
+            X_train, X_test, _, _ = split_training_data(
+                df, categorical_features, numerical_features, target
+            )
+            preprocessor = create_preprocessor(
+                categorical_features,
+                numerical_features,
+                native_categorical=model_type in NATIVE_CATEGORICAL_MODEL_TYPES,
+            )
+            self.entries[key] = (
+                preprocessor,
+                preprocessor.fit_transform(X_train),
+                preprocessor.transform(X_test),
+            )
+            self.fits += 1
+        return self.entries[key]
+
+    def prepare(
+        self, df: pd.DataFrame, target_columns: Dict[str, tuple], model_type: str
+    ):
+        """Fill the cache for every target, e.g. before handing it to worker processes."""
+        for target, (categorical, numerical) in target_columns.items():
+            self.get(df, categorical, numerical, target, model_type)
+
+
+def save_metrics(model_type, target, y_test, y_pred, result_data: dict) -> None:
+    """Evaluate the predictions of each target and save them with result_data."""
+    if isinstance(target, str):
+        metrics_by_target = {target: evaluate_model(y_test, y_pred)}
+    else:
+        metrics_by_target = {
+            name: evaluate_model(y_test[name], y_pred[:, column])
+            for column, name in enumerate(target)
+        }
+
+    for name, metrics in metrics_by_target.items():
+        # Add the metrics to the result_data dictionary
+        result_data["metrics"] = metrics
+
+        # Save the hyperparameters and metrics to a JSON file
+        filename = f"metrics/best_hyperparameters_and_metrics_{model_type}_{name}.json"
+        with open(filename, "w") as f:
+            json.dump(result_data, f, indent=4)
+
+
+# Model types updated from the rounds added since they were last trained,
+# instead of refitted on the whole history
+ONLINE_MODEL_TYPES = ["Online Linear Regression"]
+# Passes over each batch of new rows
+ONLINE_EPOCHS = 5
+
+
+def update_online_model(
+    df: pd.DataFrame,
+    categorical_features,
+    numerical_features,
+    target: str,
+    previous: Optional[tuple] = None,
+) -> tuple:
+    """
+    Train an ONLINE_MODEL_TYPES model on the rounds it has not seen yet.
+
+    A linear model fitted by stochastic gradient descent is updated with
+    partial_fit on the new rows only, so the cost of an update does not grow
+    with the history. The preprocessor is fitted once, on the first rounds;
+    players it has not seen are ignored by the one-hot encoding. The new rows
+    are predicted before the model learns from them, scoring it on rounds it
+    was not trained on, as it is used.
+
+    Parameters:
+    - previous: (fitted pipeline, last round it was trained on) to update; it
+      is copied, not modified. None fits a new model on every round before
+      the latest, which is then learnt as the new rows
+
+    Returns:
+    - (updated pipeline, y of the new rows, their predictions before the update)
+    """
+    if "round" not in df.columns:
+        raise ValueError("Online models need the round of each row")
+
+    if training_rows(target) == "goalkeepers":
+        df = df[df["element_type"] == 1]
+    X = df[categorical_features + numerical_features]
     y = df[target]
 
+    if previous is None:
+        last_round = df["round"].max() - 1
+        initial = (df["round"] <= last_round).to_numpy()
+        if not initial.any():
+            # A single round is fitted and learnt from at once
+            initial[:] = True
+
+        preprocessor = create_preprocessor(categorical_features, numerical_features)
+        regressor = SGDRegressor(
+            penalty="l2",
+            alpha=1e-4,
+            learning_rate="invscaling",
+            eta0=0.01,
+            random_state=42,
+        )
+        regressor.fit(preprocessor.fit_transform(X[initial]), y[initial])
+        model = create_model(regressor, preprocessor)
+    else:
+        model, last_round = previous
+        # The registered model is shared with other callers
+        model = copy.deepcopy(model)
+
+    new = (df["round"] > last_round).to_numpy()
+    X_new, y_new = X[new], y[new]
+    if not new.any():
+        return model, y_new, np.empty(0)
+
+    Xt_new = model.named_steps["preprocessor"].transform(X_new)
+    regressor = model.named_steps["regressor"]
+    y_pred = regressor.predict(Xt_new)
+
+    rng = np.random.default_rng(42)
+    for _ in range(ONLINE_EPOCHS):
+        order = rng.permutation(len(y_new))
+        regressor.partial_fit(Xt_new[order], y_new.to_numpy()[order])
+
+    return model, y_new, y_pred
+
+
+def online_checkpoints(
+    store: om.OnlineModelStore,
+    model_type: str,
+    df: pd.DataFrame,
+    target_columns: Dict[str, tuple],
+) -> Dict[str, tuple]:
+    """
+    The stored online models trained on the same data up to a round of df.
+
+    A checkpoint is only used if the data key it recorded matches df up to
+    its last round, so a model is never updated from a different history.
+
+    Returns:
+    - Dict mapping targets to (model, last round it was trained on), for the
+      targets a checkpoint was found for
+    """
+    checkpoints = {}
+    rounds = set(df["round"].unique())
+    # Hash the rows up to each checkpointed round once, for all targets
+    digests = {}
+    for target, (categorical, numerical) in target_columns.items():
+        key = om.checkpoint_key(model_type, target, categorical, numerical)
+        stored = store.checkpoints(key)
+        for last_round, data_key in stored:
+            if last_round not in rounds:
+                continue
+            prefix = df[df["round"] <= last_round]
+            if last_round not in digests:
+                digests[last_round] = mr.column_digests(prefix, prefix.columns)
+            if data_key != mr.data_key(
+                model_type, prefix, categorical, numerical, target, digests[last_round]
+            ):
+                continue
+            model = store.load(key, last_round, data_key)
+            if model is not None:
+                checkpoints[target] = (model, last_round)
+                break
+
+        if target in checkpoints:
+            continue
+        if stored:
+            logging.warning(
+                f"No online checkpoint matches the data for {target}; "
+                f"refitting {model_type} on every round"
+            )
+        else:
+            logging.info(
+                f"No online checkpoint for {target}; "
+                f"fitting {model_type} on every round"
+            )
+
+    return checkpoints
+
+
+def train_model(
+    model_type,
+    df: pd.DataFrame,
+    categorical_features,
+    numerical_features,
+    target,
+    n_jobs: int = -1,
+    preprocessing: Optional[PreprocessingCache] = None,
+    tuning: Optional[tc.TuningCache] = None,
+    checkpoints: Optional[Dict[str, tuple]] = None,
+) -> Pipeline:
+    """
+    Train, tune and score the model for one target.
+
+    A list of targets trained on the same rows is fitted as one multi-output
+    model, for the MULTI_OUTPUT_MODEL_TYPES, whose predict returns one column
+    per target; metrics are still evaluated and saved for each target.
+
+    With a PreprocessingCache the regressor, and any hyperparameter search,
+    is fitted on the cached design matrix and combined with the cached
+    preprocessor into the same pipeline as without one.
+
+    With a TuningCache the hyperparameters last tuned for this model type,
+    target and features are reused, skipping the search, unless the data
+    has grown or drifted since; newly searched ones are stored in it.
+
+    ONLINE_MODEL_TYPES are updated from the target's model in checkpoints,
+    a (model, last round trained on) pair as found by online_checkpoints,
+    on the later rounds only; see update_online_model.
+    """
+    logging.info(f"Training for {target}")
+
+    if not isinstance(target, str) and model_type not in MULTI_OUTPUT_MODEL_TYPES:
+        raise ValueError(f"{model_type} does not support multi-output training")
+
+    if model_type in ONLINE_MODEL_TYPES:
+        model, y_new, y_pred = update_online_model(
+            df,
+            categorical_features,
+            numerical_features,
+            target,
+            (checkpoints or {}).get(target),
+        )
+        if len(y_new):
+            result_data = {"best_hyperparameters": None, "metrics": None}
+            save_metrics(model_type, target, y_new, y_pred, result_data)
+        return model
+
     if model_type == "Linear Regression":
         algorithmn = (
             LinearRegression()
@@ -389,51 +847,226 @@ def train_model(
 
     elif model_type == "Gradient Boosting":
         algorithmn = GradientBoostingRegressor(random_state=42)
+    elif model_type == "Histogram Gradient Boosting":
+        # Multithreaded; stops adding trees once a held-out 10% stops improving
+        algorithmn = HistGradientBoostingRegressor(
+            categorical_features=list(range(len(categorical_features))),
+            max_iter=500,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=10,
+            random_state=42,
+        )
     elif model_type == "Support Vector Machine":
         algorithmn = SVR(kernel="rbf")
     else:
         raise ValueError(f"Unknown model type: {model_type}")
 
-    preprocessor = create_preprocessor(categorical_features, numerical_features)
-    model = create_model(algorithmn, preprocessor)
-
     # Split the data into train and test sets
-    X_train, X_test, y_train, y_test = train_test_split(df, X, y)
-
-    model, result_data = tune_hyperparameters(
-        model, X_train, y_train, model_type, target
+    X_train, X_test, y_train, y_test = split_training_data(
+        df, categorical_features, numerical_features, target
     )
 
-    model.fit(X_train, y_train)
+    if preprocessing is None:
+        preprocessor = create_preprocessor(
+            categorical_features,
+            numerical_features,
+            native_categorical=model_type in NATIVE_CATEGORICAL_MODEL_TYPES,
+        )
+        estimator = create_model(algorithmn, preprocessor)
+        X_fit, X_eval = X_train, X_test
+    else:
+        preprocessor, X_fit, X_eval = preprocessing.get(
+            df, categorical_features, numerical_features, target, model_type
+        )
+        estimator = algorithmn
 
-    y_pred = model.predict(X_test)
+    hyperparameters = None
+    if tuning is not None and param_distributions(model_type) is not None:
+        key = tc.tuning_key(
+            model_type, target, categorical_features, numerical_features
+        )
+        profile = tc.data_profile(X_train[numerical_features], y_train)
+        hyperparameters = tuning.lookup(key, profile)
+
+    if hyperparameters is None:
+        estimator, result_data = tune_hyperparameters(
+            estimator,
+            X_fit,
+            y_train,
+            model_type,
+            target,
+            n_jobs=n_jobs,
+            rounds=training_rounds(df, target) if "round" in df.columns else None,
+        )
+        if tuning is not None and result_data["best_hyperparameters"] is not None:
+            tuning.store(key, result_data["best_hyperparameters"], profile)
+    else:
+        logging.info(f"Reusing tuned hyperparameters for {target}")
+        estimator = set_hyperparameters(estimator, hyperparameters)
+        result_data = {"best_hyperparameters": hyperparameters, "metrics": None}
 
-    # Evaluate the model
-    metrics = evaluate_model(y_test, y_pred)
+    estimator.fit(X_fit, y_train)
 
-    # Add the metrics to the result_data dictionary
-    result_data["metrics"] = metrics
+    y_pred = estimator.predict(X_eval)
+    model = (
+        estimator if preprocessing is None else create_model(estimator, preprocessor)
+    )
 
-    # Save the hyperparameters and metrics to a JSON file
-    filename = f"metrics/best_hyperparameters_and_metrics_{model_type}_{target}.json"
-    with open(filename, "w") as f:
-        json.dump(result_data, f, indent=4)
+    save_metrics(model_type, target, y_test, y_pred, result_data)
 
     return model
 
-    # Train the model
 
-    # model = tune_hyperparameters(model, X_train, y_train)
+class MultiOutputTarget:
+    """One target's predictions from a model fitted on several targets at once."""
 
-    # Make predictions
+    def __init__(self, model: Pipeline, targets: List[str], target: str):
+        self.model = model
+        self.targets = targets
+        self.column = targets.index(target)
 
-    # Evaluate the model
-    # evaluate_model(y_test, y_pred)
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.model.predict(X)[:, self.column]
 
-    # if target == "minutes":
-    # get_feature_importance(model, categorical_features, numerical_features)
 
-    return model
+def train_target_models(
+    model_type,
+    df: pd.DataFrame,
+    target_columns: Dict[str, tuple],
+    registry: Optional[mr.ModelRegistry] = None,
+    n_workers: Optional[int] = None,
+    multi_output: bool = False,
+    tuning: Optional[tc.TuningCache] = None,
+    online_store: Optional[om.OnlineModelStore] = None,
+) -> Dict[str, Pipeline]:
+    """
+    Fit one model per target on a data snapshot.
+
+    Parameters:
+    - model_type: model name accepted by train_model
+    - df: training data
+    - target_columns: maps each target to its (categorical, numerical) features
+    - registry: if given, models already trained on identical data are loaded
+      from it instead of retrained, and new models are stored in it
+    - n_workers: processes the remaining targets are trained in, see
+      training_scheduler.train_targets
+    - multi_output: for the MULTI_OUTPUT_MODEL_TYPES, fit the targets that
+      share rows and features as one multi-output model; other model types
+      keep one model per target
+    - tuning: if given, hyperparameters are reused from it instead of
+      searched while the data has not grown or drifted, see train_model
+    - online_store: for the ONLINE_MODEL_TYPES, the checkpoints the models
+      are updated from, on the rounds after the one they were last trained
+      on; without one, or a checkpoint matching df, they are fitted on
+      every round. The updated models are checkpointed in it
+
+    Returns:
+    - Dict mapping each target to its fitted pipeline, or to a
+      MultiOutputTarget of a shared one (use predict_targets to predict
+      shared models once)
+    """
+    # element_type is always kept, as train_model filters goalkeeper targets on
+    # it, and round, which orders the tuning folds and online model updates
+    columns = dict.fromkeys(
+        column for column in ["element_type", "round"] if column in df.columns
+    )
+    for categorical, numerical in target_columns.values():
+        columns.update(dict.fromkeys(categorical + numerical))
+    columns.update(dict.fromkeys(target_columns))
+    df = df[list(columns)]
+
+    # Each task is a target, or a tuple of targets fitted as one model
+    tasks = {}
+    if multi_output and model_type in MULTI_OUTPUT_MODEL_TYPES:
+        groups = {}
+        for target, (categorical, numerical) in target_columns.items():
+            key = PreprocessingCache.key(categorical, numerical, target, model_type)
+            groups.setdefault(key, []).append(target)
+        for targets in groups.values():
+            tasks[tuple(targets)] = target_columns[targets[0]]
+    else:
+        tasks = dict(target_columns)
+
+    models = {}
+    keys = {}
+    if registry is not None:
+        # Hash each training column once, however many targets use it
+        digests = mr.column_digests(df, columns)
+        for task, (categorical, numerical) in tasks.items():
+            keys[task] = registry.key_for(
+                model_type, df, categorical, numerical, task, digests
+            )
+            model = registry.load(keys[task])
+            if model is not None:
+                models[task] = model
+
+    missing = {task: features for task, features in tasks.items() if task not in models}
+    if missing:
+        if model_type in ONLINE_MODEL_TYPES:
+            # Online models keep the preprocessor they were first fitted with
+            train = functools.partial(
+                train_model,
+                checkpoints=(
+                    online_checkpoints(online_store, model_type, df, missing)
+                    if online_store is not None
+                    else None
+                ),
+            )
+        else:
+            # Fitted once here and shipped to the workers with the tasks
+            preprocessing = PreprocessingCache()
+            preprocessing.prepare(df, missing, model_type)
+            train = functools.partial(
+                train_model, preprocessing=preprocessing, tuning=tuning
+            )
+
+        trained = ts.train_targets(
+            train,
+            model_type,
+            df,
+            missing,
+            n_workers,
+        )
+        for task, model in trained.items():
+            if registry is not None:
+                registry.store(keys[task], model)
+            if online_store is not None and model_type in ONLINE_MODEL_TYPES:
+                categorical, numerical = missing[task]
+                online_store.store(
+                    om.checkpoint_key(model_type, task, categorical, numerical),
+                    int(df["round"].max()),
+                    keys.get(task)
+                    or mr.data_key(model_type, df, categorical, numerical, task),
+                    model,
+                )
+            models[task] = model
+
+    target_models = {}
+    for task, model in models.items():
+        if isinstance(task, tuple):
+            for target in task:
+                target_models[target] = MultiOutputTarget(model, list(task), target)
+        else:
+            target_models[task] = model
+
+    return {target: target_models[target] for target in target_columns}
+
+
+def predict_targets(
+    models: Dict[str, Pipeline], X: pd.DataFrame
+) -> Dict[str, np.ndarray]:
+    """Predict every target, running each shared multi-output model once."""
+    shared = {}
+    predictions = {}
+    for target, model in models.items():
+        if isinstance(model, MultiOutputTarget):
+            if id(model.model) not in shared:
+                shared[id(model.model)] = model.model.predict(X)
+            predictions[target] = shared[id(model.model)][:, model.column]
+        else:
+            predictions[target] = model.predict(X)
+    return predictions
 
 
 def optimizeMultiGwTransfers(
@@ -1,14 +1,80 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
 import helpers.data_helpers as dh
 
+# Horizons create_multi_horizon_targets builds by default
+DEFAULT_HORIZONS = (1, 3, 5, 8)
+
+
+def rows_ahead(groups: np.ndarray) -> np.ndarray:
+    """For rows sorted by group, the number of later rows in the same group."""
+    positions = np.arange(len(groups))
+    is_end = np.ones(len(groups), dtype=bool)
+    is_end[:-1] = groups[1:] != groups[:-1]
+    ends = np.minimum.accumulate(np.where(is_end, positions, len(groups))[::-1])[::-1]
+    return ends - positions
+
+
+def forward_window_sums(
+    values: np.ndarray, groups: np.ndarray, horizons: Iterable[int]
+) -> Dict[int, np.ndarray]:
+    """
+    Sum of the next `horizon` rows of each group, for every horizon at once.
+
+    Equivalent to summing ``groupby(groups).shift(-i)`` for i in 1..horizon
+    with missing values skipped, but computed from one reversed cumulative
+    sum, so no shifted columns are materialised.
+
+    Parameters:
+    - values: (rows, columns) array, sorted so each group's rows are contiguous
+    - groups: group key per row
+    - horizons: window sizes
+
+    Returns:
+    - Dict mapping each horizon to a (rows, columns) array of sums; rows with
+      fewer than `horizon` later rows sum what is left, 0 for the last row
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    n_rows = len(values)
+
+    # suffix[k] is the sum over rows >= k, with a trailing zero row
+    suffix = np.zeros((n_rows + 1, values.shape[1]))
+    suffix[:-1] = np.cumsum(values[::-1], axis=0)[::-1]
+
+    positions = np.arange(n_rows)
+    # Last row of each row's group
+    ends = positions + rows_ahead(groups)
+
+    sums = {}
+    for horizon in horizons:
+        # Rows (position, upper] are the next `horizon` rows in the group
+        upper = np.minimum(positions + horizon, ends)
+        sums[horizon] = suffix[positions + 1] - suffix[upper + 1]
+
+    return sums
+
+
+def add_target_indicators(df: pd.DataFrame) -> List[str]:
+    """Add the minutes indicator columns and return every target column."""
+    # create a target for the number of times a player has player 60+ minutes in a horizion
+    df["minutes_60+"] = (df["minutes"] >= 60).astype(int)
+    df["minutes_1+"] = (df["minutes"] > 0).astype(int)
+
+    return list(dict.fromkeys(dh.get_targets() + ["minutes_60+", "minutes_1+"]))
+
 
 def create_shifted_targets(df, target_col, horizon):
-    # Create shifted columns for the target
-    for i in range(1, horizon + 1):
-        df[f"{target_col}_gw+{i}"] = df.groupby("element")[target_col].shift(-i)
+    """Add target_{target_col}: the sum of the player's next `horizon` rows."""
+    order = np.argsort(df["element"].to_numpy(), kind="stable")
+    values = df[target_col].to_numpy(dtype=float)[order, None]
+    sums = forward_window_sums(values, df["element"].to_numpy()[order], [horizon])
 
-    # Sum the shifted columns to create the target
-    target_cols = [f"{target_col}_gw+{i}" for i in range(1, horizon + 1)]
-    df[f"target_{target_col}"] = df[target_cols].sum(axis=1)
+    target = np.empty(len(df))
+    target[order] = sums[horizon][:, 0]
+    df[f"target_{target_col}"] = target
 
     return df
 
@@ -17,29 +83,55 @@ def create_targets(df, horizon):
     df = df.sort_values(["element", "round"])
 
     # List of target columns to process
-    target_columns = dh.get_targets()
+    target_columns = add_target_indicators(df)
 
-    # create a target for the number of times a player has player 60+ minutes in a horizion
-    df["minutes_60+"] = (df["minutes"] >= 60).astype(int)
-    target_columns.append("minutes_60+")
+    sums = forward_window_sums(
+        df[target_columns].to_numpy(dtype=float), df["element"].to_numpy(), [horizon]
+    )
 
-    df["minutes_1+"] = (df["minutes"] > 0).astype(int)
-    target_columns.append("minutes_1+")
+    target_cols = [f"target_{target_col}" for target_col in target_columns]
+    df = df.assign(**dict(zip(target_cols, sums[horizon].T)))
 
-    # Create targets for each column
-    for target_col in target_columns:
-        df = create_shifted_targets(df, target_col, horizon)
+    # Drop rows with missing target values
+    return df.dropna(subset=target_cols)
 
-    # Drop intermediate columns (optional)
-    intermediate_cols = [
-        f"{target_col}_gw+{i}"
-        for target_col in target_columns
-        for i in range(1, horizon + 1)
-    ]
-    df = df.drop(columns=intermediate_cols)
 
-    # Drop rows with missing target values
-    target_cols = [f"target_{target_col}" for target_col in target_columns]
-    df = df.dropna(subset=target_cols)
+def create_multi_horizon_targets(
+    df: pd.DataFrame,
+    horizons: Iterable[int] = DEFAULT_HORIZONS,
+    drop_incomplete: bool = False,
+) -> pd.DataFrame:
+    """
+    Add forward-window targets for several horizons in one pass.
+
+    Parameters:
+    - df: player rows with 'element', 'round' and the target source columns
+    - horizons: window sizes, e.g. (1, 3, 5, 8)
+    - drop_incomplete: drop rows without `max(horizons)` later rows, whose
+      targets would only cover part of the window
+
+    Returns:
+    - df sorted by element and round with a target_{column}_h{horizon}
+      column per target column and horizon
+    """
+    horizons = list(horizons)
+    df = df.sort_values(["element", "round"])
+
+    target_columns = add_target_indicators(df)
+    groups = df["element"].to_numpy()
+
+    sums = forward_window_sums(
+        df[target_columns].to_numpy(dtype=float), groups, horizons
+    )
+
+    new_columns = {}
+    for horizon in horizons:
+        for i, target_col in enumerate(target_columns):
+            new_columns[f"target_{target_col}_h{horizon}"] = sums[horizon][:, i]
+
+    df = df.assign(**new_columns)
+
+    if drop_incomplete:
+        df = df[rows_ahead(groups) >= max(horizons)]
 
     return df
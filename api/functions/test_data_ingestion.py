@@ -0,0 +1,84 @@
+import random
+import time
+
+import functions.data_ingestion as di
+from functions.data_ingestion import TokenBucket, fetch_element_gameweek_data
+
+
+def test_fetch_element_gameweek_data_keeps_element_order(monkeypatch):
+    def fake_fetch_element_summary(element_id):
+        # Finish out of order to make sure results are still ordered
+        time.sleep(random.uniform(0, 0.01))
+        return {"history": [{"element": element_id, "round": r} for r in (1, 2)]}
+
+    monkeypatch.setattr(di, "fetch_element_summary", fake_fetch_element_summary)
+
+    bootstrap_data = {"elements": [{"id": i} for i in range(1, 21)]}
+    history = fetch_element_gameweek_data(
+        bootstrap_data, max_workers=4, requests_per_second=1000
+    )
+
+    expected = [{"element": i, "round": r} for i in range(1, 21) for r in (1, 2)]
+    assert history == expected
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # First token is free, the other ten are spaced 20 ms apart
+    assert elapsed >= 0.18
+
+
+def make_bootstrap(elements, finished_events):
+    return {
+        "events": [{"id": e, "finished": e in finished_events} for e in (1, 2, 3)],
+        "elements": [
+            {"id": i, "total_points": tp, "minutes": m, "event_points": ep}
+            for i, tp, m, ep in elements
+        ],
+    }
+
+
+def test_incremental_fetch_only_refetches_changed_elements(monkeypatch):
+    previous = make_bootstrap([(1, 5, 90, 5), (2, 2, 90, 2), (3, 0, 0, 0)], {1})
+    current = make_bootstrap(
+        [(1, 5, 90, 0), (2, 8, 180, 6), (3, 0, 0, 0), (4, 1, 30, 1)], {1, 2}
+    )
+    stored = [
+        {"element": 1, "round": 1, "total_points": 5},
+        {"element": 2, "round": 1, "total_points": 2},
+        {"element": 3, "round": 1, "total_points": 0},
+    ]
+
+    fetched = []
+
+    def fake_fetch_element_summary(element_id):
+        fetched.append(element_id)
+        history = {
+            1: [{"element": 1, "round": 1, "total_points": 5}],
+            2: [
+                {"element": 2, "round": 1, "total_points": 2},
+                {"element": 2, "round": 2, "total_points": 6},
+            ],
+            4: [{"element": 4, "round": 2, "total_points": 1}],
+        }
+        return {"history": history[element_id]}
+
+    monkeypatch.setattr(di, "fetch_element_summary", fake_fetch_element_summary)
+
+    history = di.fetch_element_gameweek_data_incremental(current, previous, stored)
+
+    # Element 1 only changed event_points, 3 is unchanged, 4 is new
+    assert sorted(fetched) == [1, 2, 4]
+    assert history == [
+        {"element": 1, "round": 1, "total_points": 5},
+        {"element": 2, "round": 1, "total_points": 2},
+        {"element": 2, "round": 2, "total_points": 6},
+        {"element": 3, "round": 1, "total_points": 0},
+        {"element": 4, "round": 2, "total_points": 1},
+    ]
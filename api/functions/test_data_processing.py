@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+import functions.data_processing as dp
+from benchmarks.reference import add_missing_player_data_loop
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+
+@pytest.fixture
+def history_df(tmp_path, monkeypatch):
+    # add_element_history and add_player_static_info write debug files to cwd
+    monkeypatch.chdir(tmp_path)
+
+    payloads = generate_season(finished_rounds=8, players_per_team=4)
+    df = dp.add_element_history(element_gameweek_data(payloads))
+    return dp.add_player_static_info(df, payloads["bootstrap-static"]["elements"])
+
+
+def sort_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["element", "fixture"]).reset_index(drop=True)
+
+
+def test_add_missing_player_data_matches_loop(history_df):
+    expected = add_missing_player_data_loop(history_df)
+    result = dp.add_missing_player_data(history_df)
+
+    # Synthetic players who joined mid-season have fixtures to fill in
+    assert len(result) > len(history_df)
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(
+        sort_rows(result), sort_rows(expected), check_dtype=False
+    )
+
+
+def test_add_missing_player_data_without_gaps(history_df):
+    complete = dp.add_missing_player_data(history_df)
+
+    assert len(dp.add_missing_player_data(complete)) == len(complete)
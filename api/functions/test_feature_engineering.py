@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.reference import get_fixture_difficulty
+from functions.feature_engineering import FixtureDifficultyIndex, add_teammate_features
+
+
+def make_fixtures():
+    # Team 1 has a double gameweek in 2 and team 3 blanks in 3
+    return pd.DataFrame(
+        {
+            "fixture_event": [1, 1, 2, 2, 3, 4, 4, None],
+            "fixture_team_h": [1, 3, 1, 2, 1, 3, 2, 3],
+            "fixture_team_a": [2, 4, 3, 1, 4, 1, 4, 2],
+            "fixture_team_h_difficulty": [2, 3, 4, 5, 2, 3, 4, 5],
+            "fixture_team_a_difficulty": [3, 2, 4, 2, 5, 4, 3, 2],
+        }
+    )
+
+
+def test_next_fixtures_mean_matches_row_wise_lookup():
+    fixtures_df = make_fixtures()
+    rows = pd.DataFrame(
+        [(team, gw) for team in [1, 2, 3, 4, 9] for gw in range(0, 7)],
+        columns=["element_team", "round"],
+    )
+
+    index = FixtureDifficultyIndex(fixtures_df)
+
+    for window in [1, 3, 4]:
+        expected = rows.apply(
+            lambda row: get_fixture_difficulty(row, fixtures_df, window), axis=1
+        )
+        result = index.next_fixtures_mean(
+            rows["element_team"], rows["round"], window=window
+        )
+        np.testing.assert_allclose(result, expected.to_numpy())
+
+
+def test_next_gameweeks_mean_counts_double_gameweeks():
+    index = FixtureDifficultyIndex(make_fixtures())
+
+    result = index.next_gameweeks_mean([1, 3, 4], [2, 3, 5], window=2)
+
+    # Team 1: gw2 (4, 2) and gw3 (2); team 3: blank gw3, gw4 (3); team 4: none
+    np.testing.assert_allclose(result, [8 / 3, 3.0, 3.0])
+
+
+def test_add_teammate_features_uses_each_stat():
+    merged = pd.DataFrame(
+        {
+            "element_team": [1, 1, 1, 2, 1],
+            "round": [1, 1, 1, 1, 2],
+            "goals_scored": [1, 0, 2, 1, 1],
+            "assists": [0, 1, 1, 0, 0],
+            "expected_goals": [0.5, 0.1, 0.9, 0.3, 0.4],
+            "expected_assists": [0.2, 0.6, 0.1, 0.0, 0.3],
+        },
+        index=[10, 11, 12, 13, 14],
+    )
+
+    result = add_teammate_features(merged)
+
+    assert list(result.index) == list(merged.index)
+    assert result["teammate_goals"].tolist() == [2, 3, 1, 0, 0]
+    np.testing.assert_allclose(
+        result["teammate_expected_assists"], [0.7, 0.3, 0.8, 0, 0]
+    )
+    np.testing.assert_allclose(
+        result["team_expected_goals_per_gw"], [1.5, 1.5, 1.5, 0.3, 0.4]
+    )
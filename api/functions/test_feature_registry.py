@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+import functions.feature_registry as fr
+from benchmarks.reference import add_rolling_averages_apply
+
+
+def make_frame():
+    # Unsorted rows; element 7 has a double gameweek in round 2
+    return pd.DataFrame(
+        {
+            "element": [7, 3, 7, 7, 3, 7, 3],
+            "round": [2, 1, 1, 2, 2, 3, 3],
+            "saves": [1, 0, 2, 0, 4, 3, 1],
+            "minutes": [90, 45, 90, 30, 0, 90, 90],
+        }
+    )
+
+
+def test_resolver_computes_only_requested_features_once():
+    resolver = fr.FeatureResolver(fr.default_registry(), make_frame())
+
+    frame = resolver.frame(["saves_rolling_3", "saves_season_total"])
+
+    assert list(frame.columns) == ["saves_rolling_3", "saves_season_total"]
+    # The sort order is shared and nothing is computed for minutes
+    assert resolver.computed == [
+        "__order",
+        "__groups",
+        "saves_rolling_3",
+        "saves_season_total",
+    ]
+
+
+def test_family_members_are_computed_in_one_pass():
+    calls = []
+    shifted_rolling_means = fr.shifted_rolling_means
+
+    def counted(values, groups, windows):
+        calls.append((values.shape[1], windows))
+        return shifted_rolling_means(values, groups, windows)
+
+    family = fr.sorted_family(counted)
+    registry = fr.default_registry()
+    for name in ["saves_rolling_3", "saves_rolling_5", "minutes_rolling_3"]:
+        registry.get(name).family = family
+    resolver = fr.FeatureResolver(registry, make_frame())
+
+    resolver.frame(["saves_rolling_3", "saves_rolling_5", "minutes_rolling_3"])
+
+    # Both metrics and both windows at once
+    assert calls == [(2, [3, 5])]
+
+
+def make_rolling_frame():
+    # Element 7 has a double gameweek in round 2 and a missing value
+    return pd.DataFrame(
+        {
+            "element": [7, 3, 7, 7, 3, 7, 3, 7],
+            "round": [1, 1, 2, 2, 2, 3, 3, 4],
+            "goals_scored": [1, 0, 2, 0, 1, None, 3, 1],
+            "minutes": [90, 45, 90, 30, 0, 90, 90, 60],
+        }
+    )
+
+
+def test_rolling_averages_match_groupby_apply():
+    df = make_rolling_frame()
+    metrics = ["goals_scored", "minutes"]
+    names = [f"{m}_rolling_{w}" for w in [1, 3, 5] for m in metrics]
+
+    expected = add_rolling_averages_apply(df, metrics, windows=[1, 3, 5])
+    result = fr.add_features(df, names)
+
+    pd.testing.assert_frame_equal(result[names], expected[names].reindex(df.index))
+
+
+def test_ewm_and_season_totals_match_pandas():
+    df = make_rolling_frame()
+    metrics = ["goals_scored", "minutes"]
+
+    result = fr.add_features(
+        df, [f"{m}_ewm_3" for m in metrics] + [f"{m}_season_total" for m in metrics]
+    )
+
+    by_element = df.sort_values(["element", "round"]).astype(float).groupby("element")
+    for metric in metrics:
+        expected = by_element[metric].transform(lambda x: x.shift(1).ewm(span=3).mean())
+        pd.testing.assert_series_equal(
+            result[f"{metric}_ewm_3"], expected.reindex(df.index), check_names=False
+        )
+        pd.testing.assert_series_equal(
+            result[f"{metric}_season_total"],
+            by_element[metric].cumsum().reindex(df.index),
+            check_names=False,
+        )
+
+
+def test_dependency_cycle_is_reported():
+    registry = fr.FeatureRegistry()
+    registry.add(fr.Feature("a", ("b",), lambda b: b))
+    registry.add(fr.Feature("b", ("a",), lambda a: a))
+
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        registry.dependencies(["a"])
@@ -0,0 +1,70 @@
+import pytest
+
+import functions.data_processing as dp
+import functions.feature_store as fs
+from benchmarks.synthetic_fpl import element_gameweek_data, generate_season
+
+METRICS = ["minutes", "goals_scored", "assists", "saves", "bonus"]
+
+
+@pytest.fixture
+def season(tmp_path, monkeypatch):
+    # data_processing writes debug files to cwd
+    monkeypatch.chdir(tmp_path)
+    return generate_season(finished_rounds=10, players_per_team=4, n_teams=6)
+
+
+def test_appended_rounds_match_full_rebuild(season, tmp_path):
+    store_dir = str(tmp_path / "store")
+    elements = season["bootstrap-static"]["elements"]
+    fixtures = season["fixtures"]
+    history = element_gameweek_data(season)
+
+    early = [row for row in history if row["round"] <= 4]
+    fs.rebuild(
+        dp.build_dataset(early, elements, fixtures, METRICS),
+        METRICS,
+        finished_rounds=range(1, 5),
+        store_dir=store_dir,
+    )
+
+    appended = fs.append_rounds(
+        history, elements, fixtures, range(1, 11), METRICS, store_dir=store_dir
+    )
+    assert appended == list(range(5, 11))
+
+    rebuilt = dp.build_dataset(history, elements, fixtures, METRICS)
+    report = fs.check_consistency(fs.load_store(store_dir=store_dir), rebuilt)
+
+    assert report["consistent"], report
+    # Nothing left to append
+    assert (
+        fs.append_rounds(
+            history, elements, fixtures, range(1, 11), METRICS, store_dir=store_dir
+        )
+        == []
+    )
+
+
+def test_append_needs_rebuild_for_other_features(season, tmp_path):
+    store_dir = str(tmp_path / "store")
+    history = element_gameweek_data(season)
+    elements = season["bootstrap-static"]["elements"]
+
+    fs.rebuild(
+        dp.build_dataset(history, elements, season["fixtures"], METRICS),
+        METRICS,
+        store_dir=store_dir,
+    )
+
+    assert (
+        fs.append_rounds(
+            history,
+            elements,
+            season["fixtures"],
+            [11],
+            ["minutes"],
+            store_dir=store_dir,
+        )
+        is None
+    )
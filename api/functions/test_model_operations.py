@@ -0,0 +1,348 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import functions.model_operations as mo
+import helpers.model_registry as mr
+import helpers.online_store as om
+import helpers.tuning_cache as tc
+
+
+@pytest.fixture
+def training_frame(tmp_path, monkeypatch):
+    # train_model writes its metrics to metrics/ under cwd
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "metrics").mkdir()
+
+    rng = np.random.default_rng(0)
+    n_rows = 60
+    return pd.DataFrame(
+        {
+            "element_type": rng.integers(1, 5, n_rows),
+            "was_home": rng.integers(0, 2, n_rows).astype(bool),
+            "selected": rng.normal(size=n_rows),
+            "goals_scored": rng.integers(0, 3, n_rows),
+            "saves": rng.integers(0, 6, n_rows),
+        }
+    )
+
+
+def test_train_target_models_fits_each_target_once(training_frame, monkeypatch):
+    trained = []
+    train_model = mo.train_model
+    monkeypatch.setattr(
+        mo,
+        "train_model",
+        lambda *args, **kwargs: trained.append(args[-1])
+        or train_model(*args, **kwargs),
+    )
+    target_columns = {
+        "goals_scored": (["element_type", "was_home"], ["selected"]),
+        "saves": (["was_home"], ["selected"]),
+    }
+
+    models = mo.train_target_models("Linear Regression", training_frame, target_columns)
+
+    assert trained == ["goals_scored", "saves"]
+    assert list(models) == ["goals_scored", "saves"]
+    # Each model is reusable for any number of prediction frames
+    for target, model in models.items():
+        assert len(model.predict(training_frame.head(7))) == 7
+
+
+def test_train_target_models_reuses_registered_models(training_frame, tmp_path):
+    registry = mr.ModelRegistry(cache_dir=str(tmp_path / "models"))
+    target_columns = {"goals_scored": (["element_type"], ["selected"])}
+
+    first = mo.train_target_models(
+        "Decision Tree", training_frame, target_columns, registry=registry
+    )
+    # A cold worker loads the same fitted pipeline from disk
+    cold = mr.ModelRegistry(cache_dir=str(tmp_path / "models"))
+    second = mo.train_target_models(
+        "Decision Tree", training_frame, target_columns, registry=cold
+    )
+
+    assert registry.stats["misses"] == 1 and cold.stats["disk_hits"] == 1
+    np.testing.assert_array_equal(
+        first["goals_scored"].predict(training_frame),
+        second["goals_scored"].predict(training_frame),
+    )
+
+
+def test_train_target_models_in_worker_processes_matches_in_process(training_frame):
+    target_columns = {
+        "goals_scored": (["element_type", "was_home"], ["selected"]),
+        "saves": (["was_home"], ["selected"]),
+    }
+
+    parallel = mo.train_target_models(
+        "Decision Tree", training_frame, target_columns, n_workers=2
+    )
+    # Workers write their metrics to the caller's working directory
+    assert (
+        Path("metrics") / "best_hyperparameters_and_metrics_Decision Tree_saves.json"
+    ).exists()
+
+    sequential = mo.train_target_models(
+        "Decision Tree", training_frame, target_columns, n_workers=1
+    )
+    for target in target_columns:
+        np.testing.assert_array_equal(
+            parallel[target].predict(training_frame),
+            sequential[target].predict(training_frame),
+        )
+
+
+def test_preprocessing_cache_fits_once_per_row_set(training_frame):
+    preprocessing = mo.PreprocessingCache()
+    features = (["element_type", "was_home"], ["selected"])
+
+    for target in ["goals_scored", "saves"]:
+        cached = mo.train_model(
+            "Linear Regression",
+            training_frame,
+            *features,
+            target,
+            preprocessing=preprocessing
+        )
+        uncached = mo.train_model(
+            "Linear Regression", training_frame, *features, target
+        )
+        np.testing.assert_allclose(
+            cached.predict(training_frame), uncached.predict(training_frame)
+        )
+
+    mo.train_model(
+        "Decision Tree",
+        training_frame,
+        *features,
+        "goals_scored",
+        preprocessing=preprocessing
+    )
+
+    # All players and goalkeepers only, whatever the number of targets and candidates
+    assert preprocessing.fits == 2
+
+
+def test_multi_output_fits_each_row_set_once(training_frame, monkeypatch):
+    training_frame["assists"] = training_frame["goals_scored"][::-1].to_numpy()
+    features = (["element_type", "was_home"], ["selected"])
+    target_columns = {
+        target: features for target in ["goals_scored", "saves", "assists"]
+    }
+    trained = []
+    train_model = mo.train_model
+    monkeypatch.setattr(
+        mo,
+        "train_model",
+        lambda *args, **kwargs: trained.append(args[-1])
+        or train_model(*args, **kwargs),
+    )
+
+    multi = mo.train_target_models(
+        "Linear Regression", training_frame, target_columns, multi_output=True
+    )
+    # Goalkeeper targets train on other rows, so they get their own model
+    assert trained == [("goals_scored", "assists"), ("saves",)]
+    assert multi["goals_scored"].model is multi["assists"].model
+    assert Path(
+        "metrics/best_hyperparameters_and_metrics_Linear Regression_assists.json"
+    ).exists()
+
+    # Least squares fits each output independently, so nothing changes
+    single = mo.train_target_models("Linear Regression", training_frame, target_columns)
+    multi_predictions = mo.predict_targets(multi, training_frame)
+    for target, model in single.items():
+        np.testing.assert_allclose(
+            multi_predictions[target], model.predict(training_frame)
+        )
+
+    # Model types without native multi-output support keep one model per target
+    trained.clear()
+    mo.train_target_models(
+        "Support Vector Machine", training_frame, target_columns, multi_output=True
+    )
+    assert trained == ["goals_scored", "saves", "assists"]
+
+
+def test_histogram_gradient_boosting_uses_native_categoricals(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "metrics").mkdir()
+
+    rng = np.random.default_rng(1)
+    n_rows = 1200
+    # More players than the model's 255 categories
+    df = pd.DataFrame(
+        {
+            "element": rng.integers(0, 400, n_rows),
+            "element_type": rng.integers(1, 5, n_rows),
+            "selected": rng.normal(size=n_rows),
+        }
+    )
+    df["goals_scored"] = (df["element_type"] == 4) * 2 + df["selected"] * 0.1
+
+    model = mo.train_model(
+        "Histogram Gradient Boosting",
+        df,
+        ["element", "element_type"],
+        ["selected"],
+        "goals_scored",
+        preprocessing=mo.PreprocessingCache(),
+    )
+
+    regressor = model.named_steps["regressor"]
+    assert regressor.is_categorical_.tolist() == [True, True, False]
+    assert regressor.n_iter_ < regressor.max_iter
+    # Unseen players are treated as missing rather than failing
+    unseen = df.head(3).assign(element=9999)
+    assert np.isfinite(model.predict(unseen)).all()
+
+
+def test_round_splits_validate_on_later_whole_rounds():
+    rounds = np.repeat([1, 2, 3, 4, 5, 6, 7], [3, 2, 4, 3, 2, 3, 1])
+
+    splits = mo.round_splits(rounds, n_splits=3, validation_rounds=2)
+
+    # The last fold trains on every earlier round, as when predicting
+    assert [sorted(set(rounds[validation])) for _, validation in splits] == [
+        [2, 3],
+        [4, 5],
+        [6, 7],
+    ]
+    for train, validation in splits:
+        assert rounds[train].max() < rounds[validation].min()
+        assert set(rounds[train]) == set(range(1, rounds[validation].min()))
+
+    # Too few rounds to validate on whole ones
+    assert len(mo.round_splits(rounds[:5], n_splits=3, validation_rounds=2)) == 3
+
+
+def test_tuning_cache_skips_the_search_until_the_data_grows(
+    training_frame, tmp_path, monkeypatch
+):
+    searches = []
+    tune_hyperparameters = mo.tune_hyperparameters
+    monkeypatch.setattr(
+        mo,
+        "tune_hyperparameters",
+        lambda *args, **kwargs: searches.append(kwargs["rounds"])
+        or tune_hyperparameters(*args, **kwargs),
+    )
+    tuning = tc.TuningCache(cache_dir=str(tmp_path / "tuning"), growth=1.25)
+    df = pd.concat([training_frame] * 4, ignore_index=True)
+    df["round"] = np.repeat(np.arange(1, 9), len(df) // 8)
+    features = (["element_type", "was_home"], ["selected"])
+
+    first = mo.train_model(
+        "Decision Tree", df.head(180), *features, "goals_scored", tuning=tuning
+    )
+    second = mo.train_model(
+        "Decision Tree", df.head(180), *features, "goals_scored", tuning=tuning
+    )
+    mo.train_model("Decision Tree", df, *features, "goals_scored", tuning=tuning)
+
+    assert len(searches) == 2 and tuning.stats["hits"] == 1
+    # The search validates on whole rounds after the ones it trains on
+    assert searches[0] is not None and searches[0][0] == 1
+    assert (
+        first.named_steps["regressor"].get_params()
+        == second.named_steps["regressor"].get_params()
+    )
+
+
+@pytest.fixture
+def rounds_frame(training_frame):
+    df = pd.concat([training_frame] * 3, ignore_index=True)
+    df["round"] = np.repeat(np.arange(1, 7), len(df) // 6)
+    return df
+
+
+def test_online_model_updates_from_new_rounds_only(rounds_frame, tmp_path, monkeypatch):
+    updates = []
+    partial_fit = mo.SGDRegressor.partial_fit
+    monkeypatch.setattr(
+        mo.SGDRegressor,
+        "partial_fit",
+        lambda self, X, y: updates.append(len(y)) or partial_fit(self, X, y),
+    )
+    # A registry too small to keep the online model past another model type
+    registry = mr.ModelRegistry(cache_dir=str(tmp_path / "models"), max_disk_entries=1)
+    online_store = om.OnlineModelStore(cache_dir=str(tmp_path / "online_models"))
+    df = rounds_frame
+    target_columns = {"goals_scored": (["element_type", "was_home"], ["selected"])}
+
+    first = mo.train_target_models(
+        "Online Linear Regression",
+        df[df["round"] <= 5],
+        target_columns,
+        registry=registry,
+        online_store=online_store,
+    )["goals_scored"]
+    before = first.predict(df)
+    mo.train_target_models("Linear Regression", df, target_columns, registry=registry)
+    updates.clear()
+
+    second = mo.train_target_models(
+        "Online Linear Regression",
+        df,
+        target_columns,
+        registry=registry,
+        online_store=online_store,
+    )["goals_scored"]
+
+    # Only round 6 is learnt, once per epoch, by a copy of the round 5 model
+    assert updates == [30] * mo.ONLINE_EPOCHS
+    np.testing.assert_array_equal(first.predict(df), before)
+    assert not np.allclose(second.predict(df), before)
+    assert Path(
+        "metrics/best_hyperparameters_and_metrics_Online Linear Regression_goals_scored.json"
+    ).exists()
+
+
+def test_online_model_is_refitted_when_the_history_changes(
+    rounds_frame, tmp_path, caplog
+):
+    online_store = om.OnlineModelStore(cache_dir=str(tmp_path / "online_models"))
+    df = rounds_frame
+    target_columns = {"goals_scored": (["element_type", "was_home"], ["selected"])}
+    mo.train_target_models(
+        "Online Linear Regression",
+        df[df["round"] <= 5],
+        target_columns,
+        online_store=online_store,
+    )
+
+    rewritten = df.copy()
+    rewritten.loc[rewritten["round"] == 1, "goals_scored"] += 1
+    with caplog.at_level(logging.INFO):
+        mo.train_target_models(
+            "Online Linear Regression",
+            rewritten,
+            target_columns,
+            online_store=online_store,
+        )
+
+    assert "refitting Online Linear Regression on every round" in caplog.text
+    key = om.checkpoint_key(
+        "Online Linear Regression", "goals_scored", *target_columns["goals_scored"]
+    )
+    assert [last_round for last_round, _ in online_store.checkpoints(key)] == [6, 5]
+
+
+def test_tuning_cache_is_shared_with_worker_processes(training_frame, tmp_path):
+    tuning = tc.TuningCache(cache_dir=str(tmp_path / "tuning"))
+    target_columns = {
+        "goals_scored": (["element_type", "was_home"], ["selected"]),
+        "saves": (["was_home"], ["selected"]),
+    }
+
+    mo.train_target_models(
+        "Decision Tree", training_frame, target_columns, n_workers=2, tuning=tuning
+    )
+
+    # The workers stored what they tuned for the next run to reuse
+    assert len(list((tmp_path / "tuning").glob("*.json"))) == 2
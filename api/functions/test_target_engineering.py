@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+import functions.target_engineering as te
+import helpers.data_helpers as dh
+from benchmarks.reference import create_targets_loop
+
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    rows = 60
+    df = pd.DataFrame(
+        {
+            "element": rng.integers(1, 6, rows),
+            "round": rng.integers(1, 12, rows),
+            "goals_scored": rng.integers(0, 3, rows).astype(float),
+            "assists": rng.integers(0, 2, rows),
+            "saves": rng.integers(0, 5, rows),
+            "clean_sheets": rng.integers(0, 2, rows),
+            "bonus": rng.integers(0, 4, rows),
+            "minutes": rng.choice([0, 30, 90], rows),
+        }
+    )
+    df.loc[[3, 17], "goals_scored"] = np.nan
+    return df
+
+
+def test_create_targets_matches_shift_loop():
+    df = make_frame()
+    columns = list(dict.fromkeys(dh.get_targets()))
+
+    for horizon in [1, 3]:
+        result = te.create_targets(df.copy(), horizon)
+        expected = make_frame().assign(
+            **{"minutes_60+": (df["minutes"] >= 60).astype(int)},
+            **{"minutes_1+": (df["minutes"] > 0).astype(int)},
+        )
+        expected = create_targets_loop(expected, columns, horizon)
+
+        pd.testing.assert_frame_equal(result, expected[result.columns])
+
+
+def test_multi_horizon_targets_match_single_horizons():
+    df = make_frame()
+
+    result = te.create_multi_horizon_targets(df, horizons=(1, 3, 5, 8))
+
+    for horizon in (1, 3, 5, 8):
+        single = te.create_targets(df.copy(), horizon)
+        np.testing.assert_array_equal(
+            result[f"target_saves_h{horizon}"], single["target_saves"]
+        )
+
+    complete = te.create_multi_horizon_targets(
+        df, horizons=(1, 3), drop_incomplete=True
+    )
+    # Each player's last 3 rows have incomplete 3-round windows
+    assert len(complete) == len(df) - 3 * df["element"].nunique()
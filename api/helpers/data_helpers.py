@@ -1,6 +1,7 @@
 import json
 import logging
 from typing import List
+import numpy as np
 import pandas as pd
 
 
@@ -60,6 +61,10 @@ def add_rolling_averages(
     """
     Calculate fresh rolling averages for next round based on most recent games from df.
 
+    The last max(windows) rows of every player are taken in one grouped tail,
+    and the means for all windows and metrics are joined onto next_round_df
+    as one block.
+
     Parameters:
     - df: Complete historical DataFrame with all rounds
     - next_round_df: Template DataFrame for next round
@@ -69,28 +74,29 @@ def add_rolling_averages(
     Returns:
     - next_round_df with rolling averages added
     """
-    # Sort the historical data by player and round
-    df = df.sort_values(["element", "round"])
-
-    # For each player in next_round_df
-    for _, row in next_round_df.iterrows():
-        player_id = row["element"]
-
-        # Get this player's historical data
-        player_history = df[df["element"] == player_id]
-
-        # For each window size
-        for window in windows:
-            # Get the last 'window' games (excluding current round if needed)
-            recent_games = player_history.iloc[-window:]
+    recent = (
+        df[["element", "round"] + metrics]
+        .sort_values(["element", "round"])
+        .groupby("element")
+        .tail(max(windows))
+    )
+    # 0 for each player's latest game, 1 for the one before, ...
+    games_ago = recent.groupby("element").cumcount(ascending=False).to_numpy()
+
+    means = pd.concat(
+        [
+            recent[games_ago < window]
+            .groupby("element")[metrics]
+            .mean()
+            .add_suffix(f"_rolling_{window}")
+            for window in windows
+        ],
+        axis=1,
+    )
 
-            # For each metric
-            for metric in metrics:
-                col_name = f"{metric}_rolling_{window}"
-                # Calculate average and assign to next_round_df
-                next_round_df.loc[next_round_df["element"] == player_id, col_name] = (
-                    recent_games[metric].mean()
-                )
+    next_round_df[list(means.columns)] = means.reindex(
+        next_round_df["element"]
+    ).set_axis(next_round_df.index)
 
     return next_round_df
 
@@ -109,13 +115,51 @@ def add_season_totals(
     Returns:
     - Updated next_round_df with season total columns
     """
-    for metric in metrics:
-        next_round_df[f"{metric}_season_total"] = next_round_df["element"].map(
-            df.groupby("element")[metric].sum()
-        )
+    totals = df.groupby("element")[metrics].sum().add_suffix("_season_total")
+
+    next_round_df[list(totals.columns)] = totals.reindex(
+        next_round_df["element"]
+    ).set_axis(next_round_df.index)
+
     return next_round_df
 
 
+def latest_player_state(df: pd.DataFrame) -> pd.DataFrame:
+    """Each player's latest row by round, in order of first appearance in df."""
+    latest = df.sort_values(["element", "round"]).drop_duplicates(
+        "element", keep="last"
+    )
+    return latest.set_index("element").reindex(df["element"].unique()).reset_index()
+
+
+def team_fixture_table(fixtures_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Unpivot fixtures into one row per team and fixture, from that team's side.
+
+    Returns:
+    - DataFrame with 'team', 'opponent_team', 'was_home' and 'fixture_order'
+      (the fixture's position in fixtures_df)
+    """
+    fixture_order = np.arange(len(fixtures_df))
+    sides = [
+        pd.DataFrame(
+            {
+                "team": fixtures_df[team].to_numpy(),
+                "opponent_team": fixtures_df[opponent].to_numpy(),
+                "was_home": was_home,
+                "fixture_order": fixture_order,
+            }
+        )
+        for team, opponent, was_home in [
+            ("team_h", "team_a", True),
+            ("team_a", "team_h", False),
+        ]
+    ]
+    return pd.concat(sides, ignore_index=True).sort_values(
+        "fixture_order", kind="stable"
+    )
+
+
 def create_next_round_df(
     df: pd.DataFrame,
     fixtures_df: pd.DataFrame,
@@ -128,6 +172,10 @@ def create_next_round_df(
     Create a DataFrame for the next round of fixtures with null or zero values for all statistics,
     and use upcoming fixtures (from fixtures_df) to populate opponent and home/away status.
 
+    The rows are built as a join of each player's latest state with the
+    next round's fixtures unpivoted to one row per team: a team with a double
+    gameweek gives its players two rows and a team with a blank gameweek none.
+
     Parameters:
     - df: The original DataFrame containing player match data
     - categorical_features: List of categorical features like element, team, was_home, element_type
@@ -142,79 +190,43 @@ def create_next_round_df(
     logging.info(f"All event values: {fixtures_df['event'].unique().tolist()}")
     logging.info(f"Event column type: {fixtures_df['event'].dtype}")
 
-    # Get the last round from the current DataFrame
-    # Get the last round from the current DataFrame
-    last_round = df["round"].max()
+    # Determine the next round from the last round in the current DataFrame
+    next_round = df["round"].max() + 1
+
+    players = latest_player_state(df)[
+        ["element", "team", "element_type", "web_name", "photo", "value"]
+    ]
+    players["player_order"] = np.arange(len(players))
 
-    logging.info(
-        "LAST ROUNUD ###########################################################################"
+    team_fixtures = team_fixture_table(fixtures_df[fixtures_df["event"] == next_round])
+
+    # Inner join: players whose team has no fixture this round (blank GW) drop out
+    rows = players.merge(team_fixtures, on="team", how="inner").sort_values(
+        ["player_order", "fixture_order"], kind="stable"
     )
 
-    # Determine the next round
-    next_round = last_round + 1
-
-    # Create a list to store new rows for the next round
-    new_rows = []
-
-    # Iterate over each element (player) in the current dataset
-    for player in df["element"].unique():
-        # Get the player's data for the next round
-        player_data = df[df["element"] == player].iloc[
-            0
-        ]  # Take the first row for the player
-        player_team = player_data["team"]
-
-        # Get all upcoming fixtures for this team in the next round
-        team_fixtures = fixtures_df[
-            (fixtures_df["event"] == next_round)
-            & (
-                (fixtures_df["team_h"] == player_team)
-                | (fixtures_df["team_a"] == player_team)
-            )
-        ]
+    # Same columns, in the same order, as the rows the template used to be built from
+    columns = {col: None for col in categorical_features}
+    columns.update({col: 0 for col in numerical_features})
+    columns.update(
+        {
+            col: rows[col].to_numpy()
+            for col in [
+                "element",
+                "team",
+                "element_type",
+                "web_name",
+                "photo",
+                "value",
+            ]
+        }
+    )
+    columns["round"] = next_round
+    columns["opponent_team"] = rows["opponent_team"].to_numpy()
+    columns["was_home"] = rows["was_home"].to_numpy()
+    columns.update({feat: 0 for feat in engineering_features})
 
-        # Skip players whose team has no fixtures in this round (blank GW)
-        if team_fixtures.empty:
-            continue
-
-        # For each fixture this team has in the next round (handles single and double GWs)
-        for _, fixture in team_fixtures.iterrows():
-            # Prepare the row for the next round with the necessary columns
-            new_row = {
-                col: None for col in categorical_features
-            }  # Set categorical features to None
-            new_row.update(
-                {col: 0 for col in numerical_features}
-            )  # Set numerical features to 0
-
-            # Add player-specific information (element, team, etc.)
-            new_row["element"] = player_data["element"]
-            new_row["team"] = player_team
-            new_row["element_type"] = player_data["element_type"]
-            new_row["web_name"] = player_data["web_name"]
-            new_row["photo"] = player_data["photo"]
-            new_row["value"] = player_data["value"]
-
-            # Set the round value for the next round
-            new_row["round"] = next_round
-
-            # Set opponent and home/away status
-            new_row["opponent_team"] = (
-                fixture["team_a"]
-                if fixture["team_h"] == player_team
-                else fixture["team_h"]
-            )
-            new_row["was_home"] = fixture["team_h"] == player_team
-
-            # Add any engineering features (set to 0 or appropriate default)
-            for feat in engineering_features:
-                new_row[feat] = 0
-
-            # Add this new row to the list
-            new_rows.append(new_row)
-
-    # Create a DataFrame from the new rows
-    next_round_df = pd.DataFrame(new_rows)
+    next_round_df = pd.DataFrame(columns, index=pd.RangeIndex(len(rows)))
 
     next_round_df = add_rolling_averages(
         df=df,
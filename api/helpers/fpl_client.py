@@ -0,0 +1,149 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FplApiError(Exception):
+    """Raised when the FPL API cannot return a usable response."""
+
+
+class FplClient:
+    """
+    Reusable HTTP client for the FPL API.
+
+    Keeps a single keep-alive session so repeated calls reuse TCP/TLS
+    connections, applies per-request timeouts and retries rate-limited or
+    failed requests with jittered exponential backoff.
+
+    Parameters:
+    - pool_size: number of connections kept open per host
+    - timeout: (connect, read) timeout in seconds
+    - max_retries: retries after the first attempt
+    - backoff_factor: base delay in seconds, doubled on every retry
+    - max_backoff: upper bound on any single delay in seconds
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 16,
+        timeout: tuple = (5, 30),
+        max_retries: int = 4,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "User-Agent": "fplhelper-api",
+            }
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt, honouring Retry-After when given."""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+
+        # Full jitter: uniform between 0 and the exponential ceiling
+        ceiling = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def get(self, url: str, headers: Optional[dict] = None) -> requests.Response:
+        """GET a URL, retrying on connection errors, 429 and 5xx responses."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                if attempt == self.max_retries:
+                    raise FplApiError(f"Request to {url} failed: {e}") from e
+
+                delay = self._backoff(attempt)
+                logging.warning(
+                    f"Request to {url} failed ({e}), retrying in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            if (
+                response.status_code in RETRY_STATUS_CODES
+                and attempt < self.max_retries
+            ):
+                retry_after = self._parse_retry_after(
+                    response.headers.get("Retry-After")
+                )
+                delay = self._backoff(attempt, retry_after)
+                logging.warning(
+                    f"{url} returned {response.status_code}, retrying in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def get_json(self, url: str) -> dict:
+        """GET a URL and decode the JSON body, raising FplApiError on failure."""
+        response = self.get(url)
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise FplApiError(f"HTTP error occurred: {e}") from e
+
+        try:
+            return response.json()
+        except ValueError as e:
+            raise FplApiError(f"Invalid JSON returned by {url}") from e
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> FplClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = FplClient()
+    return _client
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from helpers.fpl_client import FplApiError, FplClient
+
+DEFAULT_CACHE_DIR = os.environ.get("FPL_CACHE_DIR", "data/http_cache")
+DEFAULT_TTL = float(os.environ.get("FPL_CACHE_TTL", 1800))
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache for slow-changing FPL endpoints.
+
+    Bodies are stored on disk next to their ETag/Last-Modified validators and
+    kept decoded in memory. Within the TTL a cached body is returned without
+    touching the network; after that the entry is revalidated with a
+    conditional GET, so an unchanged payload costs a 304 instead of a full
+    download. Returned payloads are shared between callers and must not be
+    mutated.
+
+    Parameters:
+    - cache_dir: directory the bodies and validators are written to
+    - ttl: seconds a response is served without revalidation
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str) -> tuple:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".meta.json"
+
+    def _load(self, url: str) -> Optional[dict]:
+        """Return the cache entry for a URL from memory or disk."""
+        entry = self._memory.get(url)
+        if entry is not None:
+            return entry
+
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r") as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, "r") as body_file:
+                body = json.load(body_file)
+        except (OSError, ValueError):
+            return None
+
+        entry = {**meta, "body": body}
+        self._memory[url] = entry
+        return entry
+
+    def _write(self, path: str, data):
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as tmp_file:
+            json.dump(data, tmp_file)
+        os.replace(tmp_path, path)
+
+    def _store(self, url: str, entry: dict, body_changed: bool = True):
+        """
+        Write an entry, rewriting the body only if it changed: a revalidated
+        entry only updates its validators and fetch time.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+
+        if body_changed:
+            self._write(body_path, entry["body"])
+        self._write(meta_path, {k: v for k, v in entry.items() if k != "body"})
+
+        self._memory[url] = entry
+
+    def get_json(
+        self, client: FplClient, url: str, max_age: Optional[float] = None
+    ) -> dict:
+        """
+        Return the JSON body for a URL, using the cache where possible.
+
+        The lock only covers the cache reads and writes, so fetches of
+        different URLs run concurrently. When the network fails, the stale
+        body is served instead, unless max_age is 0.
+
+        Parameters:
+        - client: client used for network requests
+        - url: URL to fetch
+        - max_age: override for the TTL, 0 forces revalidation and raises
+          FplApiError rather than serve a stale body
+
+        Returns:
+        - Decoded JSON body
+        """
+        max_age = self.ttl if max_age is None else max_age
+
+        with self._lock:
+            entry = self._load(url)
+
+        if entry is not None and time.time() - entry["fetched_at"] < max_age:
+            return entry["body"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = client.get(url, headers=headers)
+
+            if response.status_code == 304 and entry is not None:
+                # Entries are shared, so the refreshed one is a copy
+                entry = {**entry, "fetched_at": time.time()}
+                with self._lock:
+                    self._store(url, entry, body_changed=False)
+                return entry["body"]
+
+            response.raise_for_status()
+            body = response.json()
+        except Exception as e:
+            if entry is None or max_age == 0:
+                raise FplApiError(f"Could not fetch {url}: {e}") from e
+
+            logging.warning(f"Serving stale cache for {url}: {e}")
+            return entry["body"]
+
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "body": body,
+        }
+        with self._lock:
+            self._store(url, entry)
+        return body
+
+
+_cache = None
+
+
+def get_cache() -> HttpCache:
+    """Return the shared cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
@@ -0,0 +1,183 @@
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+READ_SIZE = 1 << 16
+
+
+def iter_json_array(path: str) -> Iterator[dict]:
+    """
+    Yield the items of a top-level JSON array without loading the whole file.
+
+    Uses ijson when it is installed, otherwise decodes one item at a time from
+    a rolling buffer with json.JSONDecoder.raw_decode.
+    """
+    if ijson is not None:
+        with open(path, "rb") as f:
+            # use_float keeps numbers as float instead of Decimal
+            yield from ijson.items(f, "item", use_float=True)
+        return
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    with open(path, "r") as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            buffer += chunk
+            pos = 0
+
+            while True:
+                # Skip whitespace, the opening bracket and separators
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+
+                if not started and pos < len(buffer):
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{path} does not contain a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+
+                if pos < len(buffer) and buffer[pos] == "]":
+                    return
+
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Item is incomplete, read more of the file
+                    break
+
+                # An item is only complete once a separator follows it, otherwise
+                # a number such as "-3.5" may have been cut short at "-3."
+                next_pos = end
+                while next_pos < len(buffer) and buffer[next_pos] in " \t\r\n":
+                    next_pos += 1
+
+                if next_pos == len(buffer) or buffer[next_pos] not in ",]":
+                    if chunk:
+                        break
+                    raise ValueError(f"Malformed JSON array in {path}")
+
+                yield item
+                pos = end
+
+            buffer = buffer[pos:]
+
+            if not chunk:
+                if buffer.strip():
+                    raise ValueError(f"Unexpected end of JSON array in {path}")
+                return
+
+
+def iter_ndjson(path: str) -> Iterator[dict]:
+    """Yield one record per non-empty line of a newline-delimited JSON file."""
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    """Stream records from an .ndjson file or a .json array file."""
+    if path.endswith(".ndjson"):
+        return iter_ndjson(path)
+    return iter_json_array(path)
+
+
+def resolve_records_path(base_path: str) -> Optional[str]:
+    """Return '<base_path>.ndjson' if it exists, else '<base_path>.json', else None."""
+    for extension in (".ndjson", ".json"):
+        if os.path.exists(base_path + extension):
+            return base_path + extension
+    return None
+
+
+def save_to_ndjson(records: Iterable[dict], file_name: str):
+    """
+    Write records as newline-delimited JSON, replacing file_name atomically.
+
+    The records go to a temporary file that only replaces file_name once
+    fully written, so readers never see a truncated file; errors are raised
+    and leave the previous file in place.
+    """
+    tmp_name = f"{file_name}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_name, "w") as f:
+            for record in records:
+                f.write(json.dumps(record))
+                f.write("\n")
+        os.replace(tmp_name, file_name)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    print(f"Data saved to {file_name} successfully")
+
+
+def _column_chunk(values: list, dtype) -> np.ndarray:
+    if dtype is None:
+        return pd.Series(values).to_numpy()
+    return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=dtype)
+
+
+def read_records_frame(
+    path: str, dtypes: Optional[Dict[str, str]] = None, chunk_size: int = 2000
+) -> pd.DataFrame:
+    """
+    Build a DataFrame from a JSON/NDJSON record file in bounded memory.
+
+    Records are parsed incrementally and converted chunk by chunk into typed
+    per-column arrays, so the full list of dicts is never held in memory.
+
+    Parameters:
+    - path: .json array or .ndjson file
+    - dtypes: numeric dtype per column, e.g. {"expected_goals": "float64"};
+      other columns keep the dtype pandas infers
+    - chunk_size: records converted at a time
+
+    Returns:
+    - DataFrame with one row per record
+    """
+    dtypes = dtypes or {}
+    buffers = {}
+    n_rows = 0
+    records = iter_records(path)
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        for record in chunk:
+            for col in record:
+                if col not in buffers:
+                    # Column first seen mid-file: pad the earlier rows with NaN
+                    buffers[col] = [np.full(n_rows, np.nan)] if n_rows else []
+
+        for col, pieces in buffers.items():
+            values = [record.get(col) for record in chunk]
+            pieces.append(_column_chunk(values, dtypes.get(col)))
+
+        n_rows += len(chunk)
+        # Release this chunk's dicts before the next one is parsed
+        del chunk
+
+    columns = {}
+    for col in list(buffers):
+        pieces = buffers.pop(col)
+        columns[col] = pd.concat(
+            [pd.Series(piece) for piece in pieces], ignore_index=True
+        )
+
+    return pd.DataFrame(columns)
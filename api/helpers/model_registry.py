@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List
+
+import joblib
+import pandas as pd
+import sklearn
+
+DEFAULT_MODEL_DIR = os.environ.get("FPL_MODEL_DIR", "data/models")
+DEFAULT_MAX_DISK_ENTRIES = int(os.environ.get("FPL_MODEL_CACHE_SIZE", 96))
+DEFAULT_MAX_MEMORY_ENTRIES = int(os.environ.get("FPL_MODEL_MEMORY_SIZE", 24))
+
+# Bump when a change to training makes previously stored models stale
+REGISTRY_VERSION = 3
+
+
+def column_digests(df: pd.DataFrame, columns: Iterable[str]) -> Dict[str, str]:
+    """Content hash of each column: its values in row order and its dtype."""
+    digests = {}
+    for column in columns:
+        values = pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+        digest = hashlib.sha256(values.tobytes())
+        digest.update(f"{column}:{df[column].dtype}".encode())
+        digests[column] = digest.hexdigest()
+    return digests
+
+
+def model_key(
+    digests: Dict[str, str],
+    model_type: str,
+    target: str,
+    categorical_features: List[str],
+    numerical_features: List[str],
+) -> str:
+    """Registry key of a model trained on the columns the digests describe."""
+    spec = {
+        "version": REGISTRY_VERSION,
+        "sklearn": sklearn.__version__,
+        "model_type": model_type,
+        "target": target if isinstance(target, str) else list(target),
+        "categorical_features": list(categorical_features),
+        "numerical_features": list(numerical_features),
+        "columns": dict(sorted(digests.items())),
+    }
+    return hashlib.sha256(json.dumps(spec).encode()).hexdigest()
+
+
+def data_key(
+    model_type: str,
+    df: pd.DataFrame,
+    categorical_features: List[str],
+    numerical_features: List[str],
+    target: str,
+    digests: Dict[str, str] = None,
+) -> str:
+    """
+    Key of a model trained on df with these settings.
+
+    Parameters:
+    - target: target name, or a list or tuple of targets of a multi-output model
+    - digests: precomputed column_digests of df, to share between targets
+    """
+    targets = [target] if isinstance(target, str) else list(target)
+    # element_type and round are hashed too, as train_model filters
+    # goalkeeper targets on one and orders its tuning folds by the other
+    columns = list(
+        dict.fromkeys(
+            categorical_features
+            + numerical_features
+            + targets
+            + [column for column in ["element_type", "round"] if column in df]
+        )
+    )
+    if digests is None:
+        digests = column_digests(df, columns)
+    return model_key(
+        {column: digests[column] for column in columns},
+        model_type,
+        target,
+        categorical_features,
+        numerical_features,
+    )
+
+
+class ModelRegistry:
+    """
+    Fitted model pipelines, keyed by the content of their training data.
+
+    A key covers the model type, target, feature lists and a hash of every
+    training column, so a model is reused exactly when it would be retrained
+    from identical inputs. Models are serialised with joblib and the least
+    recently used files are evicted once the directory holds more than
+    max_disk_entries; the most recent max_memory_entries are also kept
+    loaded, so repeat requests in a warm worker skip the disk as well.
+
+    Parameters:
+    - cache_dir: directory the model files are written to
+    - max_disk_entries: model files kept on disk
+    - max_memory_entries: models kept loaded in memory
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_MODEL_DIR,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+        max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.max_memory_entries = max_memory_entries
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.joblib")
+
+    def _remember(self, key: str, model):
+        self._memory[key] = model
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def load(self, key: str):
+        """Return the model stored under a key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+
+            path = self._path(key)
+            try:
+                model = joblib.load(path)
+                # The modification time doubles as the last access time for eviction
+                os.utime(path)
+            except FileNotFoundError:
+                self.stats["misses"] += 1
+                return None
+            except Exception as e:
+                logging.warning(f"Discarding unreadable model {path}: {e}")
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["disk_hits"] += 1
+            self._remember(key, model)
+            return model
+
+    def store(self, key: str, model):
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+
+            # Write to a temporary file first so readers never load a partial model
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, path)
+
+            self._remember(key, model)
+            self._evict()
+
+    def _evict(self):
+        paths = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".joblib")
+        ]
+        if len(paths) <= self.max_disk_entries:
+            return
+
+        paths.sort(key=os.path.getmtime)
+        for path in paths[: len(paths) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def key_for(
+        self,
+        model_type: str,
+        df: pd.DataFrame,
+        categorical_features: List[str],
+        numerical_features: List[str],
+        target: str,
+        digests: Dict[str, str] = None,
+    ) -> str:
+        """Registry key of a model trained on df with these settings, see data_key."""
+        return data_key(
+            model_type, df, categorical_features, numerical_features, target, digests
+        )
+
+    def get_or_train(
+        self,
+        train: Callable,
+        model_type: str,
+        df: pd.DataFrame,
+        categorical_features: List[str],
+        numerical_features: List[str],
+        target: str,
+        digests: Dict[str, str] = None,
+    ):
+        """
+        Return the registered model for these inputs, training and storing it if needed.
+
+        Parameters:
+        - train: called as train(model_type, df, categorical, numerical, target)
+        - digests: precomputed column_digests of df, to share between targets
+
+        Returns:
+        - Fitted model
+        """
+        key = self.key_for(
+            model_type, df, categorical_features, numerical_features, target, digests
+        )
+
+        model = self.load(key)
+        if model is None:
+            model = train(
+                model_type, df, categorical_features, numerical_features, target
+            )
+            self.store(key, model)
+
+        return model
+
+
+_registry = None
+
+
+def get_registry() -> ModelRegistry:
+    """Return the shared registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
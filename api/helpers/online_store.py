@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import List, Tuple
+
+import joblib
+import sklearn
+
+DEFAULT_ONLINE_MODEL_DIR = os.environ.get("FPL_ONLINE_MODEL_DIR", "data/online_models")
+DEFAULT_MAX_CHECKPOINTS = int(os.environ.get("FPL_ONLINE_CHECKPOINTS", 6))
+
+# Bump when a change to online training makes previous checkpoints stale
+ONLINE_STORE_VERSION = 1
+
+
+def checkpoint_key(
+    model_type: str,
+    target,
+    categorical_features: List[str],
+    numerical_features: List[str],
+) -> str:
+    """Key of the online models of a model type, target and feature set."""
+    spec = {
+        "version": ONLINE_STORE_VERSION,
+        "sklearn": sklearn.__version__,
+        "model_type": model_type,
+        "target": target if isinstance(target, str) else list(target),
+        "categorical_features": list(categorical_features),
+        "numerical_features": list(numerical_features),
+    }
+    return hashlib.sha256(json.dumps(spec).encode()).hexdigest()
+
+
+class OnlineModelStore:
+    """
+    Checkpoints of the online models, updated round by round.
+
+    Each model type, target and feature set has a directory of its own, out
+    of reach of the ModelRegistry eviction, holding its latest checkpoints.
+    A checkpoint records the last round the model was trained on and the
+    model_registry.data_key of the rows up to that round, so a model is only
+    updated with rows that extend the data it has learnt. Only the most
+    recently used max_checkpoints per directory are kept, which is enough to
+    survive refits on predicted rounds that the next real round discards.
+
+    Parameters:
+    - cache_dir: directory the checkpoint directories are written to
+    - max_checkpoints: checkpoints kept per model type, target and feature set
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_ONLINE_MODEL_DIR,
+        max_checkpoints: int = DEFAULT_MAX_CHECKPOINTS,
+    ):
+        self.cache_dir = cache_dir
+        self.max_checkpoints = max_checkpoints
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, last_round: int, data_key: str) -> str:
+        return os.path.join(self.cache_dir, key, f"{last_round}_{data_key}.joblib")
+
+    def checkpoints(self, key: str) -> List[Tuple[int, str]]:
+        """
+        The stored (last round, data key) pairs of a key, latest round first.
+        """
+        try:
+            names = os.listdir(os.path.join(self.cache_dir, key))
+        except FileNotFoundError:
+            return []
+
+        checkpoints = []
+        for name in names:
+            if name.endswith(".joblib"):
+                last_round, data_key = name[: -len(".joblib")].split("_", 1)
+                checkpoints.append((int(last_round), data_key))
+        return sorted(checkpoints, reverse=True)
+
+    def load(self, key: str, last_round: int, data_key: str):
+        """Return the model of a checkpoint, or None."""
+        with self._lock:
+            path = self._path(key, last_round, data_key)
+            try:
+                model = joblib.load(path)
+                # The modification time doubles as the last use for pruning
+                os.utime(path)
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logging.warning(f"Discarding unreadable online model {path}: {e}")
+                return None
+            return model
+
+    def store(self, key: str, last_round: int, data_key: str, model):
+        with self._lock:
+            path = self._path(key, last_round, data_key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Write to a temporary file first so readers never load a partial model
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, path)
+
+            self._prune(os.path.dirname(path))
+
+    def _prune(self, key_dir: str):
+        paths = [
+            os.path.join(key_dir, name)
+            for name in os.listdir(key_dir)
+            if name.endswith(".joblib")
+        ]
+        if len(paths) <= self.max_checkpoints:
+            return
+
+        paths.sort(key=os.path.getmtime)
+        for path in paths[: len(paths) - self.max_checkpoints]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+_online_store = None
+
+
+def get_online_store() -> OnlineModelStore:
+    """Return the shared online model store, creating it on first use."""
+    global _online_store
+    if _online_store is None:
+        _online_store = OnlineModelStore()
+    return _online_store
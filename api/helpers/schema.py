@@ -0,0 +1,140 @@
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+# Compact dtypes for the merged player-fixture frame. Integer dtypes are only
+# applied when a column is whole-numbered and fits, so the same schema can be
+# used on frames holding predictions (fractional goals, points, ...).
+PLAYER_FIXTURE_SCHEMA = {
+    # IDs
+    "element": "int16",
+    "team": "int8",
+    "opponent_team": "int8",
+    "team_h": "int8",
+    "team_a": "int8",
+    "element_type": "int8",
+    "fixture": "int16",
+    "round": "int8",
+    "event": "int8",
+    "region": "int16",
+    "code": "int32",
+    # Names and other repeated strings
+    "web_name": "category",
+    "first_name": "category",
+    "second_name": "category",
+    "photo": "category",
+    # Per-match counts
+    "total_points": "int16",
+    "minutes": "int16",
+    "goals_scored": "int8",
+    "assists": "int8",
+    "clean_sheets": "int8",
+    "goals_conceded": "int8",
+    "own_goals": "int8",
+    "penalties_saved": "int8",
+    "penalties_missed": "int8",
+    "yellow_cards": "int8",
+    "red_cards": "int8",
+    "saves": "int8",
+    "bonus": "int8",
+    "bps": "int16",
+    "starts": "int8",
+    "team_h_score": "int8",
+    "team_a_score": "int8",
+    "mng_win": "int8",
+    "mng_draw": "int8",
+    "mng_loss": "int8",
+    "mng_underdog_win": "int8",
+    "mng_underdog_draw": "int8",
+    "mng_clean_sheets": "int8",
+    "mng_goals_scored": "int8",
+    # Prices and ownership
+    "value": "int16",
+    "selected": "int32",
+    "transfers_balance": "int32",
+    "transfers_in": "int32",
+    "transfers_out": "int32",
+    # Rates
+    "influence": "float32",
+    "creativity": "float32",
+    "threat": "float32",
+    "ict_index": "float32",
+    "expected_goals": "float32",
+    "expected_assists": "float32",
+    "expected_goal_involvements": "float32",
+    "expected_goals_conceded": "float32",
+}
+
+# Derived feature columns stored as float32
+FLOAT32_PATTERN = re.compile(r".+_(rolling_\d+|ewm_\d+|season_total)$")
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def _fits_integer(series: pd.Series, dtype: str) -> bool:
+    if not pd.api.types.is_numeric_dtype(series) or series.isna().any():
+        return False
+
+    if pd.api.types.is_bool_dtype(series):
+        return False
+
+    info = np.iinfo(dtype)
+    values = series.to_numpy()
+    if not np.array_equal(values, np.round(values)):
+        return False
+
+    return values.size == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_frame(df: pd.DataFrame, schema: dict = None) -> pd.DataFrame:
+    """
+    Convert a player-fixture frame to the compact schema.
+
+    Columns that do not fit their schema dtype (missing values, fractional or
+    out-of-range numbers, mixed objects) are left unchanged.
+
+    Parameters:
+    - df: frame to convert
+    - schema: column -> dtype, defaults to PLAYER_FIXTURE_SCHEMA
+
+    Returns:
+    - A new frame using the compact dtypes
+    """
+    schema = PLAYER_FIXTURE_SCHEMA if schema is None else schema
+    conversions = {}
+
+    for col in df.columns:
+        series = df[col]
+        dtype = schema.get(col)
+
+        if dtype is None and FLOAT32_PATTERN.match(col):
+            dtype = "float32"
+
+        if dtype is None or series.dtype == dtype:
+            continue
+
+        if dtype == "category":
+            if series.dtype == object and series.dropna().map(type).eq(str).all():
+                conversions[col] = "category"
+        elif dtype == "float32":
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(
+                series
+            ):
+                conversions[col] = "float32"
+        elif _fits_integer(series, dtype):
+            conversions[col] = dtype
+
+    return df.astype(conversions) if conversions else df
+
+
+def log_memory_report(label: str, before: pd.DataFrame, after: pd.DataFrame):
+    before_mb = memory_usage_mb(before)
+    after_mb = memory_usage_mb(after)
+    logging.info(
+        f"{label} memory: {before_mb:.1f} MB -> {after_mb:.1f} MB "
+        f"({before_mb / max(after_mb, 1e-9):.1f}x smaller)"
+    )
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+import helpers.schema as sc
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+DATA_DIR = "data"
+
+# "parquet" or "json"; parquet needs pyarrow and falls back to json without it
+STORAGE_FORMAT = os.environ.get("FPL_STORAGE_FORMAT", "parquet")
+
+# Rows per Parquet row group. Frames are sorted by round before writing, so a
+# group spans only a few rounds and round filters can skip most of the file.
+ROW_GROUP_SIZE = 2048
+
+
+def use_parquet() -> bool:
+    if STORAGE_FORMAT != "parquet":
+        return False
+
+    if pq is None:
+        logging.warning("pyarrow is not installed, storing frames as JSON")
+        return False
+
+    return True
+
+
+def frame_path(name: str, fmt: str, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, f"{name}.{fmt}")
+
+
+def _to_arrow_table(df: pd.DataFrame):
+    """Convert a frame to Arrow, stringifying object columns with mixed types."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].dropna()
+        if values.map(type).nunique() > 1:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def save_frame(df: pd.DataFrame, name: str, data_dir: str = DATA_DIR) -> str:
+    """
+    Save a DataFrame artifact under data_dir.
+
+    Parameters:
+    - df: frame to save
+    - name: artifact name without extension, e.g. 'horizon_predictions'
+    - data_dir: directory to write to
+
+    Returns:
+    - Path of the written file
+    """
+    if not use_parquet():
+        path = frame_path(name, "json", data_dir)
+        df.to_json(path, orient="records", indent=2)
+        return path
+
+    path = frame_path(name, "parquet", data_dir)
+    sort_cols = [col for col in ("round", "element") if col in df.columns]
+    if sort_cols:
+        df = df.sort_values(sort_cols, kind="stable")
+
+    pq.write_table(_to_arrow_table(df), path, row_group_size=ROW_GROUP_SIZE)
+    return path
+
+
+def _filter_rows(
+    df: pd.DataFrame,
+    rounds: Optional[Iterable[int]],
+    elements: Optional[Iterable[int]],
+) -> pd.DataFrame:
+    if rounds is not None:
+        df = df[df["round"].isin(list(rounds))]
+    if elements is not None:
+        df = df[df["element"].isin(list(elements))]
+    return df.reset_index(drop=True)
+
+
+def load_frame(
+    name: str,
+    columns: Optional[List[str]] = None,
+    rounds: Optional[Iterable[int]] = None,
+    elements: Optional[Iterable[int]] = None,
+    data_dir: str = DATA_DIR,
+    compact: bool = True,
+) -> pd.DataFrame:
+    """
+    Load a DataFrame artifact, reading only the requested columns and rows.
+
+    With the Parquet backend, columns are projected and row groups whose
+    round/element statistics fall outside the filters are never read. JSON
+    artifacts (including ones written before the Parquet backend existed) are
+    parsed in full and filtered afterwards.
+
+    Parameters:
+    - name: artifact name without extension
+    - columns: columns to load, all columns if None
+    - rounds: only load rows with these rounds
+    - elements: only load rows with these elements
+    - compact: convert to the compact player-fixture schema (helpers.schema)
+
+    Returns:
+    - The loaded DataFrame
+    """
+    parquet_path = frame_path(name, "parquet", data_dir)
+
+    if use_parquet() and os.path.exists(parquet_path):
+        filters = []
+        if rounds is not None:
+            filters.append(("round", "in", list(rounds)))
+        if elements is not None:
+            filters.append(("element", "in", list(elements)))
+
+        if columns is not None:
+            available = set(pq.read_schema(parquet_path).names)
+            columns = [col for col in columns if col in available]
+
+        table = pq.read_table(parquet_path, columns=columns, filters=filters or None)
+        df = table.to_pandas()
+        if compact:
+            compact_df = sc.compact_frame(df)
+            sc.log_memory_report(name, df, compact_df)
+            df = compact_df
+        return df
+
+    with open(frame_path(name, "json", data_dir), "r") as json_file:
+        df = pd.DataFrame(json.load(json_file))
+
+    # Filter before projecting so the filter columns need not be requested
+    df = _filter_rows(df, rounds, elements)
+
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+
+    if compact:
+        compact_df = sc.compact_frame(df)
+        sc.log_memory_report(name, df, compact_df)
+        df = compact_df
+
+    return df
@@ -1,6 +1,15 @@
+import numpy as np
 import pandas as pd
 
+from benchmarks.reference import (
+    add_next_round_rolling_averages_loop,
+    add_next_round_season_totals_loop,
+    create_next_round_df_loop,
+)
 from helpers.data_helpers import (
+    add_rolling_averages,
+    add_season_totals,
+    create_next_round_df,
     get_current_gameweek,
     get_next_fixtures_for_player,
     get_targets,
@@ -37,3 +46,88 @@ def test_get_current_gameweek():
         ]
     }
     assert get_current_gameweek(bootstrap_data_no_current) is None
+
+
+def make_history():
+    # Element 3's price rises in round 2; team 30 blanks in round 3
+    return pd.DataFrame(
+        {
+            "element": [5, 3, 9, 5, 3, 9],
+            "round": [1, 1, 1, 2, 2, 2],
+            "team": [10, 20, 30, 10, 20, 30],
+            "element_type": [2, 3, 4, 2, 3, 4],
+            "web_name": ["A", "B", "C", "A", "B", "C"],
+            "photo": ["a.jpg", "b.jpg", "c.jpg", "a.jpg", "b.jpg", "c.jpg"],
+            "value": [50, 60, 70, 50, 65, 70],
+            "was_home": [True, False, True, False, True, False],
+            "opponent_team": [20, 10, 40, 20, 10, 40],
+            "goals_scored": [1, 0, 2, 0, 1, 1],
+            "minutes": [90, 45, 90, 60, 90, 0],
+        }
+    )
+
+
+def test_create_next_round_df_matches_loop(tmp_path, monkeypatch):
+    # create_next_round_df writes next_round_df.json to cwd
+    monkeypatch.chdir(tmp_path)
+
+    df = make_history()
+    # Team 10 has a double gameweek in round 3
+    fixtures_df = pd.DataFrame(
+        {
+            "event": [3, 3, 3, 4],
+            "team_h": [10, 20, 50, 30],
+            "team_a": [40, 10, 60, 10],
+        }
+    )
+    args = (
+        fixtures_df,
+        ["element", "team", "was_home", "element_type"],
+        ["goals_scored_rolling_3", "minutes_season_total"],
+        ["goals_scored", "minutes"],
+        2,
+    )
+
+    expected = create_next_round_df_loop(df, *args)
+    result = create_next_round_df(df, *args)
+
+    assert result["element"].tolist() == [5, 5, 3]
+    assert result["was_home"].tolist() == [True, False, True]
+    # Latest price, where the loop took the first row's
+    assert result["value"].tolist() == [50, 50, 65]
+    pd.testing.assert_frame_equal(
+        result.drop(columns="value"),
+        expected.drop(columns="value"),
+        check_dtype=False,
+    )
+
+
+def test_next_round_features_match_loops():
+    # Unsorted, with a missing value and a player with fewer games than a window
+    df = pd.DataFrame(
+        {
+            "element": [5, 3, 5, 5, 3, 5, 8],
+            "round": [4, 1, 1, 2, 2, 3, 4],
+            "goals_scored": [1, 0, 2, np.nan, 1, 0, 3],
+            "minutes": [90, 45, 90, 30, 0, 90, 60],
+        }
+    )
+    metrics = ["goals_scored", "minutes"]
+
+    def template():
+        # Element 5 has a double gameweek and a rolling column already exists
+        return pd.DataFrame(
+            {"element": [5, 5, 3, 8], "minutes_rolling_3": 0, "round": 5}
+        )
+
+    expected = add_next_round_season_totals_loop(
+        df,
+        add_next_round_rolling_averages_loop(df, template(), metrics, [1, 3]),
+        metrics,
+    )
+    result = add_season_totals(
+        df, add_rolling_averages(df, template(), metrics, [1, 3]), metrics
+    )
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert result.loc[0, "goals_scored_rolling_3"] == 0.5
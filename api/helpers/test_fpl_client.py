@@ -0,0 +1,52 @@
+import pytest
+import requests
+
+from helpers.fpl_client import FplApiError, FplClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return self._payload
+
+
+def test_get_json_retries_until_success(monkeypatch):
+    client = FplClient(backoff_factor=0)
+    responses = [
+        FakeResponse(503),
+        FakeResponse(429, headers={"Retry-After": "0"}),
+        FakeResponse(200, {"elements": []}),
+    ]
+    monkeypatch.setattr(client.session, "get", lambda *a, **k: responses.pop(0))
+
+    assert client.get_json("http://fpl.test/bootstrap-static/") == {"elements": []}
+    assert responses == []
+
+
+def test_get_json_raises_after_retries(monkeypatch):
+    client = FplClient(max_retries=2, backoff_factor=0)
+    calls = []
+
+    def fake_get(*args, **kwargs):
+        calls.append(args)
+        return FakeResponse(500)
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+
+    with pytest.raises(FplApiError):
+        client.get_json("http://fpl.test/fixtures/")
+    assert len(calls) == 3
+
+
+def test_parse_retry_after():
+    assert FplClient._parse_retry_after("3") == 3.0
+    assert FplClient._parse_retry_after(None) is None
+    assert FplClient._parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
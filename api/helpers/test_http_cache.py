@@ -0,0 +1,98 @@
+import pytest
+
+from helpers.fpl_client import FplApiError
+from helpers.http_cache import HttpCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+def test_serves_fresh_entries_without_network(tmp_path):
+    client = FakeClient([FakeResponse(200, {"events": [1]}, {"ETag": '"v1"'})])
+    cache = HttpCache(cache_dir=str(tmp_path), ttl=60)
+
+    assert cache.get_json(client, "http://fpl.test/a") == {"events": [1]}
+    assert cache.get_json(client, "http://fpl.test/a") == {"events": [1]}
+    assert len(client.requests) == 1
+
+
+def test_revalidates_with_etag_from_disk(tmp_path):
+    url = "http://fpl.test/a"
+    first = FakeClient([FakeResponse(200, {"events": [1]}, {"ETag": '"v1"'})])
+    HttpCache(cache_dir=str(tmp_path), ttl=60).get_json(first, url)
+
+    # A new instance only has the on-disk copy and must revalidate it
+    second = FakeClient([FakeResponse(304)])
+    cache = HttpCache(cache_dir=str(tmp_path), ttl=60)
+
+    assert cache.get_json(second, url, max_age=0) == {"events": [1]}
+    assert second.requests == [{"If-None-Match": '"v1"'}]
+
+
+class FailingClient:
+    def get(self, url, headers=None):
+        raise ConnectionError("FPL API is down")
+
+
+def test_forced_revalidation_does_not_serve_stale_bodies(tmp_path):
+    url = "http://fpl.test/a"
+    cache = HttpCache(cache_dir=str(tmp_path), ttl=60)
+    cache.get_json(FakeClient([FakeResponse(200, {"events": [1]})]), url)
+    cache._memory[url]["fetched_at"] -= 120
+
+    # Ordinary reads fall back to the stale body, forced fresh reads fail
+    assert cache.get_json(FailingClient(), url) == {"events": [1]}
+    with pytest.raises(FplApiError):
+        cache.get_json(FailingClient(), url, max_age=0)
+
+
+def test_not_modified_only_rewrites_the_metadata(tmp_path, monkeypatch):
+    url = "http://fpl.test/a"
+    cache = HttpCache(cache_dir=str(tmp_path), ttl=60)
+    cache.get_json(
+        FakeClient([FakeResponse(200, {"events": [1]}, {"ETag": '"v1"'})]), url
+    )
+
+    written = []
+    write = cache._write
+    monkeypatch.setattr(
+        cache, "_write", lambda path, data: written.append(path) or write(path, data)
+    )
+    cache.get_json(FakeClient([FakeResponse(304)]), url, max_age=0)
+
+    assert [path.endswith(".meta.json") for path in written] == [True]
+
+
+def test_network_requests_run_outside_the_lock(tmp_path):
+    cache = HttpCache(cache_dir=str(tmp_path), ttl=60)
+    locked = []
+
+    class CheckingClient(FakeClient):
+        def get(self, url, headers=None):
+            locked.append(cache._lock.locked())
+            return super().get(url, headers)
+
+    client = CheckingClient([FakeResponse(200, {"events": [1]})])
+    cache.get_json(client, "http://fpl.test/a")
+
+    assert locked == [False]
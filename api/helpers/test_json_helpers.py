@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+import helpers.json_helpers as jh
+
+RECORDS = [
+    {"element": 1, "round": 1, "expected_goals": "0.45", "was_home": True},
+    {"element": 1, "round": 2, "expected_goals": "1.10", "was_home": False},
+    {"element": 2, "round": 1, "expected_goals": "0.00", "was_home": True, "x": 3},
+]
+
+
+def test_iter_json_array_matches_json_load(tmp_path, monkeypatch):
+    # Force the pure-Python parser and a tiny buffer so items span reads
+    monkeypatch.setattr(jh, "ijson", None)
+    monkeypatch.setattr(jh, "READ_SIZE", 7)
+
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps(RECORDS + [12, -3.5, "a]b", []], indent=2))
+
+    assert list(jh.iter_json_array(str(path))) == RECORDS + [12, -3.5, "a]b", []]
+
+
+def test_read_records_frame_types_columns_in_chunks(tmp_path):
+    path = tmp_path / "history.ndjson"
+    jh.save_to_ndjson(RECORDS, str(path))
+
+    df = jh.read_records_frame(
+        str(path), dtypes={"expected_goals": "float64"}, chunk_size=2
+    )
+
+    assert df["expected_goals"].dtype == np.float64
+    assert df["expected_goals"].tolist() == [0.45, 1.10, 0.0]
+    assert df["round"].tolist() == [1, 2, 1]
+    # "x" first appears in the second chunk, earlier rows are NaN
+    assert df["x"].isna().tolist() == [True, True, False]
+
+
+def test_save_to_ndjson_keeps_the_previous_file_when_writing_fails(tmp_path):
+    path = tmp_path / "history.ndjson"
+    jh.save_to_ndjson(RECORDS, str(path))
+
+    def failing_records():
+        yield RECORDS[0]
+        raise ConnectionError("fetch interrupted")
+
+    with pytest.raises(ConnectionError):
+        jh.save_to_ndjson(failing_records(), str(path))
+
+    assert list(jh.iter_ndjson(str(path))) == RECORDS
+    assert [p.name for p in tmp_path.iterdir()] == ["history.ndjson"]
@@ -0,0 +1,84 @@
+import os
+
+import pandas as pd
+
+from helpers.model_registry import ModelRegistry
+
+
+def make_frame(goals=(1, 0, 2)):
+    return pd.DataFrame(
+        {
+            "element_type": [2, 3, 4],
+            "selected": [10.0, 20.0, 30.0],
+            "goals_scored": list(goals),
+        }
+    )
+
+
+class FakeTrainer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, model_type, df, categorical, numerical, target):
+        self.calls.append(target)
+        return {"model_type": model_type, "target": target, "rows": len(df)}
+
+
+def test_reuses_models_trained_on_identical_data(tmp_path):
+    train = FakeTrainer()
+    args = ("Linear Regression", make_frame(), ["element_type"], ["selected"])
+
+    registry = ModelRegistry(cache_dir=str(tmp_path))
+    first = registry.get_or_train(train, *args, "goals_scored")
+    assert registry.get_or_train(train, *args, "goals_scored") is first
+
+    # A new instance, as in a cold worker, loads the model from disk
+    cold = ModelRegistry(cache_dir=str(tmp_path))
+    assert cold.get_or_train(train, *args, "goals_scored") == first
+
+    assert train.calls == ["goals_scored"]
+    assert registry.stats["memory_hits"] == 1
+    assert cold.stats["disk_hits"] == 1
+
+
+def test_changed_data_or_features_retrain(tmp_path):
+    train = FakeTrainer()
+    registry = ModelRegistry(cache_dir=str(tmp_path))
+
+    registry.get_or_train(
+        train, "Linear Regression", make_frame(), [], ["selected"], "goals_scored"
+    )
+    registry.get_or_train(
+        train,
+        "Linear Regression",
+        make_frame(goals=(1, 0, 3)),
+        [],
+        ["selected"],
+        "goals_scored",
+    )
+    registry.get_or_train(
+        train,
+        "Linear Regression",
+        make_frame(),
+        ["element_type"],
+        ["selected"],
+        "goals_scored",
+    )
+
+    assert len(train.calls) == 3
+
+
+def test_evicts_least_recently_used_files(tmp_path):
+    registry = ModelRegistry(
+        cache_dir=str(tmp_path), max_disk_entries=2, max_memory_entries=0
+    )
+
+    registry.store("a", {"model": "a"})
+    registry.store("b", {"model": "b"})
+    # Make "a" the most recently used before a third model arrives
+    os.utime(tmp_path / "b.joblib", (0, 0))
+    assert registry.load("a") == {"model": "a"}
+    registry.store("c", {"model": "c"})
+
+    assert sorted(os.listdir(tmp_path)) == ["a.joblib", "c.joblib"]
+    assert registry.load("b") is None
@@ -0,0 +1,21 @@
+import os
+
+from helpers.online_store import OnlineModelStore, checkpoint_key
+
+
+def test_keeps_the_most_recently_used_checkpoints(tmp_path):
+    store = OnlineModelStore(cache_dir=str(tmp_path), max_checkpoints=2)
+    key = checkpoint_key("Online Linear Regression", "goals_scored", ["a"], ["b"])
+    store.store(key, 5, "real", {"round": 5})
+    store.store(key, 6, "predicted", {"round": 6})
+    for last_round, data_key in [(5, "real"), (6, "predicted")]:
+        path = os.path.join(str(tmp_path), key, f"{last_round}_{data_key}.joblib")
+        os.utime(path, (last_round, last_round))
+
+    # Loading the real round checkpoint keeps it past later predicted rounds
+    assert store.load(key, 5, "real") == {"round": 5}
+    store.store(key, 7, "predicted", {"round": 7})
+
+    assert store.checkpoints(key) == [(7, "predicted"), (5, "real")]
+    assert store.load(key, 6, "predicted") is None
+    assert store.checkpoints("missing") == []
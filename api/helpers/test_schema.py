@@ -0,0 +1,34 @@
+import pandas as pd
+
+import helpers.schema as sc
+
+
+def test_compact_frame_downcasts_only_columns_that_fit():
+    df = pd.DataFrame(
+        {
+            "element": [1, 2, 700],
+            "web_name": ["Salah", "Saka", "Salah"],
+            "minutes": [90.0, 0.0, 45.0],
+            "total_points": [2.4, 6.1, 0.3],
+            "selected": [5_000_000, 120, 0],
+            "goals_scored": [0.0, None, 1.0],
+            "minutes_rolling_3": [90.0, 45.5, 0.0],
+            "was_home": [True, False, True],
+        }
+    )
+
+    compact = sc.compact_frame(df)
+
+    assert compact["element"].dtype == "int16"
+    assert compact["web_name"].dtype == "category"
+    assert compact["minutes"].dtype == "int16"
+    assert compact["selected"].dtype == "int32"
+    assert compact["minutes_rolling_3"].dtype == "float32"
+    # Fractional predictions, missing values and unknown columns are kept
+    assert compact["total_points"].dtype == "float64"
+    assert compact["goals_scored"].dtype == "float64"
+    assert compact["was_home"].dtype == bool
+    pd.testing.assert_frame_equal(
+        compact.astype(df.dtypes.to_dict()), df, check_exact=False
+    )
+    assert sc.memory_usage_mb(compact) < sc.memory_usage_mb(df)
@@ -0,0 +1,63 @@
+import logging
+
+import pandas as pd
+import pytest
+
+import helpers.storage as st
+
+
+@pytest.fixture(params=["parquet", "json"])
+def storage_format(request, monkeypatch):
+    if request.param == "parquet" and st.pq is None:
+        pytest.skip("pyarrow is not installed")
+    monkeypatch.setattr(st, "STORAGE_FORMAT", request.param)
+    return request.param
+
+
+def make_frame():
+    return pd.DataFrame(
+        {
+            "element": [1, 2, 1, 2, 1, 2],
+            "round": [1, 1, 2, 2, 3, 3],
+            "web_name": ["Salah", "Saka"] * 3,
+            "total_points": [2.0, 6.0, 12.0, 1.0, 5.0, 8.0],
+        }
+    )
+
+
+def test_round_trip_with_projection_and_filters(tmp_path, storage_format):
+    path = st.save_frame(make_frame(), "predictions", data_dir=str(tmp_path))
+    assert path.endswith(storage_format)
+
+    df = st.load_frame(
+        "predictions",
+        columns=["element", "total_points", "missing_column"],
+        rounds=[2, 3],
+        elements=[2],
+        data_dir=str(tmp_path),
+    )
+
+    assert list(df.columns) == ["element", "total_points"]
+    assert df.to_dict("records") == [
+        {"element": 2, "total_points": 1.0},
+        {"element": 2, "total_points": 8.0},
+    ]
+
+
+def test_parquet_falls_back_to_existing_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(st, "STORAGE_FORMAT", "json")
+    st.save_frame(make_frame(), "summed", data_dir=str(tmp_path))
+
+    monkeypatch.setattr(st, "STORAGE_FORMAT", "parquet")
+    df = st.load_frame("summed", rounds=[1], data_dir=str(tmp_path))
+
+    assert df["element"].tolist() == [1, 2]
+
+
+def test_compact_loads_log_a_memory_report(tmp_path, storage_format, caplog):
+    st.save_frame(make_frame(), "predictions", data_dir=str(tmp_path))
+
+    with caplog.at_level(logging.INFO):
+        st.load_frame("predictions", data_dir=str(tmp_path))
+
+    assert "predictions memory:" in caplog.text
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from helpers.training_scheduler import load_shared_frame, plan_workers, share_frame
+
+
+def test_plan_workers_splits_cpus_between_and_within_tasks():
+    assert plan_workers(12, n_cpus=8) == (8, 1)
+    assert plan_workers(3, n_cpus=8) == (3, 2)
+    assert plan_workers(12, n_workers=2, n_cpus=8) == (2, 4)
+    assert plan_workers(12, n_workers=1, n_cpus=8) == (1, 8)
+    # An explicit request is honoured, each task then runs single-threaded
+    assert plan_workers(12, n_workers=4, n_cpus=2) == (4, 1)
+
+
+def test_shared_frame_is_memory_mapped(tmp_path):
+    df = pd.DataFrame(
+        {
+            "element_type": np.array([1, 2, 3], dtype="int8"),
+            "selected": [0.5, 1.5, 2.5],
+            "was_home": [True, False, True],
+        }
+    )
+
+    shared = load_shared_frame(share_frame(df, str(tmp_path)))
+
+    # Numeric columns are views of the file rather than copies
+    for column in df.columns:
+        assert isinstance(shared[column].to_numpy().base, np.memmap)
+    pd.testing.assert_frame_equal(shared.copy(deep=True), df)
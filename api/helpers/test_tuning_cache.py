@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from helpers.tuning_cache import TuningCache, data_profile, retune_reason
+
+
+def make_profile(n_rows=100, shift=0.0):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"selected": rng.normal(size=n_rows) + shift})
+    y = pd.Series(rng.integers(0, 3, n_rows), name="goals_scored")
+    return data_profile(X, y)
+
+
+def test_reuses_parameters_until_rows_grow(tmp_path):
+    cache = TuningCache(cache_dir=str(tmp_path), growth=1.25)
+    # Sampled parameters are numpy scalars
+    cache.store("key", {"regressor__max_depth": np.int64(4)}, make_profile(100))
+
+    # A cold worker reads the stored entry
+    cold = TuningCache(cache_dir=str(tmp_path), growth=1.25)
+    assert cold.lookup("key", make_profile(110)) == {"regressor__max_depth": 4}
+    assert cold.lookup("key", make_profile(130)) is None
+    assert cold.lookup("missing", make_profile(100)) is None
+    assert cold.stats == {"hits": 1, "misses": 1, "retunes": 1}
+
+
+def test_drifted_columns_force_a_retune():
+    tuned = make_profile()
+
+    assert retune_reason(tuned, make_profile(shift=0.1), drift_threshold=0.5) is None
+    assert "selected" in retune_reason(
+        tuned, make_profile(shift=1.0), drift_threshold=0.5
+    )
@@ -0,0 +1,133 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, Optional, Tuple
+
+import joblib
+import pandas as pd
+
+# Worker processes used to train targets; unset means one per CPU
+DEFAULT_WORKERS = (
+    int(os.environ["FPL_TRAINING_WORKERS"])
+    if os.environ.get("FPL_TRAINING_WORKERS")
+    else None
+)
+
+
+def plan_workers(
+    n_tasks: int, n_workers: Optional[int] = None, n_cpus: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Split the CPUs between tasks and the parallelism inside each task.
+
+    Parameters:
+    - n_tasks: number of independent tasks
+    - n_workers: requested worker processes, None for one per CPU
+    - n_cpus: CPUs available, None to detect
+
+    Returns:
+    - (workers, inner_jobs): processes to run the tasks in, and the n_jobs
+      each task may use itself so workers * inner_jobs stays within n_cpus
+    """
+    n_cpus = n_cpus or joblib.cpu_count()
+    workers = n_cpus if n_workers is None else n_workers
+    workers = max(1, min(workers, n_tasks))
+    return workers, max(1, n_cpus // workers)
+
+
+def share_frame(df: pd.DataFrame, folder: str) -> str:
+    """
+    Write df's columns to a file that worker processes can memory-map.
+
+    Numeric columns are mapped read-only by every worker instead of being
+    pickled into each task; other columns are stored with the file as they are.
+    """
+    path = os.path.join(folder, "training_frame.joblib")
+    joblib.dump({column: df[column].to_numpy() for column in df.columns}, path)
+    return path
+
+
+def load_shared_frame(path: str) -> pd.DataFrame:
+    return pd.DataFrame(joblib.load(path, mmap_mode="r"), copy=False)
+
+
+def _run_task(
+    cwd: str,
+    train: Callable,
+    path: str,
+    model_type: str,
+    categorical: list,
+    numerical: list,
+    target: str,
+    n_jobs: int,
+):
+    # Reused workers keep the directory they were started in, and train
+    # functions write relative paths
+    os.chdir(cwd)
+    df = load_shared_frame(path)
+    return train(model_type, df, categorical, numerical, target, n_jobs=n_jobs)
+
+
+def train_targets(
+    train: Callable,
+    model_type: str,
+    df: pd.DataFrame,
+    target_columns: Dict[str, tuple],
+    n_workers: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Train one model per target, fanning the targets out over worker processes.
+
+    Parameters:
+    - train: called as train(model_type, df, categorical, numerical, target,
+      n_jobs=...); must be importable by the workers
+    - model_type: model name passed to train
+    - df: training data, shared with the workers through a memory-mapped
+      file, so it should hold only the columns the targets train on
+    - target_columns: maps each target to its (categorical, numerical) features
+    - n_workers: worker processes, None for DEFAULT_WORKERS (the
+      FPL_TRAINING_WORKERS environment variable, else one per CPU); 1 trains
+      in-process
+
+    Returns:
+    - Dict mapping each target to its trained model, in target_columns order
+    """
+    workers, inner_jobs = plan_workers(
+        len(target_columns), DEFAULT_WORKERS if n_workers is None else n_workers
+    )
+
+    if workers == 1:
+        return {
+            target: train(
+                model_type, df, categorical, numerical, target, n_jobs=inner_jobs
+            )
+            for target, (categorical, numerical) in target_columns.items()
+        }
+
+    logging.info(
+        f"Training {len(target_columns)} targets on {workers} workers "
+        f"with n_jobs={inner_jobs} each"
+    )
+
+    folder = tempfile.mkdtemp(prefix="fpl_training_")
+    try:
+        path = share_frame(df, folder)
+        with joblib.parallel_config(backend="loky", inner_max_num_threads=inner_jobs):
+            models = joblib.Parallel(n_jobs=workers)(
+                joblib.delayed(_run_task)(
+                    os.getcwd(),
+                    train,
+                    path,
+                    model_type,
+                    categorical,
+                    numerical,
+                    target,
+                    inner_jobs,
+                )
+                for target, (categorical, numerical) in target_columns.items()
+            )
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return dict(zip(target_columns, models))
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+DEFAULT_TUNING_DIR = os.environ.get("FPL_TUNING_DIR", "data/tuning")
+# Retune once the training rows grow (or shrink) by this factor
+DEFAULT_RETUNE_GROWTH = float(os.environ.get("FPL_RETUNE_GROWTH", 1.25))
+# Retune once a column's mean moves by this many of its tuned standard deviations
+DEFAULT_DRIFT_THRESHOLD = float(os.environ.get("FPL_TUNING_DRIFT", 0.5))
+
+# Bump when a change to the search makes previously tuned parameters stale
+TUNING_VERSION = 1
+
+
+def tuning_key(
+    model_type: str,
+    target,
+    categorical_features: List[str],
+    numerical_features: List[str],
+) -> str:
+    """Cache key of the hyperparameters tuned for a model type, target and feature set."""
+    spec = {
+        "version": TUNING_VERSION,
+        "sklearn": sklearn.__version__,
+        "model_type": model_type,
+        "target": target if isinstance(target, str) else list(target),
+        "categorical_features": list(categorical_features),
+        "numerical_features": list(numerical_features),
+    }
+    return hashlib.sha256(json.dumps(spec).encode()).hexdigest()
+
+
+def data_profile(X: pd.DataFrame, y) -> dict:
+    """
+    Summary of the data a search ran on, compared later to detect drift.
+
+    Parameters:
+    - X: numerical training features
+    - y: training target, a Series or a DataFrame with one column per target
+
+    Returns:
+    - {"rows": row count, "columns": {column: [mean, std]}}
+    """
+    frame = pd.concat([X, y.to_frame() if isinstance(y, pd.Series) else y], axis=1)
+    numeric = frame.select_dtypes(include="number").astype("float64")
+    return {
+        "rows": len(frame),
+        "columns": {
+            column: [float(numeric[column].mean()), float(numeric[column].std())]
+            for column in numeric.columns
+        },
+    }
+
+
+def retune_reason(
+    tuned: dict,
+    profile: dict,
+    growth: float = DEFAULT_RETUNE_GROWTH,
+    drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+) -> Optional[str]:
+    """
+    Why parameters tuned on one profile should not be reused for another.
+
+    Returns:
+    - A description of the row growth or drifted column, or None to reuse them
+    """
+    ratio = profile["rows"] / max(tuned["rows"], 1)
+    if ratio >= growth or ratio <= 1 / growth:
+        return f"training rows changed from {tuned['rows']} to {profile['rows']}"
+
+    for column, (mean, _) in profile["columns"].items():
+        if column not in tuned["columns"]:
+            return f"column {column} was not tuned on"
+        tuned_mean, tuned_std = tuned["columns"][column]
+        # Constant columns drift on any change of value
+        shift = abs(mean - tuned_mean) / (tuned_std if tuned_std > 0 else 1e-9)
+        if shift > drift_threshold:
+            return f"mean of {column} drifted by {shift:.2f} standard deviations"
+
+    return None
+
+
+def _plain(value):
+    # Sampled parameters are numpy scalars, which json cannot write
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class TuningCache:
+    """
+    Hyperparameters chosen by the search, per model type, target and feature set.
+
+    Each entry keeps the parameters with a profile of the data they were
+    tuned on. They are reused for later training runs, which then skip the
+    search, until the training rows grow by the growth factor or a feature or
+    target mean drifts past the threshold.
+
+    Parameters:
+    - cache_dir: directory the entries are written to
+    - growth: row growth (or shrink) factor that forces a retune
+    - drift_threshold: shift of a column mean, in tuned standard deviations,
+      that forces a retune
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_TUNING_DIR,
+        growth: float = DEFAULT_RETUNE_GROWTH,
+        drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+    ):
+        self.cache_dir = cache_dir
+        self.growth = growth
+        self.drift_threshold = drift_threshold
+        self.stats = {"hits": 0, "misses": 0, "retunes": 0}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to training worker processes, which get a lock of their own;
+        # the entries on disk are shared through os.replace
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        """Return the entry stored under a key, or None."""
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding unreadable tuning entry {key}: {e}")
+            return None
+
+    def lookup(self, key: str, profile: dict) -> Optional[Dict[str, object]]:
+        """
+        Return the cached parameters if they still fit the data profile, else None.
+        """
+        with self._lock:
+            entry = self.load(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            reason = retune_reason(
+                entry["profile"], profile, self.growth, self.drift_threshold
+            )
+            if reason is not None:
+                logging.info(f"Retuning hyperparameters: {reason}")
+                self.stats["retunes"] += 1
+                return None
+
+            self.stats["hits"] += 1
+            return entry["hyperparameters"]
+
+    def store(self, key: str, hyperparameters: Dict[str, object], profile: dict):
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            entry = {
+                "hyperparameters": {
+                    name: _plain(value) for name, value in hyperparameters.items()
+                },
+                "profile": profile,
+            }
+
+            # Write to a temporary file first so readers never load a partial entry
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f, indent=4)
+            os.replace(tmp_path, path)
+
+
+_tuning_cache = None
+
+
+def get_tuning_cache() -> TuningCache:
+    """Return the shared tuning cache, creating it on first use."""
+    global _tuning_cache
+    if _tuning_cache is None:
+        _tuning_cache = TuningCache()
+    return _tuning_cache
@@ -0,0 +1,138 @@
+import azure.functions as func
+import numpy as np
+import pandas as pd
+import pytest
+
+import function_app
+import functions.data_ingestion as di
+import functions.feature_registry as fr
+import functions.feature_store as fs
+from benchmarks.fpl_stub_server import FplStubServer, PayloadStore
+from benchmarks.synthetic_fpl import generate_season
+
+
+@pytest.fixture
+def fpl_api(monkeypatch):
+    payloads = generate_season(finished_rounds=5, players_per_team=3)
+    # The last round with results is still in progress
+    payloads["bootstrap-static"]["events"][4]["finished"] = False
+    for fixture in payloads["fixtures"]:
+        fixture["finished"] &= fixture["event"] < 5
+
+    with FplStubServer(PayloadStore(payloads=payloads)) as server:
+        monkeypatch.setattr(di, "BASE_URL", server.base_url)
+        yield
+
+
+def injest(mode: str) -> pd.DataFrame:
+    response = function_app.injest_data(
+        func.HttpRequest(
+            method="GET", url="/api/injest_data", params={"mode": mode}, body=b""
+        )
+    )
+    assert response.status_code == 200, response.get_body()
+    return fs.load_store()
+
+
+def test_full_and_incremental_modes_store_the_same_frame(
+    fpl_api, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    full = injest("full")
+    incremental = injest("incremental")
+
+    # Only finished rounds, so predictions start from the same round
+    assert full["round"].max() == 4
+    pd.testing.assert_frame_equal(full, incremental)
+
+
+def test_bootstrap_snapshot_is_kept_when_the_history_is_not_saved(
+    fpl_api, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    def disk_full(records, file_name):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(function_app.jh, "save_to_ndjson", disk_full)
+
+    with pytest.raises(OSError):
+        injest("full")
+    assert not (tmp_path / "data" / "bootstrap_data.json").exists()
+
+
+def test_targets_only_compute_the_features_they_use():
+    rng = np.random.default_rng(0)
+    n_rows = 40
+    df = pd.DataFrame(
+        {
+            "element": rng.integers(1, 6, n_rows),
+            "round": rng.integers(1, 9, n_rows),
+            "team": rng.integers(1, 3, n_rows),
+            "was_home": rng.integers(0, 2, n_rows).astype(bool),
+            "element_type": rng.integers(1, 5, n_rows),
+            "selected": rng.normal(size=n_rows),
+        }
+    ).assign(
+        **{
+            metric: rng.integers(0, 3, n_rows)
+            for metric in function_app.engineering_features
+        }
+    )
+
+    goalkeeper = fr.FeatureResolver(fr.default_registry(), df)
+    goalkeeper.frame(function_app.target_features["saves"])
+    outfield = fr.FeatureResolver(fr.default_registry(), df)
+    outfield.frame(function_app.target_features["goals_scored"])
+
+    assert "saves_rolling_3" in goalkeeper.computed
+    assert not any(name.startswith("goals_scored_") for name in goalkeeper.computed)
+    assert "goals_scored_rolling_3" in outfield.computed
+    assert not any(name.startswith("saves_") for name in outfield.computed)
+
+
+def test_predictions_read_the_feature_store(fpl_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "metrics").mkdir()
+    injest("incremental")
+
+    response = function_app.make_predictions(
+        func.HttpRequest(
+            method="GET",
+            url="/api/make_predictions",
+            params={"model": "Linear Regression"},
+            body=b"",
+        )
+    )
+
+    assert response.status_code == 200, response.get_body()
+    # Ingestion no longer writes a merged copy of the store
+    assert not list((tmp_path / "data").glob("merged_players_with_fixtures.*"))
+
+
+def test_ingestion_stops_when_fresh_data_cannot_be_fetched(
+    fpl_api, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    injest("full")
+    bootstrap = (tmp_path / "data" / "bootstrap_data.json").read_text()
+
+    class DownClient:
+        def get(self, url, headers=None):
+            raise ConnectionError("FPL API is down")
+
+    monkeypatch.setattr(di, "get_client", lambda: DownClient())
+    response = function_app.injest_data(
+        func.HttpRequest(
+            method="GET", url="/api/injest_data", params={"mode": "full"}, body=b""
+        )
+    )
+
+    # The cached bootstrap snapshot is not served, or saved, as fresh data
+    assert response.status_code == 502
+    assert (tmp_path / "data" / "bootstrap_data.json").read_text() == bootstrap
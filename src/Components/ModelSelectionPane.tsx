@@ -17,6 +17,8 @@ import {
     IconTrees,
     IconBolt,
     IconChartDots,
+    IconChartHistogram,
+    IconRefresh,
 } from "@tabler/icons-react";
 
 export const ModelSelectionPane: React.FC = () => {
@@ -46,6 +48,11 @@ export const ModelSelectionPane: React.FC = () => {
             description: "A linear approach to regression",
             icon: <IconTrendingUp size={20} color={iconColor} />,
         },
+        {
+            name: "Online Linear Regression",
+            description: "Updates from each new gameweek only",
+            icon: <IconRefresh size={20} color={iconColor} />,
+        },
         {
             name: "Decision Tree",
             description: "A tree-based model for classification",
@@ -61,6 +68,11 @@ export const ModelSelectionPane: React.FC = () => {
             description: "Builds trees sequentially",
             icon: <IconBolt size={20} color={iconColor} />,
         },
+        {
+            name: "Histogram Gradient Boosting",
+            description: "Faster boosting on binned features",
+            icon: <IconChartHistogram size={20} color={iconColor} />,
+        },
         {
             name: "Support Vector Machine",
             description: "Works well on high-dimensional data",